@@ -23,7 +23,7 @@ import uvloop
 from pyrogram.client import Client
 
 import elysian_chem_bot.coloured_logging_setup  # noqa: F401
-from elysian_chem_bot import command_helps, database
+from elysian_chem_bot import command_helps, commands, database, metrics, outbound, tree_indexer
 
 _log: logging.Logger = logging.getLogger(__name__)
 
@@ -32,6 +32,16 @@ API_HASH: str = os.getenv("API_HASH", "")
 BOT_TOKEN: str = os.getenv("BOT_TOKEN", "")
 MODULE_DIR: str = str(Path(inspect.getfile(lambda _: _)).parent)
 DB_PERSIST_PATH: str = os.getenv("DB_PERSIST_PATH", "/persist/db.json")
+DB_BACKEND: str = os.getenv("DB_BACKEND", "json")
+DB_SNAPSHOT_DELAY: float = float(os.getenv("DB_SNAPSHOT_DELAY", "30"))
+MATERIAL_PAGE_SIZE: int = int(os.getenv("MATERIAL_PAGE_SIZE", "20"))
+UPLOAD_CONCURRENCY: int = int(os.getenv("UPLOAD_CONCURRENCY", "4"))
+OUTBOUND_GLOBAL_RATE: float = float(os.getenv("OUTBOUND_GLOBAL_RATE", "25"))
+OUTBOUND_CHAT_RATE: float = float(os.getenv("OUTBOUND_CHAT_RATE", "1"))
+DOWNLOAD_CACHE_MAX_BYTES: int = int(os.getenv("DOWNLOAD_CACHE_MAX_BYTES", str(1024**3)))
+INLINE_CACHE_TTL: float = float(os.getenv("INLINE_CACHE_TTL", "300"))
+METRICS_HOST: str = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT: int = int(os.getenv("METRICS_PORT", "0"))
 
 SUPER_USERS: list[int] = [1024853832]
 
@@ -51,5 +61,13 @@ plugins: dict[str, str] = {"root": f"{__name__.removesuffix('.main')}.plugins"}
 uvloop.install()
 app: Client = Client("elysian_chem_bot", api_id=API_ID, api_hash=API_HASH, bot_token=BOT_TOKEN, plugins=plugins)
 
-db_instance: database.Database = database.Database(DB_PERSIST_PATH)
+db_instance: database.Database = database.Database(
+    DB_PERSIST_PATH, backend=database.create_backend(DB_BACKEND, DB_PERSIST_PATH, DB_SNAPSHOT_DELAY)
+)
+indexer_instance: tree_indexer.TreeIndexer = tree_indexer.TreeIndexer(db_instance)
 cmdhelp_instance: command_helps.CommandHelps = command_helps.CommandHelps(app)
+identity_instance: commands.BotIdentity = commands.BotIdentity()
+outbound_instance: outbound.OutboundScheduler = outbound.OutboundScheduler(
+    global_rate=OUTBOUND_GLOBAL_RATE, chat_rate=OUTBOUND_CHAT_RATE
+)
+metrics_instance: metrics.Metrics = metrics.Metrics()
@@ -0,0 +1,165 @@
+# SPDX-License-Identifier: Apache-2.0
+#
+# Copyright 2025 Firdaus Hakimi <hakimifirdaus944@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import logging
+import zipfile
+from dataclasses import dataclass
+from pathlib import PurePosixPath
+from tempfile import SpooledTemporaryFile
+from types import TracebackType
+from typing import IO, Self
+
+log: logging.Logger = logging.getLogger(__name__)
+
+CHUNK_SIZE: int = 1024 * 1024
+# members up to this size stay in memory, bigger ones spill to a temporary file
+SPOOL_MAX_SIZE: int = 8 * 1024 * 1024
+# tiny members can have silly compression ratios without being dangerous
+RATIO_CHECK_MIN_SIZE: int = 1024 * 1024
+
+
+class ArchiveLimitError(ValueError):
+    """The archive exceeds one of the ArchiveLimits, it might be a zip bomb."""
+
+
+@dataclass(frozen=True)
+class ArchiveLimits:
+    max_members: int = 200
+    max_member_size: int = 512 * 1024 * 1024
+    max_total_size: int = 2 * 1024 * 1024 * 1024
+    max_compression_ratio: int = 200
+
+
+@dataclass
+class ExtractedMember:
+    """A member of the archive, extracted into a spooled buffer.
+
+    `data` is positioned at the start and must be closed by the caller.
+    """
+
+    name: str
+    size: int
+    md5sum: str
+    data: IO[bytes]
+
+
+class ArchiveReader:
+    """Extracts a zip archive one member at a time, without writing the whole tree to disk.
+
+    Every method blocks, so call them from a worker thread.
+    """
+
+    def __init__(self, path: str, limits: ArchiveLimits | None = None) -> None:
+        """Opens the archive and checks its central directory against the limits.
+
+        Args:
+            path (str): Path of the zip archive.
+            limits (ArchiveLimits | None): Limits to enforce, the defaults if None.
+
+        Raises:
+            zipfile.BadZipFile: If it's not a zip archive.
+            ArchiveLimitError: If the archive declares too many or too big members.
+
+        """
+        self.limits: ArchiveLimits = limits or ArchiveLimits()
+        self.extracted_size: int = 0
+        self._zip: zipfile.ZipFile = zipfile.ZipFile(path)
+        try:
+            self.members: list[zipfile.ZipInfo] = self._check_members()
+        except BaseException:
+            self._zip.close()
+            raise
+
+    def _check_members(self) -> list[zipfile.ZipInfo]:
+        members: list[zipfile.ZipInfo] = []
+        for info in self._zip.infolist():
+            if info.is_dir():
+                continue
+
+            if info.flag_bits & 0x1:
+                log.warning("skipping encrypted member '%s'", info.filename)
+                continue
+
+            members.append(info)
+
+        if len(members) > self.limits.max_members:
+            msg = f"archive has {len(members)} files, the limit is {self.limits.max_members}"
+            raise ArchiveLimitError(msg)
+
+        declared_size = sum(info.file_size for info in members)
+        if declared_size > self.limits.max_total_size:
+            msg = f"archive extracts to {declared_size} bytes, the limit is {self.limits.max_total_size}"
+            raise ArchiveLimitError(msg)
+
+        for info in members:
+            self._check_member_size(info, info.file_size)
+
+        return members
+
+    def _check_member_size(self, info: zipfile.ZipInfo, size: int) -> None:
+        if size > self.limits.max_member_size:
+            msg = f"'{info.filename}' extracts to more than {self.limits.max_member_size} bytes"
+            raise ArchiveLimitError(msg)
+
+        if size > RATIO_CHECK_MIN_SIZE and size > max(info.compress_size, 1) * self.limits.max_compression_ratio:
+            msg = f"'{info.filename}' is compressed more than {self.limits.max_compression_ratio}:1"
+            raise ArchiveLimitError(msg)
+
+    def _check_extracted_size(self) -> None:
+        if self.extracted_size > self.limits.max_total_size:
+            msg = f"archive extracts to more than {self.limits.max_total_size} bytes"
+            raise ArchiveLimitError(msg)
+
+    def extract(self, info: zipfile.ZipInfo) -> ExtractedMember:
+        """Streams one member into a spooled buffer, hashing it on the way.
+
+        The sizes in the archive can lie, so the limits are enforced again
+        on the bytes that actually come out.
+
+        Raises:
+            ArchiveLimitError: If the member or the archive so far gets too big.
+
+        """
+        md5sum = hashlib.md5(usedforsecurity=False)
+        data: IO[bytes] = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)  # noqa: SIM115
+        size = 0
+        try:
+            with self._zip.open(info) as member:
+                while chunk := member.read(CHUNK_SIZE):
+                    size += len(chunk)
+                    self.extracted_size += len(chunk)
+                    self._check_member_size(info, size)
+                    self._check_extracted_size()
+                    md5sum.update(chunk)
+                    data.write(chunk)
+        except BaseException:
+            data.close()
+            raise
+
+        data.seek(0)
+        return ExtractedMember(PurePosixPath(info.filename).name, size, md5sum.hexdigest(), data)
+
+    def close(self) -> None:  # noqa: D102
+        self._zip.close()
+
+    def __enter__(self) -> Self:  # noqa: D105
+        return self
+
+    def __exit__(  # noqa: D105
+        self, exc_type: type[BaseException] | None, exc: BaseException | None, tb: TracebackType | None
+    ) -> None:
+        self.close()
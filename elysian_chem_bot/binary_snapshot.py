@@ -0,0 +1,305 @@
+# SPDX-License-Identifier: Apache-2.0
+#
+# Copyright 2025 Firdaus Hakimi <hakimifirdaus944@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+from elysian_chem_bot.database_types import FileNode, Node, SectionNode
+from elysian_chem_bot.storage import JsonBackend
+
+MAGIC: bytes = b"ECBSNAP\x00"
+FORMAT_VERSION: int = 1
+
+# magic, version, node count, then offsets of: nodes, string offsets, string data, blob offsets, blob data
+_HEADER = struct.Struct("<8sIIQQQQQ")
+# kind, flags, padding, name string, then first child and child count for sections,
+# or file_id blob and file_unique_id blob for files
+_NODE = struct.Struct("<BBHIII")
+_OFFSET = struct.Struct("<I")
+_OFFSETS = struct.Struct("<II")
+
+KIND_SECTION: int = 0
+KIND_FILE: int = 1
+# the packed id is text, it did not survive pack_file_id's round trip
+FLAG_FILE_ID_TEXT: int = 1
+FLAG_FILE_UNIQUE_ID_TEXT: int = 2
+
+
+class _Table:
+    """Builds a table of variable length items, stored as an offsets array followed by the data."""
+
+    def __init__(self) -> None:
+        self.offsets: bytearray = bytearray(_OFFSET.pack(0))
+        self.data: bytearray = bytearray()
+        self.count: int = 0
+
+    def add(self, item: bytes) -> int:
+        self.data += item
+        self.offsets += _OFFSET.pack(len(self.data))
+        self.count += 1
+        return self.count - 1
+
+
+class _Encoder:
+    """Lays out a tree breadth first, see encode_snapshot."""
+
+    def __init__(self) -> None:
+        self.strings: _Table = _Table()
+        self.string_ids: dict[bytes, int] = {b"": self.strings.add(b"")}
+        self.blobs: _Table = _Table()
+        self.nodes: bytearray = bytearray()
+        self.node_count: int = 0
+        # sections whose children still have to be written, with the index of their own node. Sections of a
+        # snapshot that were never read are the snapshot and their node in it, their children are copied as stored
+        self.pending: list[tuple[SectionNode | tuple[BinarySnapshot, int], int]] = []
+
+    def _name_id(self, name: bytes) -> int:
+        name_id = self.string_ids.get(name)
+        if name_id is None:
+            name_id = self.string_ids[name] = self.strings.add(name)
+
+        return name_id
+
+    def add_section(self, name: bytes, section: SectionNode) -> None:
+        source = section.unread_source() if isinstance(section, LazySectionNode) else None
+        if source is None:
+            self.add_pending_section(name, section, len(section.children))
+        else:
+            self.add_pending_section(name, source, source[0].child_count(source[1]))
+
+    def add_pending_section(self, name: bytes, source: SectionNode | tuple["BinarySnapshot", int], count: int) -> None:
+        self.pending.append((source, self.node_count))
+        self.nodes += _NODE.pack(KIND_SECTION, 0, 0, self._name_id(name), 0, count)
+        self.node_count += 1
+
+    def add_file(self, name: bytes, flags: int, file_id: bytes, file_unique_id: bytes) -> None:
+        self.nodes += _NODE.pack(
+            KIND_FILE, flags, 0, self._name_id(name), self.blobs.add(file_id), self.blobs.add(file_unique_id)
+        )
+        self.node_count += 1
+
+    def add_children(self, section: SectionNode) -> None:
+        for name, child in section.children.items():
+            if isinstance(child, SectionNode):
+                self.add_section(name.encode(), child)
+                continue
+
+            file_id, file_unique_id = child.packed_ids
+            flags = (FLAG_FILE_ID_TEXT if isinstance(file_id, str) else 0) | (
+                FLAG_FILE_UNIQUE_ID_TEXT if isinstance(file_unique_id, str) else 0
+            )
+            self.add_file(
+                name.encode(),
+                flags,
+                file_id.encode() if isinstance(file_id, str) else file_id,
+                file_unique_id.encode() if isinstance(file_unique_id, str) else file_unique_id,
+            )
+
+    def encode(self, root: SectionNode) -> list[bytes | bytearray]:
+        self.add_section(b"", root)
+        for source, index in self.pending:
+            # children start here, patch it into the node of the section, after kind, flags, padding and name
+            _OFFSET.pack_into(self.nodes, index * _NODE.size + 8, self.node_count)
+            if isinstance(source, SectionNode):
+                self.add_children(source)
+            else:
+                source[0].copy_children(source[1], self)
+
+        offsets = [_HEADER.size]
+        for part in (self.nodes, self.strings.offsets, self.strings.data, self.blobs.offsets):
+            offsets.append(offsets[-1] + len(part))
+
+        header = _HEADER.pack(MAGIC, FORMAT_VERSION, self.node_count, *offsets)
+        return [header, self.nodes, self.strings.offsets, self.strings.data, self.blobs.offsets, self.blobs.data]
+
+
+def encode_snapshot(root: SectionNode) -> bytes:
+    """Lays out the tree in the binary snapshot format.
+
+    Nodes are written breadth first, so the children of a section are one
+    contiguous run of the node table and can be read without reading
+    anything else. Names are deduplicated in the string table, ids are
+    stored packed in the blob table. Sections of a mapped snapshot that
+    were never read are copied from the map as they are stored, without
+    reading them into nodes, so compacting a lazily loaded tree costs
+    about the size of the file rather than the size of the tree.
+    """
+    return b"".join(_Encoder().encode(root))
+
+
+class BinarySnapshot:
+    """A binary snapshot, memory-mapped and read one section at a time."""
+
+    def __init__(self, path: str) -> None:
+        """Initialize BinarySnapshot.
+
+        Raises:
+            ValueError: If the file is not a binary snapshot this version can read.
+
+        """
+        with Path(path).open("rb") as f:
+            self._map: mmap.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.load_lock: threading.Lock = threading.Lock()
+
+        if len(self._map) < _HEADER.size:
+            msg = f"'{path}' is too short to be a binary snapshot"
+            raise ValueError(msg)
+
+        (
+            magic,
+            version,
+            self.node_count,
+            self._nodes,
+            self._string_offsets,
+            self._string_data,
+            self._blob_offsets,
+            self._blob_data,
+        ) = _HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            msg = f"'{path}' is not a binary snapshot of version {FORMAT_VERSION}"
+            raise ValueError(msg)
+
+    def _item(self, offsets: int, data: int, index: int) -> bytes:
+        start, end = _OFFSETS.unpack_from(self._map, offsets + index * _OFFSET.size)
+        return self._map[data + start : data + end]
+
+    def child_count(self, index: int) -> int:
+        """How many children the section at node `index` has."""
+        return _NODE.unpack_from(self._map, self._nodes + index * _NODE.size)[5]
+
+    def copy_children(self, index: int, encoder: _Encoder) -> None:
+        """Adds the children of the section at node `index` to `encoder` as they are stored, without any nodes."""
+        _, _, _, _, first, count = _NODE.unpack_from(self._map, self._nodes + index * _NODE.size)
+        for child_index in range(first, first + count):
+            kind, flags, _, name_id, a, b = _NODE.unpack_from(self._map, self._nodes + child_index * _NODE.size)
+            name = self._item(self._string_offsets, self._string_data, name_id)
+            if kind == KIND_SECTION:
+                encoder.add_pending_section(name, (self, child_index), b)
+            else:
+                encoder.add_file(
+                    name,
+                    flags,
+                    self._item(self._blob_offsets, self._blob_data, a),
+                    self._item(self._blob_offsets, self._blob_data, b),
+                )
+
+    def children(self, index: int) -> dict[str, Node]:
+        """Reads the children of the section at node `index`. Subsections are read lazily in turn."""
+        _, _, _, _, first, count = _NODE.unpack_from(self._map, self._nodes + index * _NODE.size)
+        children: dict[str, Node] = {}
+        for child_index in range(first, first + count):
+            kind, flags, _, name_id, a, b = _NODE.unpack_from(self._map, self._nodes + child_index * _NODE.size)
+            name = sys.intern(self._item(self._string_offsets, self._string_data, name_id).decode())
+            if kind == KIND_SECTION:
+                children[name] = LazySectionNode(self, child_index)
+            else:
+                file_id: bytes | str = self._item(self._blob_offsets, self._blob_data, a)
+                file_unique_id: bytes | str = self._item(self._blob_offsets, self._blob_data, b)
+                if flags & FLAG_FILE_ID_TEXT:
+                    file_id = file_id.decode()
+                if flags & FLAG_FILE_UNIQUE_ID_TEXT:
+                    file_unique_id = file_unique_id.decode()
+
+                children[name] = FileNode.from_packed(file_id, file_unique_id)
+
+        return children
+
+
+_CHILDREN_SLOT = SectionNode.__dict__["children"]
+
+
+class LazySectionNode(SectionNode):
+    """A section of a BinarySnapshot, whose children are only read the first time they are needed."""
+
+    __slots__ = ("_snapshot", "_snapshot_index")
+
+    def __init__(self, snapshot: BinarySnapshot, index: int) -> None:  # noqa: D107
+        super().__init__()
+        self._snapshot: BinarySnapshot | None = snapshot
+        self._snapshot_index: int = index
+
+    @property
+    def children(self) -> dict[str, Node]:  # type: ignore[override]  # noqa: D102
+        snapshot = self._snapshot
+        if snapshot is not None:
+            # a dump may walk the tree in a worker thread, both must end up with the same children
+            with snapshot.load_lock:
+                if self._snapshot is not None:
+                    _CHILDREN_SLOT.__set__(self, snapshot.children(self._snapshot_index))
+                    self._snapshot = None
+
+        return _CHILDREN_SLOT.__get__(self, LazySectionNode)
+
+    @children.setter
+    def children(self, value: dict[str, Node]) -> None:
+        _CHILDREN_SLOT.__set__(self, value)
+        self._snapshot = None
+
+    def is_loaded(self) -> bool:  # noqa: D102
+        return self._snapshot is None
+
+    def unread_source(self) -> tuple[BinarySnapshot, int] | None:
+        """The snapshot and the node the children are still to be read from, None once they have been read."""
+        snapshot = self._snapshot
+        return None if snapshot is None else (snapshot, self._snapshot_index)
+
+
+def read_binary_snapshot(path: str) -> SectionNode:
+    """Maps the binary snapshot at `path` and returns its root, nothing else is read until it's needed.
+
+    Raises:
+        ValueError: If the file is not a binary snapshot this version can read.
+
+    """
+    return LazySectionNode(BinarySnapshot(path), 0)
+
+
+def write_binary_snapshot_temp(path: str, root: SectionNode) -> str:
+    """Writes `root` as a binary snapshot to a fsync-ed temporary file next to `path`, see persist.commit_file."""
+    # written part by part, joining them would hold the snapshot in memory twice
+    parts = _Encoder().encode(root)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{Path(path).name}.", suffix=".tmp", dir=Path(path).parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.writelines(parts)
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+    return tmp_path
+
+
+class BinaryBackend(JsonBackend):
+    """JsonBackend with the snapshot in the binary format, which is memory-mapped instead of parsed at startup.
+
+    Startup only maps the file and replays the journal, sections are read
+    from the map when they are first used. The journal is the same.
+    """
+
+    def read_snapshot(self) -> SectionNode:  # noqa: D102
+        return read_binary_snapshot(self.db_path)
+
+    def write_snapshot_temp(self, root: SectionNode) -> str:  # noqa: D102
+        return write_binary_snapshot_temp(self.db_path, root)
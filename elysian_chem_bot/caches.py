@@ -0,0 +1,302 @@
+# SPDX-License-Identifier: Apache-2.0
+#
+# Copyright 2025 Firdaus Hakimi <hakimifirdaus944@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import atexit
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from dataclasses import dataclass
+from pathlib import Path
+
+from elysian_chem_bot.persist import DebouncedSaver, atomic_write_json
+
+log: logging.Logger = logging.getLogger(__name__)
+
+type ArchiveMembers = list[tuple[str, str]]
+
+
+@dataclass(frozen=True)
+class VersionedLRUCacheStats:
+    entries: int
+    max_size: int
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+
+
+class VersionedLRUCache[K: Hashable, V]:
+    """Bounded LRU cache whose entries are only valid for the version they were stored with.
+
+    Storing a value under a new version replaces the old one, so outdated
+    entries never have to be looked for, they just stop matching. With a
+    `ttl`, entries also stop matching that many seconds after being stored.
+    """
+
+    def __init__(self, max_size: int, ttl: float | None = None) -> None:
+        """Initialize VersionedLRUCache.
+
+        Args:
+            max_size (int): How many entries to keep before evicting the least recently used one.
+            ttl (float | None): Seconds an entry is valid for after being stored, forever if None.
+
+        """
+        self.max_size: int = max_size
+        self.ttl: float | None = ttl
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.expirations: int = 0
+        self._entries: OrderedDict[K, tuple[int, float, V]] = OrderedDict()
+
+    def __len__(self) -> int:  # noqa: D105
+        return len(self._entries)
+
+    def get(self, key: K, version: int) -> V | None:
+        """Returns the value stored for `key` at `version`, or None."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != version:
+            self.misses += 1
+            return None
+
+        if self.ttl is not None and time.monotonic() - entry[1] > self.ttl:
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[2]
+
+    def put(self, key: K, version: int, value: V) -> None:
+        """Stores `value` for `key` at `version`, evicting the least recently used entry if full."""
+        self._entries[key] = (version, time.monotonic() if self.ttl is not None else 0.0, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Drops every entry, the counters are kept."""
+        self._entries.clear()
+
+    def stats(self) -> VersionedLRUCacheStats:  # noqa: D102
+        return VersionedLRUCacheStats(
+            entries=len(self._entries),
+            max_size=self.max_size,
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            expirations=self.expirations,
+        )
+
+
+class ArchiveResultCache:
+    """What a zip archive extracted to, so it doesn't have to be downloaded and extracted again.
+
+    Maps the file_unique_id of an archive to its members in archive order,
+    as (file name, file_id) pairs. Keeps at most `max_entries` archives,
+    evicting the least recently used, and is saved to `path` in the
+    background a few seconds after changing.
+    """
+
+    def __init__(self, path: str, max_entries: int = 1000, save_delay: float = 10.0) -> None:
+        """Initialize ArchiveResultCache, loading `path` if it exists.
+
+        Args:
+            path (str): JSON file to persist to.
+            max_entries (int): How many archives to remember.
+            save_delay (float): Seconds to wait after the first change before saving.
+
+        """
+        self.path: str = path
+        self.max_entries: int = max_entries
+        self.hits: int = 0
+        self.misses: int = 0
+        self._lock: threading.Lock = threading.Lock()
+        self._entries: OrderedDict[str, ArchiveMembers] = OrderedDict()
+        self._saver: DebouncedSaver = DebouncedSaver(self._save, save_delay, "archive-cache-save")
+
+        if Path(path).exists():
+            with Path(path).open(encoding="utf-8") as f:
+                for file_unique_id, members in json.load(f).items():
+                    self._entries[file_unique_id] = [(name, file_id) for name, file_id in members]
+
+        atexit.register(self._saver.flush)
+
+    def __len__(self) -> int:  # noqa: D105
+        return len(self._entries)
+
+    def get(self, file_unique_id: str) -> ArchiveMembers | None:
+        """Returns the members of the archive, or None if it's not cached."""
+        with self._lock:
+            members = self._entries.get(file_unique_id)
+            if members is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(file_unique_id)
+            self.hits += 1
+
+        self._saver.mark_dirty()
+        return members
+
+    def put(self, file_unique_id: str, members: ArchiveMembers) -> None:
+        """Remembers the members of an archive, evicting the least recently used archives if full."""
+        with self._lock:
+            self._entries[file_unique_id] = list(members)
+            self._entries.move_to_end(file_unique_id)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                log.info("evicted archive '%s' from the cache", evicted)
+
+        self._saver.mark_dirty()
+
+    def invalidate(self, file_unique_id: str | None = None) -> int:
+        """Forgets one archive, or every archive if `file_unique_id` is None.
+
+        Returns:
+            int: How many archives were forgotten.
+
+        """
+        with self._lock:
+            if file_unique_id is None:
+                count = len(self._entries)
+                self._entries.clear()
+            else:
+                count = 0 if self._entries.pop(file_unique_id, None) is None else 1
+
+        self._saver.mark_dirty()
+        return count
+
+    def _save(self) -> None:
+        with self._lock:
+            snapshot = dict(self._entries)
+
+        atomic_write_json(self.path, snapshot)
+
+
+@dataclass
+class _ContentHashEntry:
+    file_id: str
+    last_used: float
+    uses: int
+
+
+@dataclass(frozen=True)
+class ContentHashCacheStats:
+    entries: int
+    max_entries: int
+    hits: int
+    misses: int
+    evictions: int
+    oldest_last_used: float | None
+
+
+class ContentHashCache:
+    """Maps the md5 of a file to its file_id on Telegram, so the same content is never uploaded twice.
+
+    Keeps at most `max_entries` files, evicting the least recently used, and
+    is saved to `path` in the background a few seconds after changing, along
+    with when each file was last used and how often.
+    """
+
+    def __init__(self, path: str, max_entries: int = 20_000, save_delay: float = 10.0) -> None:
+        """Initialize ContentHashCache, loading `path` if it exists.
+
+        Args:
+            path (str): JSON file to persist to. The old `{md5: file_id}` layout is read too.
+            max_entries (int): How many files to remember.
+            save_delay (float): Seconds to wait after the first change before saving.
+
+        """
+        self.path: str = path
+        self.max_entries: int = max_entries
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self._lock: threading.Lock = threading.Lock()
+        self._entries: OrderedDict[str, _ContentHashEntry] = OrderedDict()
+        self._saver: DebouncedSaver = DebouncedSaver(self._save, save_delay, "content-hash-cache-save")
+
+        if Path(path).exists():
+            with Path(path).open(encoding="utf-8") as f:
+                loaded: dict[str, str | list] = json.load(f)
+
+            entries = [
+                (md5sum, _ContentHashEntry(value, 0.0, 0) if isinstance(value, str) else _ContentHashEntry(*value))
+                for md5sum, value in loaded.items()
+            ]
+            entries.sort(key=lambda entry: entry[1].last_used)
+            self._entries.update(entries)
+            self._evict()
+
+        atexit.register(self._saver.flush)
+
+    def __len__(self) -> int:  # noqa: D105
+        return len(self._entries)
+
+    def get(self, md5sum: str) -> str | None:
+        """Returns the file_id of the file with this md5, or None if it's not cached."""
+        with self._lock:
+            entry = self._entries.get(md5sum)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(md5sum)
+            entry.last_used = time.time()
+            entry.uses += 1
+            self.hits += 1
+
+        self._saver.mark_dirty()
+        return entry.file_id
+
+    def put(self, md5sum: str, file_id: str) -> None:
+        """Remembers the file_id of the file with this md5, evicting the least recently used files if full."""
+        with self._lock:
+            self._entries[md5sum] = _ContentHashEntry(file_id, time.time(), 1)
+            self._entries.move_to_end(md5sum)
+            self._evict()
+
+        self._saver.mark_dirty()
+
+    def stats(self) -> ContentHashCacheStats:  # noqa: D102
+        with self._lock:
+            oldest = next(iter(self._entries.values()), None)
+            return ContentHashCacheStats(
+                entries=len(self._entries),
+                max_entries=self.max_entries,
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                oldest_last_used=oldest.last_used if oldest is not None else None,
+            )
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _save(self) -> None:
+        with self._lock:
+            snapshot = {md5sum: [entry.file_id, entry.last_used, entry.uses] for md5sum, entry in self._entries.items()}
+
+        atomic_write_json(self.path, snapshot)
@@ -14,17 +14,49 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import atexit
+import contextlib
+import itertools
+import json
 import logging
 import os
+import queue
+from collections.abc import Iterator
+from contextvars import ContextVar
+from datetime import UTC, datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
 GLOBAL_DEBUG: bool = False
 if os.getenv("TGBOT_DEBUG") is not None:
     GLOBAL_DEBUG = True
 
-log_additional_args: dict = {"filename": "bot.log", "level": logging.INFO}
-if GLOBAL_DEBUG:
-    log_additional_args.clear()
-    log_additional_args.update({"level": logging.DEBUG})
+LOG_PATH: str = "bot.log"
+LOG_MAX_BYTES: int = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024**2)))
+LOG_BACKUP_COUNT: int = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+# JSON lines, one object per record, written next to the normal output if set
+LOG_JSON_PATH: str = os.getenv("LOG_JSON_PATH", "")
+FORMAT_STR: str = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+
+# set while an update is handled, so the records it causes can be told apart from those of other updates
+correlation_id: ContextVar[str | None] = ContextVar("correlation_id", default=None)
+# different after a restart, so IDs in the same log file don't repeat
+_CORRELATION_PREFIX: str = os.urandom(2).hex()
+_correlation_ids: Iterator[int] = itertools.count(1)
+
+
+@contextlib.contextmanager
+def correlated() -> Iterator[str]:
+    """Tags the records logged inside with a new correlation ID, or the one of the block this is nested in."""
+    if (current := correlation_id.get()) is not None:
+        yield current
+        return
+
+    new_id = f"{_CORRELATION_PREFIX}-{next(_correlation_ids):x}"
+    token = correlation_id.set(new_id)
+    try:
+        yield new_id
+    finally:
+        correlation_id.reset(token)
 
 
 #
@@ -38,7 +70,7 @@ class ColouredFormatter(logging.Formatter):
     blue = "\x1b[0;34m"
     bold_red = "\x1b[31;1m"
     reset = "\x1b[0m"
-    format_str = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+    format_str = FORMAT_STR
 
     FORMATS = {
         logging.DEBUG: blue + format_str + reset,
@@ -48,23 +80,114 @@ class ColouredFormatter(logging.Formatter):
         logging.CRITICAL: bold_red + format_str + reset,
     }
 
-    def format(self, record: logging.LogRecord):
-        if record.name.startswith("httpx") and record.levelno <= logging.INFO:
-            return ""
+    def __init__(self) -> None:  # noqa: D107
+        super().__init__(self.format_str)
+        # built once, format only picks one
+        self._formatters: dict[int, logging.Formatter] = {
+            level: logging.Formatter(fmt) for level, fmt in self.FORMATS.items()
+        }
+
+    def format(self, record: logging.LogRecord) -> str:  # noqa: D102
+        formatter = self._formatters.get(record.levelno)
+        return formatter.format(record) if formatter is not None else super().format(record)
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per record, for log processors rather than people."""
+
+    def format(self, record: logging.LogRecord) -> str:  # noqa: D102
+        entry = {
+            "time": datetime.fromtimestamp(record.created, UTC).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "correlation_id": getattr(record, "correlation_id", None),
+            "thread": record.threadName,
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def _quiet_httpx(record: logging.LogRecord) -> bool:
+    # httpx logs every request at INFO
+    return not (record.name.startswith("httpx") and record.levelno <= logging.INFO)
+
+
+class CorrelatingQueueHandler(QueueHandler):
+    """QueueHandler that leaves even the formatting to the listener's thread.
+
+    The caller only merges the arguments into the message, as they could
+    change after it returns, and records the correlation ID, which only
+    its own context knows. Exceptions are formatted by the handlers.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:  # noqa: D102
+        # changed in place rather than copied, the message it gives stays the same for other handlers
+        record.msg = record.getMessage()
+        record.args = None
+        record.correlation_id = correlation_id.get()
+        return record
+
+
+def build_handlers(
+    *, debug: bool, log_path: str, json_path: str, max_bytes: int, backup_count: int
+) -> list[logging.Handler]:
+    """The handlers doing the actual I/O: coloured stderr, the log file unless debugging, and optionally JSON lines.
+
+    Files are rotated once they reach `max_bytes`, keeping `backup_count` old ones.
+    """
+    stream = logging.StreamHandler()
+    stream.setFormatter(ColouredFormatter())
+    stream.addFilter(_quiet_httpx)
+    handlers: list[logging.Handler] = [stream]
+    if not debug:
+        file = RotatingFileHandler(log_path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        file.setFormatter(logging.Formatter(FORMAT_STR))
+        handlers.append(file)
+
+    if json_path:
+        json_file = RotatingFileHandler(json_path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        json_file.setFormatter(JsonLinesFormatter())
+        handlers.append(json_file)
+
+    return handlers
 
-        log_fmt = self.FORMATS.get(record.levelno)
-        formatter = logging.Formatter(log_fmt)
-        return formatter.format(record)
 
+def start_queued_logging(logger: logging.Logger, handlers: list[logging.Handler], level: int) -> QueueListener:
+    """Makes `logger` only queue its records, `handlers` get them in a background thread.
 
-logging.basicConfig(format="%(asctime)s [%(levelname)s] %(name)s: %(message)s", **log_additional_args)
+    So logging on the event loop never waits for a disk or a terminal.
+    Stop the listener to flush what is still queued.
+    """
+    records: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    for handler in logger.handlers[:]:
+        logger.removeHandler(handler)
 
+    logger.addHandler(CorrelatingQueueHandler(records))
+    logger.setLevel(level)
+    listener = QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
 
-for handler in logging.root.handlers:
-    if issubclass(logging.StreamHandler, type(handler)):
-        logging.root.removeHandler(handler)
 
-_sh = logging.StreamHandler()
-_sh.setFormatter(ColouredFormatter())
-logging.root.addHandler(_sh)
+# nothing shows where a record was logged from or by which process, so LogRecord doesn't look it up, see
+# "Optimization" in the logging HOWTO
+logging._srcfile = None  # noqa: SLF001
+logging.logProcesses = False
+logging.logMultiprocessing = False
+logging.logAsyncioTasks = False
+listener: QueueListener = start_queued_logging(
+    logging.root,
+    build_handlers(
+        debug=GLOBAL_DEBUG,
+        log_path=LOG_PATH,
+        json_path=LOG_JSON_PATH,
+        max_bytes=LOG_MAX_BYTES,
+        backup_count=LOG_BACKUP_COUNT,
+    ),
+    logging.DEBUG if GLOBAL_DEBUG else logging.INFO,
+)
+atexit.register(listener.stop)
 logging.getLogger(__name__).info("Coloured log output initialized")
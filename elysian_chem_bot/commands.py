@@ -0,0 +1,92 @@
+# SPDX-License-Identifier: Apache-2.0
+#
+# Copyright 2025 Firdaus Hakimi <hakimifirdaus944@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import logging
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from pyrogram.client import Client
+
+from elysian_chem_bot.database_types import SectionPath
+
+log: logging.Logger = logging.getLogger(__name__)
+
+
+class BotIdentity:
+    """Who the bot is, fetched from Telegram once at startup instead of for every message."""
+
+    def __init__(self) -> None:
+        """Initialize BotIdentity. Nothing is known until `refresh` is awaited."""
+        self.user_id: int | None = None
+        self.username: str | None = None
+
+    async def refresh(self, client: Client) -> None:
+        """Fetches the identity of the bot again, e.g. after its username changed."""
+        me = await client.get_me()
+        self.user_id = me.id
+        self.username = me.username
+        log.info("bot identity: @%s (%d)", self.username, self.user_id)
+
+    def is_me(self, username: str) -> bool:
+        """Whether `username` is the username of the bot. Anything is, until the identity has been fetched."""
+        return self.username is None or username.casefold() == self.username.casefold()
+
+
+@dataclass
+class CommandArgs:
+    """What was sent after a command."""
+
+    command: str
+    text: str
+
+    @property
+    def section_path(self) -> SectionPath:
+        """The arguments as a path of sections, `a/b/c` -> ('a', 'b', 'c')."""
+        return tuple(self.text.split("/"))
+
+
+class Command:
+    """Parses one command and its aliases, with or without the @username of the bot, in a single regex match."""
+
+    def __init__(self, names: Iterable[str] | str, identity: BotIdentity) -> None:
+        """Initialize Command.
+
+        Args:
+            names (Iterable[str] | str): The command, or the command and its aliases, without the slash.
+            identity (BotIdentity): Identity of the bot, for telling apart commands meant for other bots.
+
+        """
+        self.names: tuple[str, ...] = (names,) if isinstance(names, str) else tuple(names)
+        self.identity: BotIdentity = identity
+        # longest first, so an alias that is a prefix of another doesn't cut it short
+        alternatives = "|".join(re.escape(name) for name in sorted(self.names, key=len, reverse=True))
+        self._pattern: re.Pattern[str] = re.compile(
+            rf"/(?P<command>{alternatives})(?:@(?P<username>\w+))?(?:\s(?P<text>.*))?",
+            re.IGNORECASE | re.DOTALL,
+        )
+
+    def parse(self, text: str | None) -> CommandArgs | None:
+        """Returns the arguments of the command in `text`, or None if `text` is not this command for this bot."""
+        if text is None or (match := self._pattern.fullmatch(text)) is None:
+            return None
+
+        username = match["username"]
+        if username is not None and not self.identity.is_me(username):
+            return None
+
+        return CommandArgs(match["command"].lower(), (match["text"] or "").strip())
@@ -15,37 +15,575 @@
 # limitations under the License.
 
 import atexit
-import json
+import contextlib
 import logging
+import sys
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, cast
-
-from elysian_chem_bot.database_types import File, Section, SectionCheckStatus, Sections
+from typing import cast
+
+from elysian_chem_bot.binary_snapshot import BinaryBackend, write_binary_snapshot_temp
+from elysian_chem_bot.database_types import (
+    File,
+    FileNode,
+    JournalRecord,
+    Node,
+    SectionCheckStatus,
+    SectionNode,
+    SectionPath,
+    Sections,
+)
+from elysian_chem_bot.file_locations import FileLocations
+from elysian_chem_bot.persist import commit_file
+from elysian_chem_bot.search import SearchIndex
+from elysian_chem_bot.sqlite_storage import SqliteBackend
+from elysian_chem_bot.storage import JsonBackend, StorageBackend, read_json_database
 
 log: logging.Logger = logging.getLogger(__name__)
 
+SQLITE_SUFFIX: str = ".sqlite3"
+BINARY_SUFFIX: str = ".snapshot"
+
+
+def create_backend(kind: str, db_path: str, snapshot_delay: float = 30.0) -> StorageBackend:
+    """Creates the storage backend called `kind` for the database at `db_path`.
+
+    `json` stores the database at `db_path` itself. `sqlite` and `binary`
+    store it next to it, with the suffix replaced by `.sqlite3` or
+    `.snapshot`. The first time, they are filled from the JSON database, if
+    there is one.
+
+    Raises:
+        ValueError: If there is no backend called `kind`.
+
+    """
+    if kind == "json":
+        return JsonBackend(db_path, snapshot_delay=snapshot_delay)
+
+    if kind == "sqlite":
+        sqlite_path = str(Path(db_path).with_suffix(SQLITE_SUFFIX))
+        migrate = not Path(sqlite_path).exists() and Path(db_path).exists()
+        backend = SqliteBackend(sqlite_path)
+        if migrate:
+            root, _ = read_json_database(db_path)
+            backend.import_tree(root)
+            log.info("migrated the JSON database at %s to %s", db_path, sqlite_path)
+
+        return backend
+
+    if kind == "binary":
+        snapshot_path = str(Path(db_path).with_suffix(BINARY_SUFFIX))
+        if not Path(snapshot_path).exists():
+            root = read_json_database(db_path)[0] if Path(db_path).exists() else SectionNode()
+            commit_file(write_binary_snapshot_temp(snapshot_path, root), snapshot_path)
+            log.info("migrated the JSON database at %s to %s", db_path, snapshot_path)
+
+        return BinaryBackend(snapshot_path, snapshot_delay=snapshot_delay)
+
+    msg = f"unknown database backend: {kind!r}"
+    raise ValueError(msg)
+
+
+class Batch:
+    """Mutations to be applied to a Database in one step, see Database.batch.
+
+    Every section the mutations touch is resolved and copied once, however
+    many of them touch it. They are validated as they are made, raising
+    like their Database counterparts, but nothing is visible before the
+    batch is applied: then the root is swapped once, every changed section
+    gets one new version, and the backend gets all of it in one write.
+    """
+
+    def __init__(self, root: SectionNode) -> None:  # noqa: D107
+        self.root: SectionNode = root
+        # working copies of the children of every section resolved so far, from the root down
+        self._children: dict[SectionPath, dict[str, Node]] = {(): dict(root.children)}
+        # the sections those copies were made from, sections added by the batch have none
+        self._originals: dict[SectionPath, SectionNode] = {(): root}
+        # sections whose own children changed, not only a subsection
+        self._changed: set[SectionPath] = set()
+        self.removed: list[tuple[SectionPath, SectionNode]] = []
+        # every section and file added (True) or removed (False), by its full path, in order. A removed section
+        # is followed by everything that was in it.
+        self.changes: list[tuple[bool, SectionPath, Node]] = []
+        self.records: list[JournalRecord] = []
+
+    def _section(self, path: SectionPath, *, create: bool = False) -> dict[str, Node] | None:
+        children = self._children.get(path)
+        if children is not None:
+            return children
+
+        parent = self._section(path[:-1], create=create)
+        if parent is None:
+            return None
+
+        child = parent.get(path[-1])
+        if isinstance(child, SectionNode):
+            children = self._children[path] = dict(child.children)
+            self._originals[path] = child
+            return children
+
+        if not create:
+            return None
+
+        if child is not None:
+            msg = f"'{path[-1]}' is a file, not a section!"
+            raise ValueError(msg)
+
+        # a placeholder, replaced by the real section when the batch is built
+        parent[sys.intern(path[-1])] = placeholder = SectionNode()
+        self._changed.add(path[:-1])
+        self.changes.append((True, path, placeholder))
+        children = self._children[path] = {}
+        return children
+
+    def _nodes_under(self, path: SectionPath, section: SectionNode) -> Iterator[tuple[SectionPath, Node]]:
+        children = self._children.get(path)
+        for name, child in (children if children is not None else section.children).items():
+            yield (*path, name), child
+            if isinstance(child, SectionNode):
+                yield from self._nodes_under((*path, name), child)
+
+    def _drop(self, path: SectionPath, removed: Node) -> None:
+        self.changes.append((False, path, removed))
+        if not isinstance(removed, SectionNode):
+            return
+
+        self.changes.extend((False, node_path, node) for node_path, node in self._nodes_under(path, removed))
+        original = self._originals.get(path) if path in self._children else removed
+        if original is not None:
+            self.removed.append((path, original))
+
+        for dropped in [p for p in self._children if p[: len(path)] == path]:
+            del self._children[dropped]
+            self._originals.pop(dropped, None)
+            self._changed.discard(dropped)
+
+    def add_section(self, sections: Sections) -> None:  # noqa: D102
+        if self._section(tuple(sections)) is not None:
+            return
+
+        self._section(tuple(sections), create=True)
+        self.records.append(["s", sections])
+
+    def remove_section(self, sections: Sections) -> None:  # noqa: D102
+        parent_path = tuple(sections[:-1])
+        parent = self._section(parent_path)
+        if parent is None:
+            return
+
+        self._drop(tuple(sections), parent.pop(sections[-1]))
+        self._changed.add(parent_path)
+        self.records.append(["S", sections])
+
+    def add_file(self, sections: Sections, file_name: str, file_id: str, file_unique_id: str) -> None:  # noqa: D102
+        path = tuple(sections)
+        children = self._section(path)
+        if children is None:
+            msg = "sections does not exist!"
+            raise ValueError(msg)
+
+        replaced = children.get(file_name)
+        if replaced is not None:
+            self._drop((*path, file_name), replaced)
+
+        file = children[sys.intern(file_name)] = FileNode(file_id, file_unique_id)
+        self._changed.add(path)
+        self.changes.append((True, (*path, file_name), file))
+        self.records.append(["f", sections, file_name, file_id, file_unique_id])
+
+    def remove_file(self, sections: Sections, file_name: str) -> None:  # noqa: D102
+        path = tuple(sections)
+        children = self._section(path)
+        if children is None:
+            msg = "sections does not exist!"
+            raise ValueError(msg)
+
+        self._drop((*path, file_name), children.pop(file_name))
+        self._changed.add(path)
+        self.records.append(["F", sections, file_name])
+
+    def build(self) -> dict[SectionPath, SectionNode]:
+        """Builds the new sections, deepest first. Returns them by path, the root is at `()`."""
+        # a section is rebuilt if it or anything below it changed, the others are kept as they were
+        dirty = {path[:depth] for path in self._changed for depth in range(len(path) + 1)}
+        built: dict[SectionPath, SectionNode] = {}
+        for path in sorted(self._children, key=len, reverse=True):
+            original = self._originals.get(path)
+            if original is None:
+                section = SectionNode(self._children[path])
+            elif path in dirty:
+                section = original.evolve(self._children[path], keep_version=path not in self._changed)
+            else:
+                continue
+
+            built[path] = section
+            if path:
+                self._children[path[:-1]][path[-1]] = section
+
+        return built
+
+
+@dataclass(frozen=True)
+class DatabaseStats:
+    # sections of a lazily read snapshot are only counted once something walked to them
+    sections: int
+    generation: int
+    dirty: bool
+    # None until the index is built
+    search_names: int | None
+    duplicate_files: int | None
 
-class Database:
-    """Currently using JSON."""
 
-    def __init__(self, db_path: str = "") -> None:  # noqa: D107
+class Database:
+    """The materials, a tree of sections holding subsections and files.
+
+    The whole tree is kept in memory as SectionNode and FileNode, with every
+    section indexed by its path, so reads never touch the disk. Mutations are
+    applied to the tree and then written through to a StorageBackend, a
+    journaled JSON file (see JsonBackend) unless another one is given.
+
+    The tree is copy-on-write. A mutation never changes a section, it builds
+    new copies of the sections on the path to it, sharing everything else
+    with the old tree, and then swaps `root`. So whatever `root` or a section
+    a reader took stays consistent, also in a worker thread, while the
+    database changes. Mutations must happen on the event loop.
+    """
+
+    def __init__(  # noqa: D107
+        self,
+        db_path: str = "",
+        compact_threshold: int = 1000,
+        snapshot_delay: float = 30.0,
+        backend: StorageBackend | None = None,
+    ) -> None:
         self.db_path = db_path
         self.db_loaded: bool = False
-        self.raw_db: dict[str, Any] | None = None
+        self.backend: StorageBackend = (
+            backend if backend is not None else JsonBackend(db_path, compact_threshold, snapshot_delay)
+        )
+        self.root: SectionNode = SectionNode()
+        # every section, keyed by its full path, so lookups don't have to walk the tree
+        self._index: dict[SectionPath, SectionNode] = {}
+        self._paths_by_id: dict[int, SectionPath] = {}
+        # where every file is, by file_unique_id, built in a worker thread the first time it's needed, see
+        # file_locations
+        self._locations: FileLocations | None = None
+        # the names of every section and file, built in a worker thread the first time it's needed, see search
+        self._search: SearchIndex | None = None
+        # bumped by every change to the tree, for caches of whatever is derived from all of it
+        self.generation: int = 0
+        # called after replace_root, to rebuild whatever was derived from the old tree
+        self.replace_listeners: list[Callable[[], None]] = []
 
         self.load_db()
+        self.backend.attach(lambda: self.root)
         atexit.register(self._atexit)
 
     def load_db(self) -> None:  # noqa: D102
-        with Path(self.db_path).open(encoding="utf-8") as f:
-            self.raw_db = json.load(f)
-            if not isinstance(self.raw_db, dict):
-                msg = f"something is wrong with database, the type is: {type(self.raw_db)}"
-                raise TypeError(msg)
+        self.root = self.backend.load()
+        self._build_index()
+        self.db_loaded = True
+
+    @property
+    def dirty(self) -> bool:
+        """Whether there are mutations the backend has not moved to their final place on disk yet."""
+        return self.backend.dirty
+
+    def stats(self) -> DatabaseStats:  # noqa: D102
+        return DatabaseStats(
+            sections=len(self._index),
+            generation=self.generation,
+            dirty=self.dirty,
+            search_names=self._search.name_count if self._search is not None else None,
+            duplicate_files=self._locations.duplicate_count if self._locations is not None else None,
+        )
+
+    def replace_root(self, root: SectionNode, prepared_path: str) -> None:
+        """Replaces the whole tree, e.g. with a restored backup.
+
+        Call on the event loop. The slow parts, building `root` and writing it
+        with `self.backend.prepare_replace`, should be done beforehand in a
+        worker thread. Here the backend only swaps in the prepared file, and
+        the tree and index are swapped in one go, so handlers see either the
+        old database or the new one.
+
+        Args:
+            root (SectionNode): The new tree. Must not be used by anything else.
+            prepared_path (str): What `self.backend.prepare_replace(root)` returned.
+
+        """
+        self.backend.commit_replace(prepared_path)
+        self.root = root
+        self._build_index()
+        for listener in self.replace_listeners:
+            listener()
+
+    def _build_index(self) -> None:
+        self._index = {}
+        self._paths_by_id = {}
+        self._locations = None
+        self._search = None
+        self.generation += 1
+        self._index_subtree((), self.root)
+
+    def _index_subtree(self, path: SectionPath, section: SectionNode) -> None:
+        self._index[path] = section
+        self._paths_by_id[section.node_id] = path
+        # sections of a lazily read snapshot get indexed by _lookup once something walks to them
+        if not section.is_loaded():
+            return
+
+        for name, child in section.children.items():
+            if isinstance(child, SectionNode):
+                self._index_subtree((*path, name), child)
+
+    def _unindex_subtree(self, path: SectionPath, section: SectionNode) -> None:
+        self._index.pop(path, None)
+        self._paths_by_id.pop(section.node_id, None)
+        if not section.is_loaded():
+            return
+
+        for name, child in section.children.items():
+            if isinstance(child, SectionNode):
+                self._unindex_subtree((*path, name), child)
+
+    def _file_locations(self) -> FileLocations:
+        if self._locations is None:
+            msg = "the file_unique_id index is not built yet, see TreeIndexer"
+            raise RuntimeError(msg)
+
+        return self._locations
+
+    @property
+    def file_locations_built(self) -> bool:
+        """Whether file_locations and duplicate_files can answer."""
+        return self._locations is not None
+
+    def adopt_file_locations(self, locations: FileLocations, root: SectionNode) -> bool:
+        """Uses locations found in `root`, e.g. by FileLocations.from_tree in a worker thread, if the tree is still it.
+
+        Returns:
+            bool: Whether they were used. If the database changed since `root` was taken, locate them again.
+
+        """
+        if root is not self.root:
+            return False
+
+        if self._locations is None:
+            self._locations = locations
+
+        return True
+
+    def build_indexes(self) -> None:
+        """Builds the indexes derived from the whole tree right here, if they aren't built.
+
+        Blocks while walking the whole tree, for scripts. The bot builds them
+        in a worker thread, see TreeIndexer.
+        """
+        if self._locations is None:
+            self._locations = FileLocations.from_tree(self.root)
+
+        if self._search is None:
+            self._search = SearchIndex.from_tree(self.root)
+
+    def _search_index(self) -> SearchIndex:
+        if self._search is None:
+            msg = "the search index is not built yet, see TreeIndexer"
+            raise RuntimeError(msg)
+
+        return self._search
+
+    @property
+    def search_index_built(self) -> bool:
+        """Whether search can answer."""
+        return self._search is not None
+
+    def adopt_search_index(self, index: SearchIndex, root: SectionNode) -> bool:
+        """Uses an index built from `root`, e.g. by SearchIndex.from_tree in a worker thread, if the tree is still it.
+
+        Returns:
+            bool: Whether it was used. If the database changed since `root` was taken, build it again.
+
+        """
+        if root is not self.root:
+            return False
+
+        if self._search is None:
+            self._search = index
+
+        return True
+
+    # keep the indexes derived from the tree (file_unique_ids, names) up to date, if they were built
+    def _track_added(self, path: SectionPath, node: Node) -> None:
+        is_file = isinstance(node, FileNode)
+        if is_file and self._locations is not None:
+            self._locations.add(path, cast(FileNode, node))
+
+        if self._search is not None:
+            self._search.add(path[:-1], path[-1], is_file=is_file)
+
+    def _track_removed(self, path: SectionPath, node: Node) -> None:
+        is_file = isinstance(node, FileNode)
+        if is_file and self._locations is not None:
+            self._locations.remove(path, cast(FileNode, node))
+
+        if self._search is not None:
+            self._search.remove(path[:-1], path[-1], is_file=is_file)
+
+    def _track_subtree(self, track: Callable[[SectionPath, Node], None], path: SectionPath, node: Node) -> None:
+        if self._locations is None and self._search is None:
+            return
+
+        pending: list[tuple[SectionPath, Node]] = [(path, node)]
+        while pending:
+            path, node = pending.pop()
+            track(path, node)
+            if isinstance(node, SectionNode):
+                pending.extend(((*path, name), child) for name, child in node.children.items())
+
+    def _files_under(self, path: SectionPath) -> Iterator[tuple[SectionPath, str]]:
+        # in the order the keyboards list them, a section's files and subsections as they come
+        section = self._lookup(path)
+        pending: list[tuple[SectionPath, Iterator[tuple[str, Node]]]] = []
+        if section is not None:
+            pending.append((path, iter(section.children.items())))
+
+        while pending:
+            path, children = pending[-1]
+            for name, child in children:
+                if isinstance(child, SectionNode):
+                    pending.append(((*path, name), iter(child.children.items())))
+                    break
+
+                yield path, name
+            else:
+                pending.pop()
+
+    def file_locations(self, file_unique_id: str) -> list[SectionPath]:
+        """Every place a file is filed at, as full paths: its sections, then its name.
+
+        Answered from an index kept up to date by every mutation. The bot
+        builds it in a worker thread with TreeIndexer, scripts with
+        build_indexes.
+
+        Raises:
+            RuntimeError: If the index is not built yet.
+
+        """
+        return self._file_locations().get(file_unique_id)
+
+    def duplicate_files(self) -> dict[str, list[SectionPath]]:
+        """Files filed more than once, by file_unique_id, with their full paths. Doesn't walk the tree.
+
+        Raises:
+            RuntimeError: If the index is not built yet, see file_locations.
+
+        """
+        return self._file_locations().duplicates()
+
+    def search(self, query: str, limit: int = 20) -> list[SectionPath]:
+        """Finds files by the words of their name and of their sections' names, best first. See SearchIndex.search.
+
+        Answered from an index kept up to date by every mutation, see
+        file_locations for how it gets built.
+
+        Returns:
+            list[SectionPath]: Full paths of the files: their sections, then their name.
+
+        Raises:
+            RuntimeError: If the index is not built yet.
+
+        """
+        return self._search_index().search(query, limit, self._files_under)
+
+    def _lookup(self, path: SectionPath) -> SectionNode | None:
+        section = self._index.get(path)
+        if section is not None:
+            return section
+
+        # not indexed yet if it's in a part of a lazily read snapshot nobody walked to, walk from the closest
+        # indexed parent. Otherwise it doesn't exist, and this is only a few dict lookups.
+        depth = len(path) - 1
+        while depth > 0 and path[:depth] not in self._index:
+            depth -= 1
+
+        section = self._index[path[:depth]]
+        for i in range(depth, len(path)):
+            child = section.children.get(path[i])
+            if not isinstance(child, SectionNode):
+                return None
+
+            section = child
+            self._index_subtree(path[: i + 1], section)
+
+        return section
+
+    def _get_section_or_raise(self, sections: Sections) -> SectionNode:
+        section = self._lookup(tuple(sections))
+        if section is None:
+            msg = "sections does not exist!"
+            raise ValueError(msg)
+
+        return section
+
+    def _publish(self, path: SectionPath, section: SectionNode) -> None:
+        # puts the new `section` at `path`, copying the sections above it, then swaps the root. The copies keep their
+        # version if only a subsection was replaced by its copy, the parent of a new section gets a new one, its
+        # keyboards lack a button. Ancestors of an indexed section are always indexed, _lookup indexes top-down.
+        self._index[path] = section
+        for depth in range(len(path), 0, -1):
+            parent = self._index[path[: depth - 1]]
+            name = path[depth - 1]
+            section = parent.evolve({**parent.children, name: section}, keep_version=name in parent.children)
+            self._index[path[: depth - 1]] = section
+
+        self.root = section
+        self.generation += 1
+
+    @contextlib.contextmanager
+    def batch(self) -> Iterator[Batch]:
+        """Collects mutations and applies them in one step when the block ends, see Batch.
+
+        If the block raises, nothing is applied. Don't await inside it: the
+        database must not change before the batch is applied.
+
+        Raises:
+            RuntimeError: If the database changed while the batch was open.
+
+        """
+        batch = Batch(self.root)
+        yield batch
+        if batch.root is not self.root:
+            msg = "the database changed while a batch was open"
+            raise RuntimeError(msg)
+
+        if not batch.records:
+            return
+
+        built = batch.build()
+        for path, section in batch.removed:
+            self._unindex_subtree(path, section)
+
+        for added, path, node in batch.changes:
+            (self._track_added if added else self._track_removed)(path, node)
+
+        # every section the batch built has its ancestors built too, so indexing them keeps the index complete
+        for path, section in built.items():
+            self._index[path] = section
+            self._paths_by_id[section.node_id] = path
+
+        self.root = built.get((), self.root)
+        self.generation += 1
+        self.backend.apply_batch(batch.records)
 
-    def write_db(self) -> None:  # noqa: D102
-        with Path(self.db_path).open("w", encoding="utf-8") as f:
-            json.dump(self.raw_db, f)
+    def snapshot(self) -> SectionNode:
+        """The tree as it is now. It never changes, so it can be serialized in another thread while the database does.
+
+        Serialize with `default=encode_node`.
+        """
+        return self.root
 
     def is_sections_exist(self, sections: Sections) -> SectionCheckStatus:
         """Determines if the sections exist in the database.
@@ -58,13 +596,50 @@ class Database:
                 where value is the section that does not exist.
 
         """
-        cur_section: Section = self.raw_db
-        for sec in sections:
-            cur_section = cur_section.get(sec)
-            if cur_section is None or not isinstance(cur_section, dict):
-                return SectionCheckStatus(status=False, value=cur_section)
+        if self._lookup(tuple(sections)) is not None:
+            return SectionCheckStatus(status=True, value=None)
+
+        # slow path, only to find out which one is missing
+        for i, sec in enumerate(sections):
+            if self._lookup(tuple(sections[: i + 1])) is None:
+                return SectionCheckStatus(status=False, value=sec)
+
+        return SectionCheckStatus(status=False, value=None)
+
+    def get_section(self, sections: Sections) -> SectionNode:
+        """Gets a section, with its subsections and files.
+
+        Args:
+            sections (list[str]): Path to the section.
+
+        Returns:
+            SectionNode: The section. Must not be modified.
+
+        Raises:
+            ValueError: If the section does not exist.
+
+        """
+        return self._get_section_or_raise(sections)
+
+    def get_section_by_id(self, node_id: int) -> tuple[SectionPath, SectionNode]:
+        """Gets a section by its node id.
 
-        return SectionCheckStatus(status=True, value=None)
+        Args:
+            node_id (int): SectionNode.node_id of the section.
+
+        Returns:
+            tuple[SectionPath, SectionNode]: Path to the section, and the section. Must not be modified.
+
+        Raises:
+            ValueError: If no section has this id (anymore).
+
+        """
+        path = self._paths_by_id.get(node_id)
+        if path is None:
+            msg = "sections does not exist!"
+            raise ValueError(msg)
+
+        return path, self._index[path]
 
     def add_section(self, sections: Sections) -> None:
         """Adds a section to the database.
@@ -73,9 +648,28 @@ class Database:
             sections (list[str]): The sections to add.
 
         """
-        cur_section: Section = self.raw_db
-        for sec in sections:
-            cur_section = cur_section.setdefault(sec, {})
+        # the deepest section that exists already, the missing ones are built below it and published at once
+        depth = len(sections)
+        while depth > 0 and self._lookup(tuple(sections[:depth])) is None:
+            depth -= 1
+
+        if depth == len(sections):
+            self.backend.add_section(sections)
+            return
+
+        parent = self._index[tuple(sections[:depth])]
+        if sections[depth] in parent.children:
+            msg = f"'{sections[depth]}' is a file, not a section!"
+            raise ValueError(msg)
+
+        section = SectionNode()
+        for i in range(len(sections) - 1, depth, -1):
+            section = SectionNode({sys.intern(sections[i]): section})
+
+        self._index_subtree(tuple(sections[: depth + 1]), section)
+        self._track_subtree(self._track_added, tuple(sections[: depth + 1]), section)
+        self._publish(tuple(sections[: depth + 1]), section)
+        self.backend.add_section(sections)
 
     def remove_section(self, sections: Sections) -> None:
         """Removes a section from the database. Only the last element in the sections list will be removed.
@@ -89,67 +683,60 @@ class Database:
             None
 
         """
-        cur_section: Section = self.raw_db
-        for sec in sections[:-1]:
-            cur_section = cur_section.get(sec)
-            if cur_section is None:
-                return
+        parent_path = tuple(sections[:-1])
+        parent = self._lookup(parent_path)
+        if parent is None:
+            return
 
-        cur_section.pop(sections[-1])
+        children = dict(parent.children)
+        removed = children.pop(sections[-1])
+        if isinstance(removed, SectionNode):
+            self._unindex_subtree(tuple(sections), removed)
 
-    def add_file(self, sections: Sections, file_name: str, file_id: str, file_unique_id: str) -> None:  # noqa: D102
-        status = self.is_sections_exist(sections).status
-        if not status:
-            msg = "sections does not exist!"
-            raise ValueError(msg)
+        self._track_subtree(self._track_removed, tuple(sections), removed)
 
-        cur_section: Section = self.raw_db
-        for sec in sections:
-            cur_section = cur_section.get(sec)
+        self._publish(parent_path, parent.evolve(children))
+        self.backend.remove_section(sections)
 
-        cur_section[file_name] = (file_id, file_unique_id)
+    def add_file(self, sections: Sections, file_name: str, file_id: str, file_unique_id: str) -> None:  # noqa: D102
+        section = self._get_section_or_raise(sections)
+        path = (*sections, file_name)
+        replaced = section.children.get(file_name)
+        if isinstance(replaced, SectionNode):
+            self._unindex_subtree(path, replaced)
 
-    def remove_file(self, sections: Sections, file_name: str) -> None:  # noqa: D102
-        status = self.is_sections_exist(sections).status
-        if not status:
-            msg = "sections does not exist!"
-            raise ValueError(msg)
+        if replaced is not None:
+            self._track_subtree(self._track_removed, path, replaced)
 
-        cur_section: Section = self.raw_db
-        for sec in sections:
-            cur_section = cur_section.get(sec)
+        file = FileNode(file_id, file_unique_id)
+        self._track_added(path, file)
+        self._publish(tuple(sections), section.evolve({**section.children, sys.intern(file_name): file}))
+        self.backend.add_file(sections, file_name, file_id, file_unique_id)
 
-        cur_section.pop(file_name)
+    def remove_file(self, sections: Sections, file_name: str) -> None:  # noqa: D102
+        section = self._get_section_or_raise(sections)
+        children = dict(section.children)
+        removed = children.pop(file_name)
+        if isinstance(removed, SectionNode):
+            self._unindex_subtree((*sections, file_name), removed)
 
-    def get_file(self, sections: Sections, file_name: str) -> File:  # noqa: D102
-        status = self.is_sections_exist(sections).status
-        if not status:
-            msg = "sections does not exist!"
-            raise ValueError(msg)
+        self._track_subtree(self._track_removed, (*sections, file_name), removed)
 
-        cur_section: Section = self.raw_db
-        for sec in sections:
-            cur_section = cur_section.get(sec)
+        self._publish(tuple(sections), section.evolve(children))
 
-        file_id, file_unique_id = cast(dict, cur_section.get(file_name))
-        if file_id is None:
-            msg = "file does not exist!"
-            raise ValueError(msg)
+        self.backend.remove_file(sections, file_name)
 
-        return File(file_id, file_unique_id)
+    def get_file(self, sections: Sections, file_name: str) -> File:  # noqa: D102
+        match self._get_section_or_raise(sections).children.get(file_name):
+            case FileNode() as file:
+                return file.to_file()
+            case _:
+                msg = "file does not exist!"
+                raise ValueError(msg)
 
     def list_files(self, sections: Sections) -> list[str]:  # noqa: D102
-        status = self.is_sections_exist(sections).status
-        if not status:
-            msg = "sections does not exist!"
-            raise ValueError(msg)
-
-        cur_section: Section = self.raw_db
-        for sec in sections:
-            cur_section = cur_section.get(sec)
-
-        return list(cur_section.keys())
+        return list(self._get_section_or_raise(sections).children)
 
     def _atexit(self) -> None:
         log.info("atexit trigger: saving db to file")
-        self.write_db()
+        self.backend.close()
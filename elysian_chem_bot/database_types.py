@@ -14,6 +14,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import binascii
+import itertools
+import sys
+from collections.abc import Iterator
 from dataclasses import dataclass
 from typing import Any
 
@@ -30,5 +34,177 @@ class File:
     file_unique_id: str
 
 
+_TO_STANDARD: bytes = bytes.maketrans(b"-_", b"+/")
+_TO_URLSAFE: bytes = bytes.maketrans(b"+/", b"-_")
+_PADDING: tuple[bytes, ...] = (b"", b"=", b"==", b"===")
+
+
+def pack_file_id(file_id: str) -> bytes | str:
+    """Decodes a Telegram file id (URL-safe base64 without padding) to raw bytes, which take less memory.
+
+    Returns the string unchanged if it would not survive the round trip. Every
+    file of the database goes through here when it's loaded, so it only calls
+    into binascii, not into the base64 module and its argument checks.
+    """
+    try:
+        # `+` and `/` are dropped, they aren't URL-safe, the length check below rejects the id then
+        encoded = file_id.encode("ascii").translate(_TO_STANDARD, b"+/")
+        packed = binascii.a2b_base64(encoded + _PADDING[-len(encoded) % 4], strict_mode=True)
+    except (binascii.Error, UnicodeEncodeError):
+        return file_id
+
+    if len(encoded) != len(file_id) or binascii.b2a_base64(packed, newline=False).rstrip(b"=") != encoded:
+        return file_id
+
+    return packed
+
+
+def unpack_file_id(packed: bytes | str) -> str:
+    """Reverses pack_file_id."""
+    if isinstance(packed, str):
+        return packed
+
+    return binascii.b2a_base64(packed, newline=False).translate(_TO_URLSAFE).rstrip(b"=").decode()
+
+
+class FileNode:
+    """A file in the database tree. The name is the key in its parent's children.
+
+    The ids are packed the first time packed_ids is read, not when the node is
+    made: loading the JSON database stays as fast as before, and the first
+    file_unique_id index or binary snapshot, built in a worker thread, packs
+    every file of the tree. Until then an id is held as a str, which reads the
+    same.
+    """
+
+    __slots__ = ("_file_id", "_file_unique_id")
+
+    def __init__(self, file_id: str, file_unique_id: str) -> None:  # noqa: D107
+        self._file_id: bytes | str = file_id
+        self._file_unique_id: bytes | str = file_unique_id
+
+    @property
+    def file_id(self) -> str:  # noqa: D102
+        return unpack_file_id(self._file_id)
+
+    @property
+    def file_unique_id(self) -> str:  # noqa: D102
+        return unpack_file_id(self._file_unique_id)
+
+    def to_file(self) -> File:  # noqa: D102
+        return File(self.file_id, self.file_unique_id)
+
+    @classmethod
+    def from_packed(cls, packed_file_id: bytes | str, packed_file_unique_id: bytes | str) -> "FileNode":
+        """Creates a FileNode from ids that already went through pack_file_id."""
+        node = cls.__new__(cls)
+        node._file_id = packed_file_id  # noqa: SLF001
+        node._file_unique_id = packed_file_unique_id  # noqa: SLF001
+        return node
+
+    @property
+    def packed_ids(self) -> tuple[bytes | str, bytes | str]:
+        """The ids as stored, see pack_file_id."""
+        if isinstance(self._file_id, str):
+            self._file_id = pack_file_id(self._file_id)
+        if isinstance(self._file_unique_id, str):
+            self._file_unique_id = pack_file_id(self._file_unique_id)
+
+        return self._file_id, self._file_unique_id
+
+
+_section_ids: Iterator[int] = itertools.count(1)
+_section_versions: Iterator[int] = itertools.count(1)
+
+
+class SectionNode:
+    """A section in the database tree, holding subsections and files by name.
+
+    Once a section is part of a Database it is never changed, a mutation
+    replaces it (and every section above it) with an evolved copy, so a tree
+    taken from Database.root stays the same for as long as it is used.
+
+    `node_id` identifies the section for as long as the process lives, and is
+    kept by evolved copies. `version` changes whenever the section's own
+    children are added, removed or replaced (not when something deeper
+    changes), and is never reused by another section, so anything derived
+    from a section can be cached by its version.
+    """
+
+    __slots__ = ("_child_names", "children", "node_id", "version")
+
+    def __init__(self, children: dict[str, "SectionNode | FileNode"] | None = None) -> None:  # noqa: D107
+        self.children: dict[str, SectionNode | FileNode] = children if children is not None else {}
+        self.node_id: int = next(_section_ids)
+        self.version: int = next(_section_versions)
+        self._child_names: tuple[str, ...] | None = None
+
+    def evolve(self, children: dict[str, "SectionNode | FileNode"], *, keep_version: bool = False) -> "SectionNode":
+        """A copy of the section with other children. Same node_id, and a new version unless `keep_version`.
+
+        `keep_version` is for copies that only replace subsections with their own evolved copies.
+        """
+        section = SectionNode(children)
+        section.node_id = self.node_id
+        if keep_version:
+            section.version = self.version
+
+        return section
+
+    def is_loaded(self) -> bool:
+        """Whether `children` is in memory. Only sections of a lazily read snapshot may not be."""
+        return True
+
+    def child_names(self) -> tuple[str, ...]:
+        """Names of the children in order, so they can be addressed by position. Cached per version."""
+        if self._child_names is None:
+            self._child_names = tuple(self.children)
+
+        return self._child_names
+
+
+type Node = SectionNode | FileNode
+
+
+def decode_section(obj: dict[str, Any]) -> SectionNode:
+    """`object_hook` for json.load, builds the tree while parsing instead of after.
+
+    In the JSON layout a section is an object, and a file is a `[file_id, file_unique_id]` array.
+
+    Raises:
+        TypeError: If something in the object is neither a section nor a file.
+
+    """
+    children: dict[str, Node] = {}
+    for name, value in obj.items():
+        if isinstance(value, SectionNode):
+            children[sys.intern(name)] = value
+        elif isinstance(value, list) and len(value) == 2 and isinstance(value[0], str) and isinstance(value[1], str):  # noqa: PLR2004
+            children[sys.intern(name)] = FileNode(value[0], value[1])
+        else:
+            msg = f"something is wrong with database, '{name}' is neither a section nor a file: {value!r}"
+            raise TypeError(msg)
+
+    return SectionNode(children)
+
+
+def encode_node(node: Node) -> dict[str, Node] | list[str]:
+    """`default` for json.dump, turns the tree back into the JSON layout one node at a time.
+
+    Raises:
+        TypeError: If node is not part of the tree.
+
+    """
+    if isinstance(node, SectionNode):
+        return node.children
+
+    if isinstance(node, FileNode):
+        return [node.file_id, node.file_unique_id]
+
+    msg = f"Object of type {type(node).__name__} is not JSON serializable"
+    raise TypeError(msg)
+
+
 type Sections = list[str]
-type Section = dict | Any
+type JournalRecord = list[Any]
+type SectionPath = tuple[str, ...]
@@ -0,0 +1,151 @@
+# SPDX-License-Identifier: Apache-2.0
+#
+# Copyright 2025 Firdaus Hakimi <hakimifirdaus944@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import logging
+import os
+from collections import Counter, OrderedDict
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager, suppress
+from pathlib import Path
+
+import anyio
+from pyrogram.client import Client
+
+log: logging.Logger = logging.getLogger(__name__)
+
+PARTIAL_SUFFIX: str = ".part"
+
+
+class DownloadCache:
+    """Files downloaded from Telegram, kept on disk by their file_unique_id.
+
+    The least recently used files are deleted once the cache grows past
+    `max_bytes`, except files that are still being used. Requests for a file
+    that is already being downloaded wait for that download instead of
+    starting another one.
+    """
+
+    def __init__(self, directory: str, max_bytes: int) -> None:
+        """Initialize DownloadCache, picking up files left in `directory` by a previous run.
+
+        Args:
+            directory (str): Where to keep downloaded files. Created if it doesn't exist.
+            max_bytes (int): How many bytes of files to keep.
+
+        """
+        self.directory: Path = Path(directory).resolve()
+        self.max_bytes: int = max_bytes
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.total_bytes: int = 0
+        self._sizes: OrderedDict[str, int] = OrderedDict()
+        self._pins: Counter[str] = Counter()
+        self._in_flight: dict[str, anyio.Event] = {}
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        found: list[tuple[float, str, int]] = []
+        for path in self.directory.iterdir():
+            if path.name.endswith(PARTIAL_SUFFIX):
+                path.unlink(missing_ok=True)
+                continue
+
+            stat = path.stat()
+            found.append((stat.st_mtime, path.name, stat.st_size))
+
+        for _, name, size in sorted(found):
+            self._sizes[name] = size
+            self.total_bytes += size
+
+        self._evict()
+        log.info("download cache has %d files (%d bytes) in '%s'", len(self._sizes), self.total_bytes, self.directory)
+
+    def __len__(self) -> int:  # noqa: D105
+        return len(self._sizes)
+
+    @asynccontextmanager
+    async def download(self, client: Client, file_id: str, file_unique_id: str) -> AsyncIterator[str]:
+        """Yields the path of the downloaded file, downloading it first if it isn't cached.
+
+        The file won't be evicted until the context exits.
+
+        Args:
+            client (Client): Client to download with.
+            file_id (str): file_id to download.
+            file_unique_id (str): file_unique_id of the same file, used as the cache key.
+
+        """
+        self._pins[file_unique_id] += 1
+        try:
+            yield await self._fetch(client, file_id, file_unique_id)
+        finally:
+            self._pins[file_unique_id] -= 1
+            if self._pins[file_unique_id] == 0:
+                del self._pins[file_unique_id]
+
+            self._evict()
+
+    async def _fetch(self, client: Client, file_id: str, file_unique_id: str) -> str:
+        path = self.directory / file_unique_id
+        while file_unique_id not in self._sizes:
+            in_flight = self._in_flight.get(file_unique_id)
+            if in_flight is None:
+                await self._download_to(client, file_id, file_unique_id, path)
+                return str(path)
+
+            # if that download fails, the loop ends up starting a new one
+            await in_flight.wait()
+
+        self.hits += 1
+        self._sizes.move_to_end(file_unique_id)
+        with suppress(OSError):
+            os.utime(path)
+
+        return str(path)
+
+    async def _download_to(self, client: Client, file_id: str, file_unique_id: str, path: Path) -> None:
+        self.misses += 1
+        done = self._in_flight[file_unique_id] = anyio.Event()
+        partial = path.with_name(path.name + PARTIAL_SUFFIX)
+        try:
+            log.info("downloading '%s' into the download cache", file_unique_id)
+            await client.download_media(file_id, str(partial))
+            size = partial.stat().st_size
+            partial.replace(path)
+        except BaseException:
+            partial.unlink(missing_ok=True)
+            raise
+        finally:
+            del self._in_flight[file_unique_id]
+            done.set()
+
+        self._sizes[file_unique_id] = size
+        self.total_bytes += size
+
+    def _evict(self) -> None:
+        for file_unique_id in list(self._sizes):
+            if self.total_bytes <= self.max_bytes:
+                return
+
+            if file_unique_id in self._pins:
+                continue
+
+            size = self._sizes.pop(file_unique_id)
+            self.total_bytes -= size
+            self.evictions += 1
+            (self.directory / file_unique_id).unlink(missing_ok=True)
+            log.debug("evicted '%s' (%d bytes) from the download cache", file_unique_id, size)
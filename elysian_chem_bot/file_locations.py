@@ -0,0 +1,90 @@
+# SPDX-License-Identifier: Apache-2.0
+#
+# Copyright 2025 Firdaus Hakimi <hakimifirdaus944@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from typing import cast
+
+from elysian_chem_bot.database_types import FileNode, SectionNode, SectionPath, pack_file_id, unpack_file_id
+
+
+class FileLocations:
+    """The full path of every file by its file_unique_id, and which files are filed more than once.
+
+    Keyed by the packed file_unique_id, with one path, or a list of them
+    for duplicates. Kept up to date by Database, one file at a time.
+    """
+
+    def __init__(self) -> None:  # noqa: D107
+        self._paths: dict[bytes | str, SectionPath | list[SectionPath]] = {}
+        # the keys of _paths with a list
+        self._duplicates: set[bytes | str] = set()
+
+    @property
+    def duplicate_count(self) -> int:
+        """How many files are filed more than once."""
+        return len(self._duplicates)
+
+    @classmethod
+    def from_tree(cls, root: SectionNode) -> "FileLocations":
+        """Locates every file in a tree. The tree never changes, so this can run in a worker thread."""
+        locations = cls()
+        pending: list[tuple[SectionPath, SectionNode]] = [((), root)]
+        while pending:
+            path, section = pending.pop()
+            for name, child in section.children.items():
+                if isinstance(child, SectionNode):
+                    pending.append(((*path, name), child))
+                else:
+                    locations.add((*path, name), child)
+
+        return locations
+
+    def add(self, path: SectionPath, file: FileNode) -> None:
+        """Records that `file` is at `path`."""
+        key = file.packed_ids[1]
+        paths = self._paths.get(key)
+        if paths is None:
+            self._paths[key] = path
+        elif isinstance(paths, list):
+            paths.append(path)
+        else:
+            self._paths[key] = [paths, path]
+            self._duplicates.add(key)
+
+    def remove(self, path: SectionPath, file: FileNode) -> None:
+        """Reverses add."""
+        key = file.packed_ids[1]
+        paths = self._paths[key]
+        if not isinstance(paths, list):
+            del self._paths[key]
+            return
+
+        paths.remove(path)
+        if len(paths) == 1:
+            self._paths[key] = paths[0]
+            self._duplicates.discard(key)
+
+    def get(self, file_unique_id: str) -> list[SectionPath]:
+        """Every place the file is filed at."""
+        paths = self._paths.get(pack_file_id(file_unique_id))
+        if paths is None:
+            return []
+
+        return list(paths) if isinstance(paths, list) else [paths]
+
+    def duplicates(self) -> dict[str, list[SectionPath]]:
+        """The files filed more than once, with their paths."""
+        return {unpack_file_id(key): list(cast(list[SectionPath], self._paths[key])) for key in self._duplicates}
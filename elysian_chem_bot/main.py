@@ -23,7 +23,15 @@ from pyrogram.filters import command
 from pyrogram.handlers.message_handler import MessageHandler
 from pyrogram.types.messages_and_media import Message
 
-from elysian_chem_bot import SUPER_USERS, app, cmdhelp_instance
+from elysian_chem_bot import (
+    METRICS_HOST,
+    METRICS_PORT,
+    SUPER_USERS,
+    app,
+    cmdhelp_instance,
+    identity_instance,
+    metrics_instance,
+)
 
 
 async def start(client: Client, message: Message) -> None:
@@ -37,6 +45,7 @@ async def reload_modules(client: Client, message: Message) -> None:
     msg = await message.reply_text("Reloading plugins...")
     start = time.perf_counter()
     app.load_plugins()
+    await identity_instance.refresh(client)
     stop = time.perf_counter()
     await msg.edit_text(f"**Plugins reloaded.** Took {stop - start} seconds")
 
@@ -47,7 +56,12 @@ def main() -> None:
 
     cmdhelp_instance.add_commands("start", "start the bot")
     app.load_plugins()
+    metrics_instance.instrument_client(app)
     _ = app.start()
+    asyncio.get_event_loop().run_until_complete(identity_instance.refresh(app))
+    if METRICS_PORT:
+        asyncio.get_event_loop().run_until_complete(metrics_instance.serve(METRICS_HOST, METRICS_PORT))
+
     cmdhelp_instance.update_commands_telegram()
 
     try:
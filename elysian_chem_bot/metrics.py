@@ -0,0 +1,255 @@
+# SPDX-License-Identifier: Apache-2.0
+#
+# Copyright 2025 Firdaus Hakimi <hakimifirdaus944@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import asyncio
+import bisect
+import functools
+import logging
+import re
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass, field, is_dataclass
+from typing import Any
+
+from pyrogram import ContinuePropagation, StopPropagation
+from pyrogram.client import Client
+
+from elysian_chem_bot.coloured_logging_setup import correlated
+
+log: logging.Logger = logging.getLogger(__name__)
+
+# upper bounds in seconds, from a cached keyboard to a large zip archive
+DEFAULT_BUCKETS: tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PREFIX: str = "elysian"
+_INVALID_NAME: re.Pattern[str] = re.compile(r"[^a-zA-Z0-9_]")
+# how long a client of the HTTP endpoint may take to send its request
+_REQUEST_TIMEOUT: float = 5.0
+
+
+class Histogram:
+    """Counts observations into fixed buckets, like a Prometheus histogram.
+
+    Recording is a bisect and two additions, so it can wrap every handler
+    call. Quantiles are estimated as the upper bound of the bucket they
+    fall in.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        """Initialize Histogram.
+
+        Args:
+            buckets (tuple[float, ...]): Sorted upper bounds. Larger observations go to an implicit +Inf bucket.
+
+        """
+        self.buckets: tuple[float, ...] = buckets
+        # not cumulative, the last one is +Inf
+        self.counts: list[int] = [0] * (len(buckets) + 1)
+        self.count: int = 0
+        self.sum: float = 0.0
+
+    def observe(self, value: float) -> None:  # noqa: D102
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket the `q` quantile is in, inf if beyond the last bucket, 0 if empty."""
+        if self.count == 0:
+            return 0.0
+
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts, strict=False):
+            seen += count
+            if seen >= rank:
+                return bound
+
+        return float("inf")
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        """The buckets as Prometheus exposes them: (upper bound, observations up to it)."""
+        bounds = [*(f"{bound:g}" for bound in self.buckets), "+Inf"]
+        seen = 0
+        result: list[tuple[str, int]] = []
+        for bound, count in zip(bounds, self.counts, strict=True):
+            seen += count
+            result.append((bound, seen))
+
+        return result
+
+
+@dataclass
+class CallStats:
+    latency: Histogram = field(default_factory=Histogram)
+    in_flight: int = 0
+    errors: int = 0
+
+
+class Metrics:
+    """Latencies and error counts of the handlers and of the Telegram API calls, and the statistics of the caches.
+
+    Handlers are wrapped with `instrument`, the client with
+    `instrument_client`. Everything else is read from collectors when the
+    metrics are asked for, so it costs nothing in between. Exposed by
+    /stats, and as Prometheus text by `serve` if METRICS_PORT is set.
+    """
+
+    def __init__(self) -> None:  # noqa: D107
+        self.handlers: dict[str, CallStats] = {}
+        self.api_calls: dict[str, CallStats] = {}
+        self._collectors: dict[str, Callable[[], Any]] = {}
+        self._server: asyncio.Server | None = None
+
+    def instrument[**P, R](
+        self, name: str | None = None
+    ) -> Callable[[Callable[P, Awaitable[R]]], Callable[P, Awaitable[R]]]:
+        """Decorator recording the latency, in-flight count and errors of an async function, under `name`.
+
+        Put it below the Pyrogram decorators, so they register the wrapped
+        function. Defaults to the name of the function. What it logs gets a
+        correlation ID, see coloured_logging_setup.correlated.
+        """
+
+        def decorator(func: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+            # kept across plugin reloads, the new function records into the same stats
+            stats = self.handlers.setdefault(name or func.__name__, CallStats())
+
+            @functools.wraps(func)
+            async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+                with correlated():
+                    return await _timed(stats, func, *args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def instrument_client(self, client: Client) -> None:
+        """Records every call `client` makes to the Telegram API, by the name of the raw function."""
+        invoke = client.invoke
+
+        @functools.wraps(invoke)
+        async def timed_invoke(query: Any, *args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+            stats = self.api_calls.get(type(query).__name__)
+            if stats is None:
+                stats = self.api_calls[type(query).__name__] = CallStats()
+
+            return await _timed(stats, invoke, query, *args, **kwargs)
+
+        client.invoke = timed_invoke  # type: ignore[method-assign]
+
+    def add_collector(self, name: str, collect: Callable[[], Any]) -> None:
+        """Registers statistics to read when the metrics are asked for.
+
+        Args:
+            name (str): What they are about, e.g. `keyboard_cache`. Replaces an earlier collector of that name.
+            collect (Callable[[], Any]): Returns a dataclass, or a dict, of numbers.
+
+        """
+        self._collectors[name] = collect
+
+    def collect(self) -> dict[str, dict[str, float]]:
+        """Reads every collector. One that fails is logged and left out."""
+        collected: dict[str, dict[str, float]] = {}
+        for name, collect in self._collectors.items():
+            try:
+                values = collect()
+            except Exception:
+                log.exception("collecting statistics of %s failed", name)
+                continue
+
+            values = asdict(values) if is_dataclass(values) and not isinstance(values, type) else values
+            # anything else, e.g. None for unknown, is left out
+            collected[name] = {key: float(value) for key, value in values.items() if isinstance(value, int | float)}
+
+        return collected
+
+    def render_prometheus(self) -> str:
+        """Everything, in the Prometheus text exposition format."""
+        lines: list[str] = []
+        for kind, label, calls in (("handler", "handler", self.handlers), ("api_call", "method", self.api_calls)):
+            metric = f"{PREFIX}_{kind}"
+            lines.append(f"# TYPE {metric}_duration_seconds histogram")
+            for name, stats in sorted(calls.items()):
+                labels = f'{label}="{_escape(name)}"'
+                lines.extend(
+                    f'{metric}_duration_seconds_bucket{{{labels},le="{bound}"}} {count}'
+                    for bound, count in stats.latency.cumulative()
+                )
+                lines.append(f"{metric}_duration_seconds_sum{{{labels}}} {stats.latency.sum:.6f}")
+                lines.append(f"{metric}_duration_seconds_count{{{labels}}} {stats.latency.count}")
+
+            lines.append(f"# TYPE {metric}_in_flight gauge")
+            lines.extend(f'{metric}_in_flight{{{label}="{_escape(name)}"}} {s.in_flight}' for name, s in calls.items())
+            lines.append(f"# TYPE {metric}_errors_total counter")
+            lines.extend(f'{metric}_errors_total{{{label}="{_escape(name)}"}} {s.errors}' for name, s in calls.items())
+
+        for name, values in self.collect().items():
+            for key, value in values.items():
+                metric = _INVALID_NAME.sub("_", f"{PREFIX}_{name}_{key}")
+                lines.extend((f"# TYPE {metric} gauge", f"{metric} {value:g}"))
+
+        return "\n".join(lines) + "\n"
+
+    async def serve(self, host: str, port: int) -> None:
+        """Starts answering HTTP GET /metrics on `host`:`port` with render_prometheus, on the running event loop."""
+        self._server = await asyncio.start_server(self._handle_request, host, port)
+        log.info("serving metrics on http://%s:%d/metrics", host, port)
+
+    async def _handle_request(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            async with asyncio.timeout(_REQUEST_TIMEOUT):
+                request_line = await reader.readline()
+                # the headers, nothing in them matters
+                while (await reader.readline()).strip():
+                    pass
+
+            method, target, *_ = request_line.decode("latin-1").split()
+            if method == "GET" and target.split("?")[0] == "/metrics":
+                status, body = "200 OK", self.render_prometheus().encode()
+            else:
+                status, body = "404 Not Found", b"not found\n"
+
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+                + body
+            )
+            await writer.drain()
+        except (TimeoutError, ValueError, ConnectionError):
+            log.debug("bad or aborted metrics request")
+        finally:
+            writer.close()
+
+
+async def _timed[**P, R](stats: CallStats, func: Callable[P, Awaitable[R]], *args: P.args, **kwargs: P.kwargs) -> R:
+    stats.in_flight += 1
+    start = time.perf_counter()
+    try:
+        return await func(*args, **kwargs)
+    except (StopPropagation, ContinuePropagation):
+        # how Pyrogram handlers pass on an update, not errors
+        raise
+    except Exception:
+        stats.errors += 1
+        raise
+    finally:
+        stats.latency.observe(time.perf_counter() - start)
+        stats.in_flight -= 1
+
+
+def _escape(label: str) -> str:
+    return label.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,201 @@
+# SPDX-License-Identifier: Apache-2.0
+#
+# Copyright 2025 Firdaus Hakimi <hakimifirdaus944@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+import anyio
+from pyrogram.errors import FloodWait, MessageNotModified
+from pyrogram.types import InlineKeyboardMarkup, Message
+
+log: logging.Logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Allows `rate` operations per second on average, and bursts of up to `capacity`.
+
+    Tokens are reserved rather than waited for, so callers are served in the
+    order they arrived without needing a lock.
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        """Initialize TokenBucket, starting full.
+
+        Args:
+            rate (float): Tokens added per second.
+            capacity (float): Most tokens the bucket can hold.
+
+        """
+        self.rate: float = rate
+        self.capacity: float = capacity
+        self._tokens: float = capacity
+        self._updated: float = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """Takes a token, returns how many seconds to wait before using it."""
+        self._refill()
+        self._tokens -= 1
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def penalize(self, seconds: float) -> None:
+        """Makes every caller wait at least `seconds` longer, e.g. after a FloodWait."""
+        self._refill()
+        self._tokens = min(self._tokens, 0.0) - seconds * self.rate
+
+    @property
+    def idle(self) -> bool:
+        """Whether the bucket is full, meaning it behaves just like a new one."""
+        self._refill()
+        return self._tokens >= self.capacity
+
+
+@dataclass
+class _PendingEdit:
+    text: str
+    reply_markup: InlineKeyboardMarkup | None
+    in_flight: bool = False
+    sent: anyio.Event = field(default_factory=anyio.Event)
+
+
+class OutboundScheduler:
+    """Rate limits what the bot sends to Telegram, per chat and overall.
+
+    Calls wait for a token of their chat and a global token before going
+    out, and are retried after a FloodWait with the chat put on hold for
+    the requested time. Edits of the same message are merged while they
+    wait, so only the latest text is sent.
+    """
+
+    # per chat buckets that are full again are dropped once there are more than this many
+    MAX_IDLE_BUCKETS: int = 4096
+
+    def __init__(
+        self,
+        global_rate: float = 25.0,
+        global_burst: float = 5.0,
+        chat_rate: float = 1.0,
+        chat_burst: float = 3.0,
+        max_flood_retries: int = 3,
+    ) -> None:
+        """Initialize OutboundScheduler.
+
+        Args:
+            global_rate (float): Calls per second across all chats.
+            global_burst (float): How many calls may go out at once across all chats.
+            chat_rate (float): Calls per second to a single chat.
+            chat_burst (float): How many calls a chat may get at once before being limited.
+            max_flood_retries (int): How many FloodWaits a call may get before the error is raised.
+
+        """
+        self.chat_rate: float = chat_rate
+        self.chat_burst: float = chat_burst
+        self.max_flood_retries: int = max_flood_retries
+        self.calls: int = 0
+        self.flood_waits: int = 0
+        self.merged_edits: int = 0
+        self._global: TokenBucket = TokenBucket(global_rate, global_burst)
+        self._chats: dict[int, TokenBucket] = {}
+        self._edits: dict[tuple[int, int], _PendingEdit] = {}
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= self.MAX_IDLE_BUCKETS:
+                self._chats = {k: v for k, v in self._chats.items() if not v.idle}
+
+            bucket = self._chats[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+
+        return bucket
+
+    async def send[**P, R](self, chat_id: int, func: Callable[P, Awaitable[R]], *args: P.args, **kwargs: P.kwargs) -> R:
+        """Calls `func(*args, **kwargs)` once the rate limits of `chat_id` allow it.
+
+        Raises:
+            FloodWait: If Telegram still asks to wait after `max_flood_retries` retries.
+
+        """
+        bucket = self._chat_bucket(chat_id)
+        retries = 0
+        while True:
+            await anyio.sleep(bucket.reserve())
+            await anyio.sleep(self._global.reserve())
+            self.calls += 1
+            try:
+                return await func(*args, **kwargs)
+            except FloodWait as e:
+                self.flood_waits += 1
+                if retries == self.max_flood_retries:
+                    raise
+
+                retries += 1
+                seconds = float(e.value)
+                log.warning("FloodWait of %.0fs in chat %d, retrying %s", seconds, chat_id, func.__qualname__)
+                bucket.penalize(seconds)
+
+    async def edit(self, message: Message, text: str, reply_markup: InlineKeyboardMarkup | None = None) -> None:
+        """Edits the text of `message`, merged with other edits of it that are still waiting to go out.
+
+        Returns once `text`, or a newer edit that replaced it, has been sent.
+        """
+        key = (message.chat.id, message.id)
+        while (pending := self._edits.get(key)) is not None:
+            if not pending.in_flight:
+                pending.text = text
+                pending.reply_markup = reply_markup
+                self.merged_edits += 1
+                await pending.sent.wait()
+                return
+
+            # too late to change the edit being sent, queue up behind it
+            await pending.sent.wait()
+
+        pending = self._edits[key] = _PendingEdit(text, reply_markup)
+        try:
+            await self.send(message.chat.id, self._send_edit, key, pending, message)
+        finally:
+            if self._edits.get(key) is pending:
+                del self._edits[key]
+
+            pending.sent.set()
+
+    async def _send_edit(self, key: tuple[int, int], pending: _PendingEdit, message: Message) -> None:
+        if self._edits.get(key) is not pending:
+            # the message was deleted while the edit was waiting
+            return
+
+        pending.in_flight = True
+        try:
+            await message.edit_text(pending.text, reply_markup=pending.reply_markup)
+        except MessageNotModified:
+            log.debug("edit of message %d in chat %d changed nothing", message.id, message.chat.id)
+        finally:
+            # lets edits made during a FloodWait be merged into the retry
+            pending.in_flight = False
+
+    async def delete(self, message: Message) -> None:
+        """Deletes `message`, dropping any edits of it that have not been sent yet."""
+        if (pending := self._edits.pop((message.chat.id, message.id), None)) is not None:
+            pending.sent.set()
+
+        await self.send(message.chat.id, message.delete)
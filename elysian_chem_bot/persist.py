@@ -0,0 +1,170 @@
+# SPDX-License-Identifier: Apache-2.0
+#
+# Copyright 2025 Firdaus Hakimi <hakimifirdaus944@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+log: logging.Logger = logging.getLogger(__name__)
+
+
+def write_json_temp(path: str, data: Any, **dump_kwargs: Any) -> str:  # noqa: ANN401
+    """Writes `data` as JSON to a fsync-ed temporary file next to `path`, to be moved over it with `commit_file`.
+
+    Args:
+        path (str): The file that will be replaced.
+        data (Any): Anything `json.dump` accepts.
+        **dump_kwargs (Any): Passed to `json.dump`.
+
+    Returns:
+        str: Path to the temporary file.
+
+    """
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{Path(path).name}.", suffix=".tmp", dir=Path(path).parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, **dump_kwargs)
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+    return tmp_path
+
+
+def commit_file(tmp_path: str, path: str) -> None:
+    """Renames `tmp_path` over `path` and makes the rename durable."""
+    Path(tmp_path).replace(path)
+    dir_fd = os.open(Path(path).parent, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+def atomic_write_json(path: str, data: Any, **dump_kwargs: Any) -> None:  # noqa: ANN401
+    """Writes `data` as JSON to `path` so that a crash never leaves a truncated file behind.
+
+    The JSON goes to a temporary file in the same directory, which is fsync-ed and
+    then renamed over `path`.
+
+    Args:
+        path (str): The destination file.
+        data (Any): Anything `json.dump` accepts.
+        **dump_kwargs (Any): Passed to `json.dump`.
+
+    """
+    tmp_path = write_json_temp(path, data, **dump_kwargs)
+    try:
+        commit_file(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+
+def next_count(path: str) -> int:
+    """Counts up the number stored in `path` and returns it, 1 if there is none yet. Durable, see atomic_write_json."""
+    try:
+        with Path(path).open(encoding="utf-8") as f:
+            count = int(json.load(f)) + 1
+    except FileNotFoundError:
+        count = 1
+
+    atomic_write_json(path, count)
+    return count
+
+
+class DebouncedSaver:
+    """Coalesces changes into at most one save every `delay` seconds, run in a worker thread."""
+
+    def __init__(self, save: Callable[[], None], delay: float, name: str) -> None:
+        """Initialize DebouncedSaver.
+
+        Args:
+            save (Callable[[], None]): Does the actual saving. Always called from a worker thread,
+                never concurrently with itself.
+            delay (float): Seconds to wait after the first unsaved change before saving.
+            name (str): Name of the worker thread, for logging.
+
+        """
+        self.save: Callable[[], None] = save
+        self.delay: float = delay
+        self.name: str = name
+        self.dirty: bool = False
+
+        self._lock: threading.Lock = threading.Lock()
+        self._save_lock: threading.Lock = threading.Lock()
+        self._timer: threading.Timer | None = None
+
+    def mark_dirty(self) -> None:
+        """Schedules a save, unless one is already pending."""
+        with self._lock:
+            self.dirty = True
+            if self._timer is None:
+                self._start_timer(self.delay)
+
+    def save_soon(self) -> None:
+        """Like mark_dirty, but don't wait for the rest of the debounce window."""
+        with self._lock:
+            self.dirty = True
+            if self._timer is not None:
+                self._timer.cancel()
+
+            self._start_timer(0)
+
+    def flush(self) -> None:
+        """Cancels the pending save and saves in the calling thread if there are unsaved changes."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+        self._run(reschedule=False)
+
+    def _start_timer(self, delay: float) -> None:
+        self._timer = threading.Timer(delay, self._run)
+        self._timer.name = self.name
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _run(self, *, reschedule: bool = True) -> None:
+        with self._save_lock:
+            with self._lock:
+                if threading.current_thread() is self._timer:
+                    self._timer = None
+
+                if not self.dirty:
+                    return
+
+                self.dirty = False
+
+            try:
+                self.save()
+            except Exception:
+                log.exception("%s: save failed, will retry", self.name)
+                with self._lock:
+                    self.dirty = True
+
+        with self._lock:
+            # changes that came in while saving
+            if reschedule and self.dirty and self._timer is None:
+                self._start_timer(self.delay)
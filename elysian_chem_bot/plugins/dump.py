@@ -14,25 +14,314 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+
+import bz2
+import csv
+import gzip
 import json
-from tempfile import NamedTemporaryFile
+import logging
+import lzma
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import IO
 
-from anyio import open_file
+from anyio import to_thread
 from pyrogram.client import Client
 from pyrogram.filters import command
 from pyrogram.types import Message
 
-from elysian_chem_bot import cmdhelp_instance, db_instance
+from elysian_chem_bot import (
+    SUPER_USERS,
+    cmdhelp_instance,
+    db_instance,
+    identity_instance,
+    metrics_instance,
+    outbound_instance,
+)
+from elysian_chem_bot.commands import Command
+from elysian_chem_bot.database_types import SectionNode, Sections, encode_node
+from elysian_chem_bot.storage import read_tree
+
+log: logging.Logger = logging.getLogger(__name__)
+dump_db_command: Command = Command("dumpdb", identity_instance)
+load_db_command: Command = Command("loaddb", identity_instance)
+import_materials_command: Command = Command(["importmaterials", "importbahan"], identity_instance)
+
+WRITE_BUFFER_SIZE: int = 1024 * 1024
+
+
+def _write_plain(path: str) -> IO[str]:
+    return Path(path).open("w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE)
+
+
+def _write_gzip(path: str) -> IO[str]:
+    return gzip.open(path, "wt", compresslevel=6, encoding="utf-8")
+
+
+def _write_bz2(path: str) -> IO[str]:
+    return bz2.open(path, "wt", encoding="utf-8")
+
+
+def _write_xz(path: str) -> IO[str]:
+    return lzma.open(path, "wt", preset=6, encoding="utf-8")
+
+
+# compression argument of /dumpdb -> (file suffix, opener for writing text), the caller closes what they open
+COMPRESSIONS: dict[str, tuple[str, Callable[[str], IO[str]]]] = {
+    "none": ("", _write_plain),
+    "gz": (".gz", _write_gzip),
+    "bz2": (".bz2", _write_bz2),
+    "xz": (".xz", _write_xz),
+}
+
+
+def _read_plain(path: str) -> IO[str]:
+    return Path(path).open(encoding="utf-8")
+
+
+def _read_gzip(path: str) -> IO[str]:
+    return gzip.open(path, "rt", encoding="utf-8")
+
+
+def _read_bz2(path: str) -> IO[str]:
+    return bz2.open(path, "rt", encoding="utf-8")
+
+
+def _read_xz(path: str) -> IO[str]:
+    return lzma.open(path, "rt", encoding="utf-8")
+
+
+# suffix of a dump -> opener for reading text, anything not in here is read as plain JSON
+DECOMPRESSIONS: dict[str, Callable[[str], IO[str]]] = {
+    ".json": _read_plain,
+    ".gz": _read_gzip,
+    ".bz2": _read_bz2,
+    ".xz": _read_xz,
+}
+
+
+@dataclass
+class Restore:
+    """A database read from a dump, ready to be swapped in with Database.replace_root."""
+
+    root: SectionNode
+    prepared_path: str
+    sections: int
+    files: int
+
+
+@dataclass
+class ManifestEntry:
+    """A file to import, from a manifest."""
+
+    sections: Sections
+    file_name: str
+    file_id: str
+    file_unique_id: str
+
+
+def _manifest_entry(file_path: object, file_id: object, file_unique_id: object, where: str) -> ManifestEntry:
+    if isinstance(file_path, str) and isinstance(file_id, str) and isinstance(file_unique_id, str):
+        *sections, file_name = file_path.split("/")
+        if sections and all(sections) and file_name and file_id and file_unique_id:
+            return ManifestEntry(sections, file_name, file_id, file_unique_id)
+
+    msg = f"{where}: expected a path like section/.../file_name, a file_id and a file_unique_id"
+    raise ValueError(msg)
+
+
+def read_manifest(path: str) -> list[ManifestEntry]:
+    """Reads a manifest of files to import. Blocks.
 
+    A `.csv` manifest has a `path,file_id,file_unique_id` header. Anything
+    else is read as a JSON object of `{"section/.../file_name": [file_id,
+    file_unique_id]}`, files are laid out like in a database dump.
 
-@Client.on_message(command("dumpdb"))
+    Raises:
+        ValueError: If the manifest is not valid JSON, or an entry is malformed.
+        TypeError: If a JSON manifest is not an object.
+        csv.Error: If the CSV cannot be parsed.
+        OSError: If the manifest cannot be read.
+
+    """
+    if Path(path).suffix.lower() == ".csv":
+        with Path(path).open(encoding="utf-8-sig", newline="") as f:
+            reader = csv.DictReader(f)
+            if not {"path", "file_id", "file_unique_id"} <= set(reader.fieldnames or ()):
+                msg = "the CSV manifest must have a path,file_id,file_unique_id header"
+                raise ValueError(msg)
+
+            return [
+                _manifest_entry(row["path"], row["file_id"], row["file_unique_id"], f"line {reader.line_num}")
+                for row in reader
+            ]
+
+    with Path(path).open(encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    if not isinstance(manifest, dict):
+        msg = "the JSON manifest must be an object of path -> [file_id, file_unique_id]"
+        raise TypeError(msg)
+
+    entries: list[ManifestEntry] = []
+    for file_path, ids in manifest.items():
+        if not isinstance(ids, list) or len(ids) != 2:  # noqa: PLR2004
+            msg = f"{file_path!r}: expected [file_id, file_unique_id], got {ids!r}"
+            raise ValueError(msg)
+
+        entries.append(_manifest_entry(file_path, *ids, repr(file_path)))
+
+    return entries
+
+
+def write_dump(snapshot: SectionNode, path: str, compression: str) -> int:
+    """Serializes `snapshot` into `path` chunk by chunk, without building the whole string. Returns the file size."""
+    with COMPRESSIONS[compression][1](path) as f:
+        json.dump(snapshot, f, default=encode_node, indent=4)
+
+    return Path(path).stat().st_size
+
+
+def prepare_restore(path: str) -> Restore:
+    """Reads and validates the dump at `path`, and has the database backend prepare to swap it in. Blocks.
+
+    Raises:
+        ValueError: If the dump is not valid JSON.
+        TypeError: If the dump is not laid out like a database.
+        OSError: If the dump cannot be read or decompressed.
+        lzma.LZMAError: If an .xz dump is corrupt.
+
+    """
+    with DECOMPRESSIONS.get(Path(path).suffix, _read_plain)(path) as f:
+        root = read_tree(f)
+
+    sections = files = 0
+    pending = [root]
+    while pending:
+        section = pending.pop()
+        sections += 1
+        for child in section.children.values():
+            if isinstance(child, SectionNode):
+                pending.append(child)
+            else:
+                files += 1
+
+    prepared_path = db_instance.backend.prepare_replace(root)
+    # the root itself is not a section anybody can see
+    return Restore(root, prepared_path, sections - 1, files)
+
+
+@Client.on_message(command(list(dump_db_command.names)))
+@metrics_instance.instrument()
 async def dump_db(client: Client, message: Message) -> None:
-    with NamedTemporaryFile(suffix=".json") as f:
-        async with await open_file(f.name, "w", encoding="utf-8") as jf:
-            content = json.dumps(db_instance.raw_db, indent=4)
-            await jf.write(content)
+    if (args := dump_db_command.parse(message.text)) is None:
+        return
+
+    compression = args.text.lower() or "none"
+    if compression not in COMPRESSIONS:
+        await message.reply_text(f"unknown compression, use one of: {', '.join(COMPRESSIONS)}")
+        return
+
+    start = time.perf_counter()
+    # the tree is copy-on-write, so this one stays as it is while the handlers go on changing the database
+    snapshot = db_instance.snapshot()
+
+    file_name = f"db-{datetime.now(UTC):%Y%m%d-%H%M%S}.json{COMPRESSIONS[compression][0]}"
+    with TemporaryDirectory() as tmp_dir:
+        path = str(Path(tmp_dir, file_name))
+        size = await to_thread.run_sync(write_dump, snapshot, path, compression)
+        elapsed = time.perf_counter() - start
+        log.info("dumped database to '%s', %d bytes in %.2fs", file_name, size, elapsed)
+        await outbound_instance.send(
+            message.chat.id,
+            message.reply_document,
+            path,
+            caption=f"{size / 1024:.1f} KiB, took {elapsed:.2f}s",
+        )
+
+
+@Client.on_message(command(list(load_db_command.names)))
+@metrics_instance.instrument()
+async def load_db(client: Client, message: Message) -> None:
+    if message.from_user.id not in SUPER_USERS:
+        return
+
+    if load_db_command.parse(message.text) is None:
+        return
+
+    document = message.reply_to_message.document if message.reply_to_message else None
+    if document is None:
+        await message.reply_text("reply to a database dump!")
+        return
+
+    msg = await outbound_instance.send(message.chat.id, message.reply_text, "__Loading database...__")
+    start = time.perf_counter()
+    with TemporaryDirectory() as tmp_dir:
+        path = str(Path(tmp_dir, Path(document.file_name or "db.json").name))
+        await client.download_media(document.file_id, path)
+        try:
+            restore = await to_thread.run_sync(prepare_restore, path)
+        except (ValueError, TypeError, OSError, lzma.LZMAError) as e:
+            log.exception("failed to load database from '%s'", document.file_name)
+            await outbound_instance.edit(msg, f"**Failed** to load the database: {e}")
+            return
+
+    db_instance.replace_root(restore.root, restore.prepared_path)
+    elapsed = time.perf_counter() - start
+    log.info("database replaced with '%s', %d sections, %d files", document.file_name, restore.sections, restore.files)
+    await outbound_instance.edit(
+        msg, f"**Loaded** {restore.sections} sections and {restore.files} files in {elapsed:.2f}s."
+    )
+
+
+@Client.on_message(command(list(import_materials_command.names)))
+@metrics_instance.instrument()
+async def import_materials(client: Client, message: Message) -> None:
+    if message.from_user.id not in SUPER_USERS:
+        return
+
+    if import_materials_command.parse(message.text) is None:
+        return
+
+    document = message.reply_to_message.document if message.reply_to_message else None
+    if document is None:
+        await message.reply_text("reply to a manifest!")
+        return
+
+    msg = await outbound_instance.send(message.chat.id, message.reply_text, "__Importing materials...__")
+    start = time.perf_counter()
+    with TemporaryDirectory() as tmp_dir:
+        path = str(Path(tmp_dir, Path(document.file_name or "manifest.json").name))
+        await client.download_media(document.file_id, path)
+        try:
+            entries = await to_thread.run_sync(read_manifest, path)
+        except (ValueError, TypeError, OSError, csv.Error) as e:
+            log.exception("failed to read manifest '%s'", document.file_name)
+            await outbound_instance.edit(msg, f"**Failed** to read the manifest: {e}")
+            return
+
+    # all or nothing, and however many files there are, each section is resolved and the database written once
+    try:
+        with db_instance.batch() as batch:
+            for entry in entries:
+                batch.add_section(entry.sections)
+                batch.add_file(entry.sections, entry.file_name, entry.file_id, entry.file_unique_id)
+    except ValueError as e:
+        log.exception("failed to import manifest '%s'", document.file_name)
+        await outbound_instance.edit(msg, f"**Failed** to import, nothing was changed: {e}")
+        return
 
-        await message.reply_document(f.name)
+    elapsed = time.perf_counter() - start
+    log.info("imported %d files from '%s'", len(entries), document.file_name)
+    await outbound_instance.edit(msg, f"**Imported** {len(entries)} files in {elapsed:.2f}s.")
 
 
-cmdhelp_instance.add_commands("dumpdb", "Dump the database.")
+cmdhelp_instance.add_commands("dumpdb", "Dump the database, optionally compressed with gz, bz2 or xz.")
+cmdhelp_instance.add_commands("loaddb", "Replace the database with the replied-to dump, also compressed ones.")
+cmdhelp_instance.add_commands(
+    ["importmaterials", "importbahan"], "Add the files of the replied-to JSON or CSV manifest, in one go."
+)
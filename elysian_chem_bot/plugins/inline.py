@@ -0,0 +1,84 @@
+# SPDX-License-Identifier: Apache-2.0
+#
+# Copyright 2025 Firdaus Hakimi <hakimifirdaus944@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import logging
+import time
+
+from pyrogram.client import Client
+from pyrogram.types import InlineQuery, InlineQueryResultCachedDocument
+
+from elysian_chem_bot import INLINE_CACHE_TTL, db_instance, indexer_instance, metrics_instance
+from elysian_chem_bot.caches import VersionedLRUCache
+from elysian_chem_bot.database_types import SectionPath
+from elysian_chem_bot.search import words_of
+
+log: logging.Logger = logging.getLogger(__name__)
+# Telegram's limit for the results of one answer, the rest come with the next offset
+INLINE_PAGE_SIZE: int = 50
+# how many results of a query can be paged through
+INLINE_MAX_RESULTS: int = 500
+# how long Telegram may reuse an answer by itself, short so new materials show up soon
+INLINE_ANSWER_CACHE_TIME: int = 10
+# keyed by the words of the query, so `Kimia  SPM` and `kimia spm` share an entry, stored with the generation of
+# the database they were found in
+inline_cache: VersionedLRUCache[str, list[SectionPath]] = VersionedLRUCache(1024, INLINE_CACHE_TTL)
+metrics_instance.add_collector("inline_cache", inline_cache.stats)
+
+
+def inline_result(result_id: int, path: SectionPath) -> InlineQueryResultCachedDocument:
+    file = db_instance.get_file(list(path[:-1]), path[-1])
+    return InlineQueryResultCachedDocument(file.file_id, path[-1], id=str(result_id), description=" / ".join(path[:-1]))
+
+
+@Client.on_inline_query()
+@metrics_instance.instrument()
+async def inline_search(client: Client, inline_query: InlineQuery) -> None:
+    query = " ".join(words_of(inline_query.query))
+    if not query:
+        await inline_query.answer([], cache_time=INLINE_ANSWER_CACHE_TIME)
+        return
+
+    # indexing a large catalog takes longer than Telegram waits for an answer, so the first queries get told to retry
+    if not indexer_instance.search_ready():
+        await inline_query.answer(
+            [],
+            cache_time=0,
+            switch_pm_text="Still indexing the materials, try again in a moment",
+            switch_pm_parameter="start",
+        )
+        return
+
+    try:
+        offset = max(int(inline_query.offset or 0), 0)
+    except ValueError:
+        offset = 0
+
+    results = inline_cache.get(query, db_instance.generation)
+    if results is None:
+        start = time.perf_counter()
+        results = db_instance.search(query, INLINE_MAX_RESULTS)
+        elapsed = (time.perf_counter() - start) * 1000
+        log.info("inline search for '%s': %d results in %.1fms", query, len(results), elapsed)
+        inline_cache.put(query, db_instance.generation, results)
+
+    page = results[offset : offset + INLINE_PAGE_SIZE]
+    next_offset = offset + len(page)
+    await inline_query.answer(
+        [inline_result(i, path) for i, path in enumerate(page, offset)],
+        cache_time=INLINE_ANSWER_CACHE_TIME,
+        next_offset=str(next_offset) if next_offset < len(results) else "",
+    )
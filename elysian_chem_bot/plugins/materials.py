@@ -14,115 +14,237 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import json
+import binascii
 import logging
+import struct
+import time
 import zipfile
-from hashlib import md5
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from enum import IntEnum
 from itertools import batched
-from tempfile import NamedTemporaryFile, TemporaryDirectory
-from typing import Any, cast
+from typing import cast
 
-from anyio import Path, open_file
-from jsondb.database import JsonDB
+from anyio import Path, to_thread
 from pyrogram.client import Client
 from pyrogram.enums import MessageMediaType
 from pyrogram.filters import command
 from pyrogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message
 
-from elysian_chem_bot import DB_PERSIST_PATH, cmdhelp_instance, db_instance
-from elysian_chem_bot.database_types import File, Sections
-from elysian_chem_bot.utils import sanitize_message
+from elysian_chem_bot import (
+    DB_PERSIST_PATH,
+    DOWNLOAD_CACHE_MAX_BYTES,
+    MATERIAL_PAGE_SIZE,
+    SUPER_USERS,
+    UPLOAD_CONCURRENCY,
+    cmdhelp_instance,
+    db_instance,
+    identity_instance,
+    indexer_instance,
+    metrics_instance,
+    outbound_instance,
+)
+from elysian_chem_bot.archive import ArchiveLimitError, ArchiveReader
+from elysian_chem_bot.caches import ArchiveResultCache, ContentHashCache, VersionedLRUCache
+from elysian_chem_bot.commands import Command
+from elysian_chem_bot.database_types import File, FileNode, SectionNode, SectionPath, Sections
+from elysian_chem_bot.download_cache import DownloadCache
+from elysian_chem_bot.persist import next_count
+from elysian_chem_bot.upload_pipeline import ArchiveUploadPipeline
 
 log: logging.Logger = logging.getLogger(__name__)
-cache_db: JsonDB = JsonDB(Path(Path(DB_PERSIST_PATH).parent).joinpath("extracted_files_cache.json").as_posix())
+cache_db: ContentHashCache = ContentHashCache(
+    Path(Path(DB_PERSIST_PATH).parent).joinpath("extracted_files_cache.json").as_posix()
+)
+archive_cache: ArchiveResultCache = ArchiveResultCache(
+    Path(Path(DB_PERSIST_PATH).parent).joinpath("extracted_archives_cache.json").as_posix()
+)
+download_cache: DownloadCache = DownloadCache(
+    Path(Path(DB_PERSIST_PATH).parent).joinpath("download_cache").as_posix(), DOWNLOAD_CACHE_MAX_BYTES
+)
+add_material_command: Command = Command(["addmaterial", "addbahan"], identity_instance)
+clear_zip_cache_command: Command = Command("clearzipcache", identity_instance)
+duplicates_command: Command = Command("duplicates", identity_instance)
+search_command: Command = Command(["cari", "search"], identity_instance)
+# Telegram's limit for the text of a message
+MAX_MESSAGE_LENGTH: int = 4096
+# search results show the path of the file, cut from the front to this many characters
+SEARCH_BUTTON_LENGTH: int = 60
+# keyed by (sections, columns, page), entries are stored with the version of the section they were generated from
+keyboard_cache: VersionedLRUCache[tuple[SectionPath, int, int], InlineKeyboardMarkup] = VersionedLRUCache(512)
+db_instance.replace_listeners.append(keyboard_cache.clear)
+metrics_instance.add_collector("keyboard_cache", keyboard_cache.stats)
+metrics_instance.add_collector("content_hash_cache", cache_db.stats)
+metrics_instance.add_collector(
+    "archive_cache", lambda: {"entries": len(archive_cache), "hits": archive_cache.hits, "misses": archive_cache.misses}
+)
+metrics_instance.add_collector(
+    "download_cache",
+    lambda: {
+        "entries": len(download_cache),
+        "bytes": download_cache.total_bytes,
+        "max_bytes": download_cache.max_bytes,
+        "hits": download_cache.hits,
+        "misses": download_cache.misses,
+        "evictions": download_cache.evictions,
+    },
+)
+
+
+class MaterialAction(IntEnum):
+    OPEN = 0
+    BACK = 1
+    PAGE = 2
+
+
+CALLBACK_PREFIX: str = "m"
+CALLBACK_PROTOCOL_VERSION: int = 1
+# section ids and versions only mean something within one process, so buttons from before a restart are rejected.
+# Counted up on every start, a button of an earlier run never passes for one of this run.
+CALLBACK_EPOCH: int = next_count(Path(Path(DB_PERSIST_PATH).parent).joinpath("callback_epoch.json").as_posix()) % 2**32
+# protocol, action, epoch, section_id, version, arg: 18 bytes, 24 once encoded
+_CALLBACK_STRUCT: struct.Struct = struct.Struct(">BBIIII")
+
+
+@dataclass
+class MaterialCallbackData:
+    """Callback data for the buttons of the material keyboards.
 
+    Serialized as "m" and the URL-safe base64 of a fixed size struct, so it stays
+    far below Telegram's 64 bytes however deep the section and long the names are.
+    `section_id` and `version` are those of the section the keyboard was generated
+    from. For MaterialAction.OPEN, `arg` is the position of the child to open,
+    for MaterialAction.PAGE it's the page to show. Both fit in 32 bits, so
+    sections with more than 65535 children are fine.
+    """
 
-class MaterialCallbackData:
-    def __init__(self, callback_string: str) -> None:
-        """Callback data for the button of the material.
+    action: MaterialAction
+    section_id: int
+    version: int
+    arg: int = 0
+    epoch: int = CALLBACK_EPOCH
+
+    @classmethod
+    def parse(cls, callback_string: str) -> "MaterialCallbackData":
+        """Parses callback data generated by this process.
+
+        Raises:
+            ValueError: If it's malformed, from another protocol version, or from before a restart.
 
-        Args:
-            callback_string (str): "MUST be sections delimited by /:file name"
         """
-        self.sections: list[str] = callback_string.split(":")[0].split("/")
-        self.file_name_or_section: str = callback_string.split(":")[1]
+        if not callback_string.startswith(CALLBACK_PREFIX):
+            msg = "not material callback data"
+            raise ValueError(msg)
+
+        encoded = callback_string.removeprefix(CALLBACK_PREFIX)
+        try:
+            protocol, action, epoch, section_id, version, arg = _CALLBACK_STRUCT.unpack(
+                urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4))
+            )
+        except (binascii.Error, struct.error) as e:
+            msg = "malformed material callback data"
+            raise ValueError(msg) from e
 
-        if self.sections[0] == "":
-            self.sections.pop(0)
+        if protocol != CALLBACK_PROTOCOL_VERSION or epoch != CALLBACK_EPOCH:
+            msg = "material callback data from an outdated keyboard"
+            raise ValueError(msg)
+
+        return cls(MaterialAction(action), section_id, version, arg, epoch)
 
     def __str__(self) -> str:
-        """Returns a string representation of the callback data of a material."""
-        return f"{'/'.join(self.sections)}:{self.file_name_or_section}"
+        """Returns the serialized callback data."""
+        packed = _CALLBACK_STRUCT.pack(
+            CALLBACK_PROTOCOL_VERSION, self.action, self.epoch, self.section_id, self.version, self.arg
+        )
+        return CALLBACK_PREFIX + urlsafe_b64encode(packed).rstrip(b"=").decode()
 
 
-async def generate_inline_keyboard_markup(sections: Sections, columns: int = 2) -> InlineKeyboardMarkup:
-    db_instance.raw_db = cast(dict[str, dict[str, Any]], db_instance.raw_db)
+def page_count(section: SectionNode) -> int:
+    return max(1, -(-len(section.children) // MATERIAL_PAGE_SIZE))
 
-    # Get to the requested section first
-    cur_sec = db_instance.raw_db
-    for sec in sections:
-        cur_sec = cur_sec[sec]
 
-    # Now we generate the buttons
-    # note: callback data will be "sections delimited with /:filename"
-    rows: list[list[InlineKeyboardButton]] = []
-    joined_sections = "/".join(sections)
+def material_button(text: str, section: SectionNode, action: MaterialAction, arg: int = 0) -> InlineKeyboardButton:
+    return InlineKeyboardButton(
+        text, callback_data=str(MaterialCallbackData(action, section.node_id, section.version, arg))
+    )
+
 
-    cur_sec_keys = list(cur_sec.keys())
+async def generate_inline_keyboard_markup(sections: Sections, columns: int = 2, page: int = 0) -> InlineKeyboardMarkup:
+    cur_sec = db_instance.get_section(sections)
+    pages = page_count(cur_sec)
+    page = min(max(page, 0), pages - 1)
+    cache_key = (tuple(sections), columns, page)
+    if (cached := keyboard_cache.get(cache_key, cur_sec.version)) is not None:
+        return cached
+
+    # Now we generate the buttons, only for the requested page
+    # note: children are addressed by their position, which is stable for as long as the version is
+    start = page * MATERIAL_PAGE_SIZE
+    page_names = cur_sec.child_names()[start : start + MATERIAL_PAGE_SIZE]
+    buttons: list[InlineKeyboardButton] = [
+        material_button(name, cur_sec, MaterialAction.OPEN, i) for i, name in enumerate(page_names, start)
+    ]
     if len(sections) > 0:
-        cur_sec_keys.append("🔙 back")
-
-    for batch in batched(cur_sec_keys, columns):
-        keyboardified_batch: list[InlineKeyboardButton] = [
-            InlineKeyboardButton(x, callback_data=f"{joined_sections}:{x}") for x in batch
-        ]
-        rows.append(keyboardified_batch)
-
-    return InlineKeyboardMarkup(rows)
-
-
-async def auto_extract_zip_archive(client: Client, message: Message, file_id: str) -> None:
-    msg = await message.reply_text("Automatically extracting zip archive...")
-    with NamedTemporaryFile() as tf:
-        log.info("created temporary file '%s'", tf.name)
-
-        log.info("downloading document with file_id '%s'", file_id)
-        await msg.edit_text(f"**downloading document with file_id** `'{file_id}'`")
-        await client.download_media(file_id, tf.name)
-        log.info("document downloaded")
-
-        with TemporaryDirectory() as td:
-            log.info("created temporary directory '%s' for archive extraction", td)
-            log.info("**extracting archive**")
-            await msg.edit_text("Extracting the zip archive...")
-            zipfile.ZipFile(tf.name).extractall(td)
-            log.info("archive extracted")
-
-            log.info("uploading extracted files")
-            await msg.edit_text("**uploading extracted files**")
-
-            async for file in Path(td).rglob("*"):
-                if await file.is_file():
-                    log.info("uploading file '%s'", file.as_posix())
-                    async with await open_file(file.as_posix(), "rb") as f:
-                        content = await f.read()
-                        md5sum: str = md5(content).hexdigest()  # noqa: S324
-                        if cached_file_id := cache_db.data.get(md5sum):
-                            log.info("file '%s' found in cache, re-using file_id", file.as_posix())
-                            await message.reply_document(cached_file_id, file_name=file.name)
-                        else:
-                            log.info("file '%s' NOT found in cache, uploading instead", file.as_posix())
-                            doc = await message.reply_document(file.as_posix(), file_name=file.name)
-                            log.info("storing file '%s' in cache", file.as_posix())
-                            cache_db.data.update({md5sum: doc.document.file_id})
-
-            await msg.delete()
-
-
-@Client.on_message(command(["addmaterial", "addbahan"]))
+        buttons.append(material_button("🔙 back", cur_sec, MaterialAction.BACK))
+
+    rows: list[list[InlineKeyboardButton]] = [list(batch) for batch in batched(buttons, columns)]
+
+    navigation: list[InlineKeyboardButton] = []
+    if page > 0:
+        navigation.append(material_button("⬅️ prev", cur_sec, MaterialAction.PAGE, page - 1))
+
+    if page < pages - 1:
+        navigation.append(material_button("next ➡️", cur_sec, MaterialAction.PAGE, page + 1))
+
+    if navigation:
+        rows.append(navigation)
+
+    markup = InlineKeyboardMarkup(rows)
+    keyboard_cache.put(cache_key, cur_sec.version, markup)
+    return markup
+
+
+@metrics_instance.instrument()
+async def auto_extract_zip_archive(client: Client, message: Message, file: File) -> None:
+    if (members := archive_cache.get(file.file_unique_id)) is not None:
+        log.info("archive '%s' found in cache, re-sending %d files", file.file_unique_id, len(members))
+        for file_name, file_id in members:
+            await outbound_instance.send(message.chat.id, message.reply_document, file_id, file_name=file_name)
+
+        return
+
+    file_id = file.file_id
+    msg = await outbound_instance.send(message.chat.id, message.reply_text, "Automatically extracting zip archive...")
+    await outbound_instance.edit(msg, f"**downloading document with file_id** `'{file_id}'`")
+    async with download_cache.download(client, file_id, file.file_unique_id) as archive_path:
+        log.info("document with file_id '%s' downloaded to '%s'", file_id, archive_path)
+
+        log.info("extracting and uploading archive members")
+        await outbound_instance.edit(msg, "**extracting and uploading files**")
+        try:
+            with await to_thread.run_sync(ArchiveReader, archive_path) as reader:
+                pipeline = ArchiveUploadPipeline(client, message, cache_db, outbound_instance, UPLOAD_CONCURRENCY)
+                await pipeline.run(reader)
+        except (zipfile.BadZipFile, ArchiveLimitError) as e:
+            log.exception("failed to extract archive with file_id '%s'", file_id)
+            await outbound_instance.edit(msg, f"**Failed** to extract the zip archive: {e}")
+            return
+
+        archive_cache.put(file.file_unique_id, pipeline.results)
+        if pipeline.skipped:
+            await outbound_instance.edit(msg, f"skipped empty files: {', '.join(pipeline.skipped)}")
+        else:
+            await outbound_instance.delete(msg)
+
+
+@Client.on_message(command(list(add_material_command.names)))
+@metrics_instance.instrument()
 async def add_material(client: Client, message: Message) -> None:
-    clean_text: str = await sanitize_message(message.text, ["addmaterial", "addbahan"])
-    sections: Sections = clean_text.split("/")
+    if (args := add_material_command.parse(message.text)) is None:
+        return
+
+    sections: Sections = list(args.section_path)
 
     if not db_instance.is_sections_exist(sections).status:
         log.error("sections '%s' does not exist", sections)
@@ -147,84 +269,232 @@ async def add_material(client: Client, message: Message) -> None:
     except ValueError:
         medias: list[Message] = [message.reply_to_message]
 
-    for media in medias:
-        log.info(
-            "adding file '%s', where file id: '%s' file unique id: '%s'",
-            media.document.file_name,
-            media.document.file_id,
-            media.document.file_unique_id,
-        )
-        db_instance.add_file(sections, media.document.file_name, media.document.file_id, media.document.file_unique_id)
-
-    mantap = [f"__{x.document.file_name}__" for x in medias]
-    await message.reply_text(f"added {', '.join(mantap)} to section **{sections}**")
+    added: list[str] = []
+    notes: list[str] = []
+    # the index only has what was there before the batch, an album can have the same file twice
+    added_ids: set[str] = set()
+    await indexer_instance.file_locations()
+    # the whole album in one step, the section is resolved and the database written once
+    with db_instance.batch() as batch:
+        for media in medias:
+            document = media.document
+            if document.file_unique_id in added_ids:
+                log.info("skipping file '%s', the album has it twice", document.file_name)
+                notes.append(f"skipped __{document.file_name}__, the album has it twice")
+                continue
+
+            locations = db_instance.file_locations(document.file_unique_id)
+            if any(list(path[:-1]) == sections for path in locations):
+                log.info("skipping file '%s', it's already in %s", document.file_name, sections)
+                notes.append(f"skipped __{document.file_name}__, it's already in this section")
+                continue
+
+            if locations:
+                notes.append(f"__{document.file_name}__ is also at {', '.join('/'.join(path) for path in locations)}")
+
+            log.info(
+                "adding file '%s', where file id: '%s' file unique id: '%s'",
+                document.file_name,
+                document.file_id,
+                document.file_unique_id,
+            )
+            batch.add_file(sections, document.file_name, document.file_id, document.file_unique_id)
+            added_ids.add(document.file_unique_id)
+            added.append(f"__{document.file_name}__")
+
+    text = f"added {', '.join(added)} to section **{sections}**" if added else "nothing added"
+    await message.reply_text("\n".join([text, *notes]))
 
 
 @Client.on_message(command("dumpcache"))
+@metrics_instance.instrument()
 async def dump_cache(client: Client, message: Message) -> None:
-    with NamedTemporaryFile("w+", suffix=".json") as f:
-        async with await open_file(f.name, "w", encoding="utf-8") as wf:
-            content = json.dumps(cache_db.data, indent=4)
-            await wf.write(content)
+    stats = cache_db.stats()
+    lookups = stats.hits + stats.misses
+    hit_ratio = f"{stats.hits / lookups:.1%}" if lookups > 0 else "n/a"
+    oldest = (
+        datetime.fromtimestamp(stats.oldest_last_used, UTC).strftime("%Y-%m-%d %H:%M UTC")
+        if stats.oldest_last_used
+        else "never"
+    )
+    await message.reply_text(
+        "**Extracted files cache**\n"
+        f"entries: {stats.entries}/{stats.max_entries}\n"
+        f"hits: {stats.hits}, misses: {stats.misses} (hit ratio {hit_ratio})\n"
+        f"evictions: {stats.evictions}\n"
+        f"least recently used entry last used: {oldest}\n"
+        f"extracted archives cached: {len(archive_cache)}\n"
+        f"downloads cached: {len(download_cache)} ({download_cache.total_bytes / 1024**2:.1f}"
+        f"/{download_cache.max_bytes / 1024**2:.0f} MiB), hits: {download_cache.hits}, "
+        f"misses: {download_cache.misses}, evictions: {download_cache.evictions}"
+    )
+
+
+def search_button(path: SectionPath) -> InlineKeyboardButton:
+    # the same button as in the keyboard of the file's section, so material_cb sends it
+    section = db_instance.get_section(list(path[:-1]))
+    text = "/".join(path)
+    if len(text) > SEARCH_BUTTON_LENGTH:
+        text = "…" + text[-SEARCH_BUTTON_LENGTH + 1 :]
 
-        await message.reply_document(f.name)
+    return material_button(text, section, MaterialAction.OPEN, section.child_names().index(path[-1]))
+
+
+@Client.on_message(command(list(search_command.names)))
+@metrics_instance.instrument()
+async def search_materials(client: Client, message: Message) -> None:
+    if (args := search_command.parse(message.text)) is None:
+        return
+
+    if not args.text:
+        await message.reply_text("usage: /cari <words in the name of the file or of its sections>")
+        return
+
+    # a large catalog takes a while to index, meanwhile everybody else keeps getting answers
+    if not indexer_instance.search_ready():
+        await message.reply_text("Still indexing the materials, try again in a moment.")
+        return
+
+    start = time.perf_counter()
+    results = db_instance.search(args.text, MATERIAL_PAGE_SIZE)
+    log.info("search for '%s': %d results in %.1fms", args.text, len(results), (time.perf_counter() - start) * 1000)
+    if not results:
+        await message.reply_text(f"Nothing found for __{args.text}__.")
+        return
+
+    await message.reply_text(
+        f"**{len(results)}** file(s) found for __{args.text}__:",
+        reply_markup=InlineKeyboardMarkup([[search_button(path)] for path in results]),
+    )
+
+
+@Client.on_message(command(list(duplicates_command.names)))
+@metrics_instance.instrument()
+async def duplicates(client: Client, message: Message) -> None:
+    if message.from_user.id not in SUPER_USERS:
+        return
+
+    if duplicates_command.parse(message.text) is None:
+        return
+
+    await indexer_instance.file_locations()
+    clusters = db_instance.duplicate_files()
+    if not clusters:
+        await message.reply_text("No file is filed more than once.")
+        return
+
+    lines = [f"**{len(clusters)}** file(s) are filed more than once:"]
+    for file_unique_id, paths in sorted(clusters.items(), key=lambda cluster: -len(cluster[1])):
+        lines.append(f"\n`{file_unique_id}`")
+        lines.extend(f"- {'/'.join(path)}" for path in paths)
+
+    text = "\n".join(lines)
+    if len(text) > MAX_MESSAGE_LENGTH:
+        text = text[: text.rfind("\n", 0, MAX_MESSAGE_LENGTH - 2)] + "\n…"
+
+    await message.reply_text(text)
+
+
+@Client.on_message(command(list(clear_zip_cache_command.names)))
+@metrics_instance.instrument()
+async def clear_zip_cache(client: Client, message: Message) -> None:
+    if message.from_user.id not in SUPER_USERS:
+        return
+
+    if (args := clear_zip_cache_command.parse(message.text)) is None:
+        return
+
+    file_unique_id: str | None = args.text or None
+    count = archive_cache.invalidate(file_unique_id)
+    await message.reply_text(f"Forgot **{count}** extracted archive(s).")
 
 
 @Client.on_message(command(["material", "bahan"]))
+@metrics_instance.instrument()
 async def material_beta(client: Client, message: Message) -> None:
     inline_keyboard: InlineKeyboardMarkup = await generate_inline_keyboard_markup([])
     await message.reply_text("Please use the button below\n**Current section is:** __/__", reply_markup=inline_keyboard)
 
 
+async def show_section(cb_query: CallbackQuery, sections: Sections, page: int = 0) -> None:
+    inline_keyboard: InlineKeyboardMarkup = await generate_inline_keyboard_markup(sections, page=page)
+    pages = page_count(db_instance.get_section(sections))
+    page_info = f" (page {min(max(page, 0), pages - 1) + 1}/{pages})" if pages > 1 else ""
+    await outbound_instance.edit(
+        cb_query.message,
+        f"Please use the button below\n**Current section is:** __{'/'.join(sections)}__{page_info}",
+        reply_markup=inline_keyboard,
+    )
+
+
 @Client.on_callback_query(group=2)
+@metrics_instance.instrument()
 async def material_cb(client: Client, cb_query: CallbackQuery) -> None:
-    material_callback: MaterialCallbackData = MaterialCallbackData(cast(str, cb_query.data))
+    try:
+        material_callback = MaterialCallbackData.parse(cast(str, cb_query.data))
+        section_path, section = db_instance.get_section_by_id(material_callback.section_id)
+    except ValueError:
+        log.info("outdated or invalid callback data: %s", cb_query.data)
+        await cb_query.answer("This menu is outdated, send /bahan again.", show_alert=True)
+        return
 
-    log.info("sections=%s", material_callback.sections)
-    log.info("fileid=%s", material_callback.file_name_or_section)
+    sections: Sections = list(section_path)
+    log.info("sections=%s", sections)
 
     # handle back button and return early
-    if material_callback.file_name_or_section == "🔙 back":
-        material_callback.sections.pop()
-        markup = await generate_inline_keyboard_markup(material_callback.sections)
-        await cb_query.message.edit(
-            f"Please use the button below\n**Current section is:** __{'/'.join(material_callback.sections)}__",
-            reply_markup=markup,
-        )
+    if material_callback.action == MaterialAction.BACK:
+        await show_section(cb_query, sections[:-1])
+        await cb_query.answer()
+        return
+
+    # a page of the current children, even if they changed since, out of range pages get clamped
+    if material_callback.action == MaterialAction.PAGE:
+        await show_section(cb_query, sections, material_callback.arg)
         await cb_query.answer()
         return
 
-    sections_plus_file_name: list[str] = material_callback.sections.copy()
-    sections_plus_file_name.append(material_callback.file_name_or_section)
+    if material_callback.version != section.version:
+        # the section changed since this keyboard was sent, so the position may point to something else now
+        log.info("outdated keyboard for sections=%s, refreshing", sections)
+        await show_section(cb_query, sections)
+        await cb_query.answer("This menu was outdated, please try again.")
+        return
+
+    file_name_or_section = section.child_names()[material_callback.arg]
+    log.info("file_name_or_section=%s", file_name_or_section)
+    child = section.children[file_name_or_section]
 
-    if not db_instance.is_sections_exist(sections_plus_file_name).status:
+    if isinstance(child, FileNode):
         # then it is a file, upload the file and return early
-        file: File = db_instance.get_file(material_callback.sections, material_callback.file_name_or_section)
+        file: File = child.to_file()
         chat_id = cb_query.message.chat.id
         user_name: str = cb_query.from_user.first_name
         user_id: int = cb_query.from_user.id
         suffix: str = ""
-        if material_callback.file_name_or_section.endswith(".zip"):
+        if file_name_or_section.endswith(".zip"):
             suffix = "__The zip archive will be extracted automatically.__"
 
-        msg = await client.send_document(
-            chat_id, file.file_id, caption=f"[{user_name}](tg://user?id={user_id}) {suffix}"
+        msg = await outbound_instance.send(
+            chat_id,
+            client.send_document,
+            chat_id,
+            file.file_id,
+            caption=f"[{user_name}](tg://user?id={user_id}) {suffix}",
         )
         msg = cast(Message, msg)
         await cb_query.answer()
 
-        if material_callback.file_name_or_section.endswith(".zip"):
-            await auto_extract_zip_archive(client, msg, file.file_id)
+        if file_name_or_section.endswith(".zip"):
+            await auto_extract_zip_archive(client, msg, file)
 
         return
 
-    inline_keyboard: InlineKeyboardMarkup = await generate_inline_keyboard_markup(sections_plus_file_name)
-    await cb_query.message.edit(
-        f"Please use the button below\n**Current section is:** __{'/'.join(sections_plus_file_name)}__",
-        reply_markup=inline_keyboard,
-    )
+    await show_section(cb_query, [*sections, file_name_or_section])
     await cb_query.answer()
 
 
 cmdhelp_instance.add_commands(["bahan", "material"], "Get materials")
-cmdhelp_instance.add_commands("dumpcache", "dump the cache of extracted files")
+cmdhelp_instance.add_commands("dumpcache", "show statistics of the cache of extracted files")
+cmdhelp_instance.add_commands(["cari", "search"], "search materials by name")
+cmdhelp_instance.add_commands("duplicates", "list the files that are filed in more than one place")
+cmdhelp_instance.add_commands("clearzipcache", "forget extracted zip archives, optionally only one file_unique_id")
@@ -21,17 +21,22 @@ from pyrogram.client import Client
 from pyrogram.filters import command
 from pyrogram.types import Message
 
-from elysian_chem_bot import db_instance
+from elysian_chem_bot import db_instance, identity_instance, metrics_instance
+from elysian_chem_bot.commands import Command
 from elysian_chem_bot.database_types import Sections
-from elysian_chem_bot.utils import sanitize_message
 
 log: logging.Logger = logging.getLogger(__name__)
+add_sections_command: Command = Command("addsections", identity_instance)
+remove_sections_command: Command = Command("removesections", identity_instance)
 
 
-@Client.on_message(command("addsections"))
+@Client.on_message(command(list(add_sections_command.names)))
+@metrics_instance.instrument()
 async def add_sections(client: Client, message: Message) -> None:
-    clean_text: str = await sanitize_message(message.text, "addsections")
-    sections: Sections = clean_text.split("/")
+    if (args := add_sections_command.parse(message.text)) is None:
+        return
+
+    sections: Sections = list(args.section_path)
 
     log.info("adding sections: %s", sections)
     msg = await message.reply_text("__Adding sections...__")
@@ -44,10 +49,13 @@ async def add_sections(client: Client, message: Message) -> None:
         await msg.edit_text(f"**Failed** to add sections! error:\n```\n{traceback.format_exc()}\n```")
 
 
-@Client.on_message(command("removesections"))
+@Client.on_message(command(list(remove_sections_command.names)))
+@metrics_instance.instrument()
 async def remove_sections(client: Client, message: Message) -> None:
-    clean_text: str = await sanitize_message(message.text, "removesections")
-    sections: Sections = clean_text.split("/")
+    if (args := remove_sections_command.parse(message.text)) is None:
+        return
+
+    sections: Sections = list(args.section_path)
 
     log.info("removing sections: %s", sections)
     msg = await message.reply_text("__Removing sections...__")
@@ -0,0 +1,85 @@
+# SPDX-License-Identifier: Apache-2.0
+#
+# Copyright 2025 Firdaus Hakimi <hakimifirdaus944@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import logging
+import math
+
+from pyrogram.client import Client
+from pyrogram.filters import command
+from pyrogram.types import Message
+
+from elysian_chem_bot import SUPER_USERS, cmdhelp_instance, db_instance, metrics_instance, outbound_instance
+from elysian_chem_bot.metrics import DEFAULT_BUCKETS, CallStats
+
+log: logging.Logger = logging.getLogger(__name__)
+# Telegram's limit for the text of a message
+MAX_MESSAGE_LENGTH: int = 4096
+# the API methods shown, the most called first, the endpoint has all of them
+MAX_API_METHODS: int = 15
+metrics_instance.add_collector("database", db_instance.stats)
+metrics_instance.add_collector(
+    "outbound",
+    lambda: {
+        "calls": outbound_instance.calls,
+        "flood_waits": outbound_instance.flood_waits,
+        "merged_edits": outbound_instance.merged_edits,
+    },
+)
+
+
+def format_seconds(seconds: float) -> str:
+    if math.isinf(seconds):
+        return f"{DEFAULT_BUCKETS[-1]:g}s+"
+
+    return f"{seconds * 1000:.0f}ms" if seconds < 1 else f"{seconds:.1f}s"
+
+
+def format_calls(name: str, stats: CallStats) -> str:
+    latency = stats.latency
+    mean = latency.sum / latency.count if latency.count else 0.0
+    return (
+        f"`{name}`: {latency.count} calls, {stats.errors} errors, {stats.in_flight} in flight, "
+        f"mean {format_seconds(mean)}, p50 ≤ {format_seconds(latency.quantile(0.5))}, "
+        f"p95 ≤ {format_seconds(latency.quantile(0.95))}"
+    )
+
+
+@Client.on_message(command("stats"))
+@metrics_instance.instrument()
+async def stats(client: Client, message: Message) -> None:
+    if message.from_user.id not in SUPER_USERS:
+        return
+
+    lines = ["**Handlers**"]
+    lines.extend(
+        format_calls(name, calls) for name, calls in sorted(metrics_instance.handlers.items()) if calls.latency.count
+    )
+    lines.append("\n**Telegram API calls**")
+    api_calls = sorted(metrics_instance.api_calls.items(), key=lambda item: -item[1].latency.count)
+    lines.extend(format_calls(name, calls) for name, calls in api_calls[:MAX_API_METHODS])
+    for name, values in metrics_instance.collect().items():
+        lines.append(f"\n**{name}**")
+        lines.append(", ".join(f"{key}: {value:g}" for key, value in values.items()))
+
+    text = "\n".join(lines)
+    if len(text) > MAX_MESSAGE_LENGTH:
+        text = text[: MAX_MESSAGE_LENGTH - 1] + "…"
+
+    await message.reply_text(text)
+
+
+cmdhelp_instance.add_commands("stats", "show handler latencies, Telegram API call timings and cache statistics")
@@ -0,0 +1,293 @@
+# SPDX-License-Identifier: Apache-2.0
+#
+# Copyright 2025 Firdaus Hakimi <hakimifirdaus944@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import heapq
+import itertools
+import re
+from collections.abc import Callable, Iterable, Iterator
+from typing import cast
+
+from elysian_chem_bot.database_types import FileNode, SectionNode, SectionPath
+
+_WORD: re.Pattern[str] = re.compile(r"[^\W_]+")
+# query words shorter than this match the start of a word, longer ones anywhere in a word
+TRIGRAM: int = 3
+# how many files matching a query only through their sections are looked at before the rest are ignored
+MAX_CANDIDATES: int = 20_000
+# how well a word of the vocabulary matches a query word
+PREFIX: int = 2
+INFIX: int = 1
+
+
+def words_of(text: str) -> tuple[str, ...]:
+    """The distinct words of a name or a query: runs of letters and digits, casefolded."""
+    return tuple(dict.fromkeys(_WORD.findall(text.casefold())))
+
+
+def _trigrams(word: str) -> set[str]:
+    # padded in front, so the first one and two characters get trigrams of their own, for prefix queries
+    padded = f"  {word}"
+    return {padded[i : i + TRIGRAM] for i in range(len(padded) - TRIGRAM + 1)}
+
+
+def _query_trigrams(word: str) -> set[str]:
+    if len(word) < TRIGRAM:
+        return _trigrams(word)
+
+    return {word[i : i + TRIGRAM] for i in range(len(word) - TRIGRAM + 1)}
+
+
+def _shortest(names: set[str], count: int) -> list[str]:
+    # the `count` shortest names, alphabetically among the same length, without a Python-level key for every name
+    if len(names) > count:
+        cutoff = len(heapq.nsmallest(count, names, key=len)[-1])
+        names = {name for name in names if len(name) <= cutoff}
+
+    return sorted(names, key=lambda name: (len(name), name))[:count]
+
+
+class _Name:
+    __slots__ = ("files", "sections", "words")
+
+    def __init__(self, words: tuple[str, ...]) -> None:
+        self.words: tuple[str, ...] = words
+        # paths of the sections having a file or a section with this name
+        self.files: list[SectionPath] = []
+        self.sections: list[SectionPath] = []
+
+
+class SearchIndex:
+    """Trigram index over the names of every section and file in the database tree.
+
+    Catalogs repeat the same words and names over and over (`Bab 1`,
+    `Kertas 2 SPM 2019.pdf`), so the index goes from trigrams to distinct
+    words, from words to distinct names, and from names to the sections
+    they are in. Its size grows with the vocabulary rather than with the
+    catalog. Kept up to date by Database, one name at a time.
+    """
+
+    def __init__(self) -> None:  # noqa: D107
+        self._names: dict[str, _Name] = {}
+        # the names at least one file has
+        self._file_names: set[str] = set()
+        self._word_names: dict[str, set[str]] = {}
+        self._trigram_words: dict[str, set[str]] = {}
+
+    def __len__(self) -> int:  # noqa: D105
+        return sum(len(name.files) + len(name.sections) for name in self._names.values())
+
+    @property
+    def name_count(self) -> int:
+        """How many distinct names the sections and files have."""
+        return len(self._names)
+
+    @classmethod
+    def from_tree(cls, root: SectionNode) -> "SearchIndex":
+        """Indexes every name in a tree. The tree never changes, so this can run in a worker thread."""
+        index = cls()
+        pending: list[tuple[SectionPath, SectionNode]] = [((), root)]
+        while pending:
+            path, section = pending.pop()
+            for name, child in section.children.items():
+                is_file = isinstance(child, FileNode)
+                # siblings share the tuple of their parent's path
+                index.add(path, name, is_file=is_file)
+                if not is_file:
+                    pending.append(((*path, name), cast(SectionNode, child)))
+
+        return index
+
+    def add(self, parent: SectionPath, name: str, *, is_file: bool) -> None:
+        """Indexes the file or section called `name` in the section at `parent`."""
+        entry = self._names.get(name)
+        if entry is None:
+            entry = self._names[name] = _Name(words_of(name))
+            for word in entry.words:
+                names = self._word_names.get(word)
+                if names is None:
+                    names = self._word_names[word] = set()
+                    for trigram in _trigrams(word):
+                        self._trigram_words.setdefault(trigram, set()).add(word)
+
+                names.add(name)
+
+        if is_file:
+            entry.files.append(parent)
+            self._file_names.add(name)
+        else:
+            entry.sections.append(parent)
+
+    def remove(self, parent: SectionPath, name: str, *, is_file: bool) -> None:
+        """Reverses add."""
+        entry = self._names[name]
+        if is_file:
+            entry.files.remove(parent)
+            if not entry.files:
+                self._file_names.discard(name)
+        else:
+            entry.sections.remove(parent)
+
+        if entry.files or entry.sections:
+            return
+
+        del self._names[name]
+        for word in entry.words:
+            names = self._word_names[word]
+            names.discard(name)
+            if names:
+                continue
+
+            del self._word_names[word]
+            for trigram in _trigrams(word):
+                words = self._trigram_words[trigram]
+                words.discard(word)
+                if not words:
+                    del self._trigram_words[trigram]
+
+    def _matching_words(self, query_word: str) -> dict[str, int]:
+        # words of the vocabulary the query word is the start of or inside of
+        postings = sorted((self._trigram_words.get(trigram, set()) for trigram in _query_trigrams(query_word)), key=len)
+        words: dict[str, int] = {}
+        for word in set(postings[0]).intersection(*postings[1:]):
+            if word.startswith(query_word):
+                words[word] = PREFIX
+            elif query_word in word:
+                words[word] = INFIX
+
+        return words
+
+    def _names_with(self, words: dict[str, int], strength: int) -> set[str]:
+        names = [self._word_names[word] for word, word_strength in words.items() if word_strength == strength]
+        if len(names) == 1:
+            return names[0]
+
+        return set().union(*names)
+
+    def _partial_candidates(
+        self, names: set[str], files_under: Callable[[SectionPath], Iterable[tuple[SectionPath, str]]]
+    ) -> Iterator[tuple[SectionPath, str]]:
+        # the files below the sections with one of the names, then the files with one of them
+        for name in sorted(name for name in names if self._names[name].sections):
+            for parent in sorted(self._names[name].sections):
+                yield from files_under((*parent, name))
+
+        for name in sorted(name for name in names if self._names[name].files):
+            for parent in sorted(self._names[name].files):
+                yield parent, name
+
+    def _matched_names(self, query: str) -> list[tuple[set[str], set[str]]]:
+        # for every query word, the names it's at the start of a word of, and the ones it's only inside a word of
+        matches = [self._matching_words(word) for word in words_of(query)]
+        if not matches or not all(matches):
+            return []
+
+        return [(self._names_with(words, PREFIX), self._names_with(words, INFIX)) for words in matches]
+
+    def _complete_ranked(
+        self, matched: list[tuple[set[str], set[str]]], limit: int
+    ) -> tuple[set[str], list[SectionPath]]:
+        # the names of files having every query word, and the best of those files
+        # every set operation below runs in C, so a query costs about the same however many names match it
+        complete: set[str] = set()
+        for i, (prefix, infix) in enumerate(sorted(matched, key=lambda sets: len(sets[0]) + len(sets[1]))):
+            complete = prefix | infix if i == 0 else complete & (prefix | infix)
+
+        complete &= self._file_names
+        # the names having every query word, by how many of them are at the start of one of their words
+        by_score = [complete]
+        for prefix, _ in matched:
+            raised = [names & prefix for names in by_score]
+            by_score = [names - prefix for names in by_score] + [set()]
+            for score, names in enumerate(raised, 1):
+                by_score[score] |= names
+
+        results: list[SectionPath] = []
+        for names in reversed(by_score):
+            for name in _shortest(names, limit - len(results)):
+                parents = heapq.nsmallest(limit - len(results), self._names[name].files)
+                results.extend((*parent, name) for parent in parents)
+                if len(results) >= limit:
+                    return complete, results
+
+        return complete, results
+
+    def _partial_matches(
+        self,
+        matched: list[tuple[set[str], set[str]]],
+        complete: set[str],
+        limit: int,
+        files_under: Callable[[SectionPath], Iterable[tuple[SectionPath, str]]],
+    ) -> list[SectionPath]:
+        # the files needing the names of their sections for some query words
+        results: list[SectionPath] = []
+        # which query words the sections of a path have, files share it with their siblings
+        section_matches: dict[SectionPath, list[bool]] = {}
+        seen: set[tuple[SectionPath, str]] = set()
+        rarest = min(matched, key=lambda sets: len(sets[0]) + len(sets[1]))
+        candidates = self._partial_candidates(rarest[0] | rarest[1], files_under)
+        for parent, name in itertools.islice(candidates, MAX_CANDIDATES):
+            if name in complete or (parent, name) in seen:
+                continue
+
+            seen.add((parent, name))
+            in_sections = section_matches.get(parent)
+            if in_sections is None:
+                in_sections = section_matches[parent] = [
+                    any(section in prefix or section in infix for section in parent) for prefix, infix in matched
+                ]
+
+            if all(
+                in_section or name in prefix or name in infix
+                for (prefix, infix), in_section in zip(matched, in_sections, strict=True)
+            ):
+                results.append((*parent, name))
+                if len(results) >= limit:
+                    break
+
+        return results
+
+    def search(
+        self, query: str, limit: int, files_under: Callable[[SectionPath], Iterable[tuple[SectionPath, str]]]
+    ) -> list[SectionPath]:
+        """Finds the files whose path has every word of `query`, best first.
+
+        A query word matches a word of a name it is the start of or, if it's
+        at least three characters long, it's inside of. Files whose own name
+        has every query word come first: more matches at the start of a word
+        first, then shorter names. After them come the files that need the
+        names of their sections for some of the words, in the order of those
+        sections, so a query like `kimia` lists a subject without walking all
+        of it.
+
+        Args:
+            query (str): What the user typed.
+            limit (int): How many files to return at most.
+            files_under (Callable[[SectionPath], Iterable[tuple[SectionPath, str]]]): Gives the files anywhere
+                below a section, as the path of their section and their name, for queries matching sections.
+
+        Returns:
+            list[SectionPath]: Full paths of the files: their sections, then their name.
+
+        """
+        matched = self._matched_names(query)
+        if not matched:
+            return []
+
+        complete, results = self._complete_ranked(matched, limit)
+        if len(results) < limit:
+            results.extend(self._partial_matches(matched, complete, limit - len(results), files_under))
+
+        return results
@@ -0,0 +1,267 @@
+# SPDX-License-Identifier: Apache-2.0
+#
+# Copyright 2025 Firdaus Hakimi <hakimifirdaus944@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import contextlib
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+from collections.abc import Iterator
+from pathlib import Path
+
+from elysian_chem_bot.database_types import File, FileNode, JournalRecord, SectionNode, Sections
+from elysian_chem_bot.persist import commit_file
+from elysian_chem_bot.storage import StorageBackend
+
+log: logging.Logger = logging.getLogger(__name__)
+
+# the root section, parent of every top level node
+ROOT_ID: int = 0
+
+SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS nodes (
+    id INTEGER PRIMARY KEY,
+    parent_id INTEGER REFERENCES nodes (id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    -- both NULL for sections
+    file_id TEXT,
+    file_unique_id TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS nodes_parent_name ON nodes (parent_id, name);
+INSERT OR IGNORE INTO nodes (id, parent_id, name) VALUES (0, NULL, '');
+"""
+
+
+def _tree_rows(root: SectionNode) -> Iterator[tuple[int, int, str, str | None, str | None]]:
+    # pre-order, so parents get lower ids than their children and siblings keep their order
+    next_id = ROOT_ID + 1
+    pending: list[tuple[int, SectionNode]] = [(ROOT_ID, root)]
+    while pending:
+        parent_id, section = pending.pop()
+        subsections: list[tuple[int, SectionNode]] = []
+        for name, child in section.children.items():
+            if isinstance(child, SectionNode):
+                yield next_id, parent_id, name, None, None
+                subsections.append((next_id, child))
+            else:
+                yield next_id, parent_id, name, child.file_id, child.file_unique_id
+
+            next_id += 1
+
+        pending.extend(reversed(subsections))
+
+
+class SqliteBackend(StorageBackend):
+    """Stores the tree in an SQLite database, one row per section or file, in WAL mode.
+
+    Rows point at their parent, and (parent, name) is indexed, so every
+    mutation only touches the rows it is about instead of rewriting the
+    whole database. Sections are listed in row id order, which is the
+    order their children were added in.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Initialize SqliteBackend, creating the database if it doesn't exist.
+
+        Args:
+            path (str): The SQLite database file.
+
+        """
+        self.path: str = path
+        self._conn: sqlite3.Connection = self._connect()
+        self._in_batch: bool = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode = WAL")
+        # in WAL mode a crash can only lose the last commits, never corrupt the database
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA foreign_keys = ON")
+        with conn:
+            conn.executescript(SCHEMA)
+
+        return conn
+
+    def load(self) -> SectionNode:  # noqa: D102
+        root = SectionNode()
+        sections: dict[int, SectionNode] = {ROOT_ID: root}
+        rows = self._conn.execute(
+            "SELECT id, parent_id, name, file_id, file_unique_id FROM nodes WHERE id != ? ORDER BY id", (ROOT_ID,)
+        )
+        for node_id, parent_id, name, file_id, file_unique_id in rows:
+            parent = sections.get(parent_id)
+            if parent is None:
+                log.warning("skipping '%s', its parent %d is missing", name, parent_id)
+                continue
+
+            if file_id is None:
+                parent.children[sys.intern(name)] = sections[node_id] = SectionNode()
+            else:
+                parent.children[sys.intern(name)] = FileNode(file_id, file_unique_id)
+
+        return root
+
+    def flush(self) -> None:
+        """Copies the write-ahead log into the database file."""
+        self._conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    def close(self) -> None:  # noqa: D102
+        self.flush()
+        self._conn.close()
+
+    @contextlib.contextmanager
+    def _transaction(self) -> Iterator[None]:
+        # a mutation is a transaction of its own, unless it's part of a batch
+        if self._in_batch:
+            yield
+            return
+
+        with self._conn:
+            yield
+
+    def apply_batch(self, records: list[JournalRecord]) -> None:
+        """Applies all the records in one transaction."""
+        with self._conn:
+            self._in_batch = True
+            try:
+                super().apply_batch(records)
+            finally:
+                self._in_batch = False
+
+    def _child(self, parent_id: int, name: str) -> tuple[int, str | None] | None:
+        return self._conn.execute(
+            "SELECT id, file_id FROM nodes WHERE parent_id = ? AND name = ?", (parent_id, name)
+        ).fetchone()
+
+    def _section_id(self, sections: Sections) -> int | None:
+        section_id = ROOT_ID
+        for sec in sections:
+            child = self._child(section_id, sec)
+            if child is None or child[1] is not None:
+                return None
+
+            section_id = child[0]
+
+        return section_id
+
+    def _section_id_or_raise(self, sections: Sections) -> int:
+        section_id = self._section_id(sections)
+        if section_id is None:
+            msg = "sections does not exist!"
+            raise ValueError(msg)
+
+        return section_id
+
+    def add_section(self, sections: Sections) -> None:  # noqa: D102
+        with self._transaction():
+            section_id = ROOT_ID
+            for sec in sections:
+                child = self._child(section_id, sec)
+                if child is None:
+                    cursor = self._conn.execute("INSERT INTO nodes (parent_id, name) VALUES (?, ?)", (section_id, sec))
+                    section_id = int(cursor.lastrowid or 0)
+                elif child[1] is not None:
+                    msg = f"'{sec}' is a file, not a section!"
+                    raise ValueError(msg)
+                else:
+                    section_id = child[0]
+
+    def remove_section(self, sections: Sections) -> None:  # noqa: D102
+        parent_id = self._section_id(sections[:-1])
+        if parent_id is None:
+            return
+
+        with self._transaction():
+            cursor = self._conn.execute("DELETE FROM nodes WHERE parent_id = ? AND name = ?", (parent_id, sections[-1]))
+            if cursor.rowcount == 0:
+                raise KeyError(sections[-1])
+
+    def add_file(self, sections: Sections, file_name: str, file_id: str, file_unique_id: str) -> None:  # noqa: D102
+        with self._transaction():
+            section_id = self._section_id_or_raise(sections)
+            child = self._child(section_id, file_name)
+            if child is None:
+                self._conn.execute(
+                    "INSERT INTO nodes (parent_id, name, file_id, file_unique_id) VALUES (?, ?, ?, ?)",
+                    (section_id, file_name, file_id, file_unique_id),
+                )
+                return
+
+            if child[1] is None:
+                # a section being replaced by a file, which has no children
+                self._conn.execute("DELETE FROM nodes WHERE parent_id = ?", (child[0],))
+
+            # updated in place, so it keeps its position in the section
+            self._conn.execute(
+                "UPDATE nodes SET file_id = ?, file_unique_id = ? WHERE id = ?", (file_id, file_unique_id, child[0])
+            )
+
+    def remove_file(self, sections: Sections, file_name: str) -> None:  # noqa: D102
+        with self._transaction():
+            section_id = self._section_id_or_raise(sections)
+            cursor = self._conn.execute("DELETE FROM nodes WHERE parent_id = ? AND name = ?", (section_id, file_name))
+            if cursor.rowcount == 0:
+                raise KeyError(file_name)
+
+    def get_file(self, sections: Sections, file_name: str) -> File:  # noqa: D102
+        row = self._conn.execute(
+            "SELECT file_id, file_unique_id FROM nodes WHERE parent_id = ? AND name = ? AND file_id IS NOT NULL",
+            (self._section_id_or_raise(sections), file_name),
+        ).fetchone()
+        if row is None:
+            msg = "file does not exist!"
+            raise ValueError(msg)
+
+        return File(*row)
+
+    def list_files(self, sections: Sections) -> list[str]:  # noqa: D102
+        rows = self._conn.execute(
+            "SELECT name FROM nodes WHERE parent_id = ? ORDER BY id", (self._section_id_or_raise(sections),)
+        )
+        return [name for (name,) in rows]
+
+    def prepare_replace(self, root: SectionNode) -> str:  # noqa: D102
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{Path(self.path).name}.", suffix=".tmp", dir=Path(self.path).parent)
+        os.close(fd)
+        try:
+            conn = sqlite3.connect(tmp_path)
+            try:
+                with conn:
+                    conn.executescript(SCHEMA)
+                    conn.executemany(
+                        "INSERT INTO nodes (id, parent_id, name, file_id, file_unique_id) VALUES (?, ?, ?, ?, ?)",
+                        _tree_rows(root),
+                    )
+            finally:
+                conn.close()
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+        return tmp_path
+
+    def commit_replace(self, prepared_path: str) -> None:  # noqa: D102
+        # closing the last connection checkpoints and removes the write-ahead log, so nothing of the old database
+        # is left to be applied to the new one
+        self._conn.close()
+        commit_file(prepared_path, self.path)
+        self._conn = self._connect()
+
+    def import_tree(self, root: SectionNode) -> None:
+        """Replaces everything with `root`, e.g. when migrating from another backend. Blocks."""
+        self.commit_replace(self.prepare_replace(root))
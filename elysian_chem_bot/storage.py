@@ -0,0 +1,470 @@
+# SPDX-License-Identifier: Apache-2.0
+#
+# Copyright 2025 Firdaus Hakimi <hakimifirdaus944@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import contextlib
+import json
+import logging
+import sys
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from pathlib import Path
+from typing import IO, cast
+
+from elysian_chem_bot.database_types import (
+    File,
+    FileNode,
+    JournalRecord,
+    SectionNode,
+    Sections,
+    decode_section,
+    encode_node,
+)
+from elysian_chem_bot.persist import DebouncedSaver, commit_file, write_json_temp
+
+log: logging.Logger = logging.getLogger(__name__)
+
+JOURNAL_SUFFIX: str = ".journal"
+SEALED_JOURNAL_SUFFIX: str = ".journal.sealed"
+
+
+class StorageBackend(ABC):
+    """Where Database persists its tree.
+
+    Database keeps the whole tree in memory and validates every mutation
+    against it before writing it through to the backend, so backends may
+    assume mutations are valid. The queries are there for checking a
+    backend against the tree, and for tools that don't load a Database.
+    """
+
+    @abstractmethod
+    def load(self) -> SectionNode:
+        """Reads the whole tree. Called once, before anything else."""
+
+    @abstractmethod
+    def add_section(self, sections: Sections) -> None:
+        """Adds a section, and any missing sections on the way to it."""
+
+    @abstractmethod
+    def remove_section(self, sections: Sections) -> None:
+        """Removes the last section in `sections`, with everything in it."""
+
+    @abstractmethod
+    def add_file(self, sections: Sections, file_name: str, file_id: str, file_unique_id: str) -> None:
+        """Adds a file to a section, replacing whatever had the same name."""
+
+    @abstractmethod
+    def remove_file(self, sections: Sections, file_name: str) -> None:
+        """Removes a file from a section."""
+
+    def apply_batch(self, records: list[JournalRecord]) -> None:
+        """Applies the mutations of a Database.batch, in the journal layout (see apply_journal_record), in order.
+
+        Backends that can persist them in one write should, this applies them one by one.
+
+        Raises:
+            ValueError: If a record has an unknown op.
+
+        """
+        for op, sections, *args in records:
+            match op:
+                case "s":
+                    self.add_section(sections)
+                case "S":
+                    self.remove_section(sections)
+                case "f":
+                    self.add_file(sections, *args)
+                case "F":
+                    self.remove_file(sections, *args)
+                case _:
+                    msg = f"unknown journal op: {op!r}"
+                    raise ValueError(msg)
+
+    @abstractmethod
+    def get_file(self, sections: Sections, file_name: str) -> File:
+        """Gets a file.
+
+        Raises:
+            ValueError: If the section or the file does not exist.
+
+        """
+
+    @abstractmethod
+    def list_files(self, sections: Sections) -> list[str]:
+        """Names of everything in a section, in the order they were added.
+
+        Raises:
+            ValueError: If the section does not exist.
+
+        """
+
+    @abstractmethod
+    def prepare_replace(self, root: SectionNode) -> str:
+        """Writes `root` next to the stored database, to be swapped in with `commit_replace`. Blocks.
+
+        Returns:
+            str: Path to the written file.
+
+        """
+
+    @abstractmethod
+    def commit_replace(self, prepared_path: str) -> None:
+        """Swaps in what `prepare_replace` wrote, discarding the stored database. Quick."""
+
+    @property
+    def dirty(self) -> bool:
+        """Whether there are mutations that are not in their final place on disk yet."""
+        return False
+
+    def flush(self) -> None:  # noqa: B027
+        """Moves everything to its final place on disk. Blocks."""
+
+    def attach(self, current_tree: Callable[[], SectionNode]) -> None:  # noqa: B027
+        """Called by the Database writing through to the backend, with a way to get its tree.
+
+        The tree is copy-on-write, what `current_tree` returns never changes afterwards and may be read in any
+        thread. Called on the event loop, after every mutation has been applied to the tree it returns.
+        """
+
+    def close(self) -> None:
+        """Flushes, and releases whatever the backend holds open."""
+        self.flush()
+
+
+def _walk(root: SectionNode, sections: Sections) -> SectionNode | None:
+    cur_section = root
+    for sec in sections:
+        child = cur_section.children.get(sec)
+        if not isinstance(child, SectionNode):
+            return None
+
+        cur_section = child
+
+    return cur_section
+
+
+def read_tree(f: IO[str]) -> SectionNode:
+    """Parses a database in the JSON layout into a tree.
+
+    Raises:
+        ValueError: If `f` is not valid JSON.
+        TypeError: If the JSON is not laid out like a database.
+
+    """
+    root = json.load(f, object_hook=decode_section)
+    if not isinstance(root, SectionNode):
+        msg = f"something is wrong with database, the type is: {type(root)}"
+        raise TypeError(msg)
+
+    return root
+
+
+def apply_journal_record(root: SectionNode, record: JournalRecord) -> None:
+    """Applies a single journal record to a database tree.
+
+    Args:
+        root (SectionNode): The root of the tree to mutate.
+        record (JournalRecord): The record, as written by JsonBackend.
+
+    Raises:
+        ValueError: If the record is malformed or refers to a section that does not exist.
+        KeyError: If the record removes something that does not exist.
+
+    """
+    op, sections, *args = record
+    match op:
+        case "s":
+            cur_section = root
+            for sec in sections:
+                child = cur_section.children.get(sec)
+                if child is None:
+                    child = cur_section.children[sys.intern(sec)] = SectionNode()
+                elif not isinstance(child, SectionNode):
+                    msg = f"'{sec}' is a file, not a section!"
+                    raise ValueError(msg)
+
+                cur_section = child
+        case "S":
+            parent = _walk(root, sections[:-1])
+            if parent is not None:
+                parent.children.pop(sections[-1])
+        case "f" | "F":
+            section = _walk(root, sections)
+            if section is None:
+                msg = "sections does not exist!"
+                raise ValueError(msg)
+
+            if op == "f":
+                file_name, file_id, file_unique_id = args
+                section.children[sys.intern(file_name)] = FileNode(file_id, file_unique_id)
+            else:
+                section.children.pop(args[0])
+        case _:
+            msg = f"unknown journal op: {op!r}"
+            raise ValueError(msg)
+
+
+def replay_journal(root: SectionNode, journal_path: str) -> int:
+    """Applies every record of the journal at `journal_path` to `root`, returns how many lines it had."""
+    path = Path(journal_path)
+    if not path.exists():
+        return 0
+
+    records = 0
+    with path.open(encoding="utf-8") as f:
+        for line in f:
+            records += 1
+            if not line.endswith("\n"):
+                # torn write from a crash, the mutation never returned to its caller
+                log.warning("ignoring incomplete journal record in %s", journal_path)
+                break
+
+            try:
+                apply_journal_record(root, json.loads(line))
+            except (ValueError, KeyError, AttributeError):
+                log.warning("skipping journal record that cannot be applied: %s", line.rstrip())
+
+    return records
+
+
+def read_json_database(db_path: str) -> tuple[SectionNode, int]:
+    """Reads the JSON snapshot at `db_path` and replays its journals on top, without changing any file.
+
+    Returns:
+        tuple[SectionNode, int]: The tree, and how many journal records were replayed.
+
+    """
+    with Path(db_path).open(encoding="utf-8") as f:
+        root = read_tree(f)
+
+    records = replay_journal(root, db_path + SEALED_JOURNAL_SUFFIX) + replay_journal(root, db_path + JOURNAL_SUFFIX)
+    return root, records
+
+
+class JsonBackend(StorageBackend):
+    """Stores the tree as a JSON snapshot, plus a journal of the mutations since.
+
+    The JSON layout has objects for sections and `[file_id, file_unique_id]`
+    arrays for files. The JSON file at `db_path` is a snapshot. Every
+    mutation is also appended as one line to `db_path + ".journal"`, which
+    gets replayed on top of the snapshot at startup. `snapshot_delay` seconds
+    after the first unsaved mutation (or as soon as the journal grows past
+    `compact_threshold` records), the journal is sealed and folded back into
+    the snapshot by a worker thread, so a mutation only costs one appended
+    line and handlers never wait on the snapshot being written.
+    """
+
+    def __init__(  # noqa: D107
+        self, db_path: str, compact_threshold: int = 1000, snapshot_delay: float = 30.0
+    ) -> None:
+        self.db_path: str = db_path
+        self.journal_path: str = db_path + JOURNAL_SUFFIX
+        self.sealed_journal_path: str = db_path + SEALED_JOURNAL_SUFFIX
+        self.compact_threshold: int = compact_threshold
+        self._journal: IO[str] | None = None
+        self._journal_records: int = 0
+        self._journal_lock: threading.Lock = threading.Lock()
+        self._saver: DebouncedSaver = DebouncedSaver(self.compact, snapshot_delay, "db-snapshot")
+        # bumped whenever the whole tree is replaced, so a compaction that started before can tell
+        self._generation: int = 0
+        self._current_tree: Callable[[], SectionNode] | None = None
+        # the tree as of the last journal record, taken under the journal lock so the two always match
+        self._journaled_tree: SectionNode | None = None
+
+    def read_snapshot(self) -> SectionNode:
+        """Reads the snapshot at `db_path`, without the journal. Blocks."""
+        with Path(self.db_path).open(encoding="utf-8") as f:
+            return read_tree(f)
+
+    def write_snapshot_temp(self, root: SectionNode) -> str:
+        """Writes `root` next to the snapshot, to be moved over it with persist.commit_file. Blocks."""
+        return write_json_temp(self.db_path, root, default=encode_node)
+
+    def read_database(self) -> SectionNode:
+        """Reads the snapshot and replays the journals on top, without changing any file. Blocks."""
+        root = self.read_snapshot()
+        replay_journal(root, self.sealed_journal_path)
+        replay_journal(root, self.journal_path)
+        return root
+
+    def load(self) -> SectionNode:  # noqa: D102
+        root = self.read_snapshot()
+        records = replay_journal(root, self.sealed_journal_path) + replay_journal(root, self.journal_path)
+        if self._journal is not None:
+            self._journal.close()
+
+        self._journal = Path(self.journal_path).open("a", encoding="utf-8")  # noqa: SIM115
+        if records > 0:
+            log.info("replayed %d journal records, folding them into the snapshot", records)
+            self.write_db(root)
+
+        return root
+
+    @property
+    def dirty(self) -> bool:
+        """Whether there are mutations that are only in the journal, not in the snapshot."""
+        return self._saver.dirty
+
+    def flush(self) -> None:  # noqa: D102
+        self._saver.flush()
+
+    def attach(self, current_tree: Callable[[], SectionNode]) -> None:  # noqa: D102
+        self._current_tree = current_tree
+
+    def write_db(self, root: SectionNode) -> None:
+        """Writes `root` as a new snapshot and empties the journal. Blocks."""
+        tmp_path = self.write_snapshot_temp(root)
+        with self._journal_lock:
+            commit_file(tmp_path, self.db_path)
+            if self._journal is not None:
+                self._journal.truncate(0)
+
+            self._journal_records = 0
+            with contextlib.suppress(FileNotFoundError):
+                Path(self.sealed_journal_path).unlink()
+
+    def compact(self) -> None:
+        """Seals the journal and folds it into the snapshot.
+
+        With a Database attached, the tree it had when the last sealed record was
+        written is the new snapshot, it never changes, so it can be written
+        without stopping the event loop. Otherwise the snapshot on disk is read
+        and the sealed journal replayed on top. Blocks, this normally runs in
+        the worker thread of the debounced saver.
+        """
+        tree = None
+        with self._journal_lock:
+            generation = self._generation
+            # a sealed journal left behind by a failed compaction must be folded before sealing another one
+            if not Path(self.sealed_journal_path).exists():
+                if self._journal is None or self._journal_records == 0:
+                    return
+
+                self._journal.close()
+                Path(self.journal_path).replace(self.sealed_journal_path)
+                self._journal = Path(self.journal_path).open("a", encoding="utf-8")  # noqa: SIM115
+                self._journal_records = 0
+                tree = self._journaled_tree
+
+        if tree is not None:
+            self._commit_compaction(self.write_snapshot_temp(tree), generation)
+            return
+
+        snapshot = self.read_snapshot()
+        try:
+            with Path(self.sealed_journal_path).open(encoding="utf-8") as f:
+                for line in f:
+                    with contextlib.suppress(ValueError, KeyError, AttributeError):
+                        apply_journal_record(snapshot, json.loads(line))
+        except FileNotFoundError:
+            if generation != self._generation:
+                log.info("database was replaced during compaction, discarding it")
+                return
+
+            raise
+
+        self._commit_compaction(self.write_snapshot_temp(snapshot), generation)
+
+    def _commit_compaction(self, tmp_path: str, generation: int) -> None:
+        with self._journal_lock:
+            if generation != self._generation:
+                # commit_replace wrote a whole new snapshot meanwhile, this one is outdated
+                Path(tmp_path).unlink()
+                log.info("database was replaced during compaction, discarding it")
+                return
+
+            commit_file(tmp_path, self.db_path)
+            Path(self.sealed_journal_path).unlink()
+
+        log.info("journal compacted into %s", self.db_path)
+
+    def prepare_replace(self, root: SectionNode) -> str:  # noqa: D102
+        return self.write_snapshot_temp(root)
+
+    def commit_replace(self, prepared_path: str) -> None:  # noqa: D102
+        with self._journal_lock:
+            self._generation += 1
+            self._journaled_tree = None
+            commit_file(prepared_path, self.db_path)
+            if self._journal is not None:
+                self._journal.truncate(0)
+
+            self._journal_records = 0
+            with contextlib.suppress(FileNotFoundError):
+                Path(self.sealed_journal_path).unlink()
+
+    def add_section(self, sections: Sections) -> None:  # noqa: D102
+        self._append_journal(["s", sections])
+
+    def remove_section(self, sections: Sections) -> None:  # noqa: D102
+        self._append_journal(["S", sections])
+
+    def add_file(self, sections: Sections, file_name: str, file_id: str, file_unique_id: str) -> None:  # noqa: D102
+        self._append_journal(["f", sections, file_name, file_id, file_unique_id])
+
+    def remove_file(self, sections: Sections, file_name: str) -> None:  # noqa: D102
+        self._append_journal(["F", sections, file_name])
+
+    def apply_batch(self, records: list[JournalRecord]) -> None:
+        """Appends all the records to the journal in one write."""
+        self._append_journal(*records)
+
+    def get_file(self, sections: Sections, file_name: str) -> File:
+        """Gets a file. Reads the snapshot and the journal, the JSON layout cannot be queried in place."""
+        section = _walk(self._read(), sections)
+        if section is None:
+            msg = "sections does not exist!"
+            raise ValueError(msg)
+
+        file = section.children.get(file_name)
+        match file:
+            case FileNode():
+                return file.to_file()
+            case _:
+                msg = "file does not exist!"
+                raise ValueError(msg)
+
+    def list_files(self, sections: Sections) -> list[str]:
+        """Lists a section. Reads the snapshot and the journal, the JSON layout cannot be queried in place."""
+        section = _walk(self._read(), sections)
+        if section is None:
+            msg = "sections does not exist!"
+            raise ValueError(msg)
+
+        return list(section.children)
+
+    def _read(self) -> SectionNode:
+        # under the lock, a compaction can't be halfway between writing the snapshot and removing the sealed journal
+        with self._journal_lock:
+            return self.read_database()
+
+    def _append_journal(self, *records: JournalRecord) -> None:
+        lines = "".join(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n" for record in records)
+        with self._journal_lock:
+            journal = cast(IO[str], self._journal)
+            journal.write(lines)
+            journal.flush()
+            self._journal_records += len(records)
+            if self._current_tree is not None:
+                self._journaled_tree = self._current_tree()
+
+            should_compact = self._journal_records >= self.compact_threshold
+
+        if should_compact:
+            self._saver.save_soon()
+        else:
+            self._saver.mark_dirty()
@@ -0,0 +1,88 @@
+# SPDX-License-Identifier: Apache-2.0
+#
+# Copyright 2025 Firdaus Hakimi <hakimifirdaus944@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import asyncio
+import logging
+import time
+from collections.abc import Callable
+
+from anyio import to_thread
+
+from elysian_chem_bot.database import Database
+from elysian_chem_bot.database_types import SectionNode
+from elysian_chem_bot.file_locations import FileLocations
+from elysian_chem_bot.search import SearchIndex
+
+log: logging.Logger = logging.getLogger(__name__)
+
+
+def _log_failure(task: asyncio.Task[None]) -> None:
+    if not task.cancelled() and (e := task.exception()) is not None:
+        log.error("building the %s failed", task.get_name(), exc_info=e)
+
+
+class TreeIndexer:
+    """Builds the indexes a Database derives from its whole tree in worker threads, so the event loop never walks it.
+
+    The tree is copy-on-write, so a worker thread can walk the root it was
+    given while the handlers go on changing the database. If it changed
+    meanwhile, the index is built again from the new root. There is at most
+    one build of every index at a time, however many handlers ask for it.
+    """
+
+    def __init__(self, db: Database) -> None:  # noqa: D107
+        self.db: Database = db
+        self._builds: dict[str, asyncio.Task[None]] = {}
+
+    def _start[T](
+        self, name: str, build: Callable[[SectionNode], T], adopt: Callable[[T, SectionNode], bool]
+    ) -> asyncio.Task[None]:
+        task = self._builds.get(name)
+        if task is None or task.done():
+            task = self._builds[name] = asyncio.create_task(self._build(name, build, adopt), name=name)
+            task.add_done_callback(_log_failure)
+
+        return task
+
+    async def _build[T](
+        self, name: str, build: Callable[[SectionNode], T], adopt: Callable[[T, SectionNode], bool]
+    ) -> None:
+        while True:
+            root = self.db.root
+            start = time.perf_counter()
+            index = await to_thread.run_sync(build, root)
+            if adopt(index, root):
+                log.info("%s built in %.1fs", name, time.perf_counter() - start)
+                return
+
+            log.info("the database changed while building the %s, building it again", name)
+
+    async def file_locations(self) -> None:
+        """Returns once Database.file_locations can answer, building its index in a worker thread if needed."""
+        if not self.db.file_locations_built:
+            # shielded, a cancelled handler doesn't cancel the build the others wait for
+            await asyncio.shield(
+                self._start("file_unique_id index", FileLocations.from_tree, self.db.adopt_file_locations)
+            )
+
+    def search_ready(self) -> bool:
+        """Whether Database.search can answer. If not, starts building its index in a worker thread."""
+        if self.db.search_index_built:
+            return True
+
+        self._start("search index", SearchIndex.from_tree, self.db.adopt_search_index)
+        return False
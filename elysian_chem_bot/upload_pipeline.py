@@ -0,0 +1,262 @@
+# SPDX-License-Identifier: Apache-2.0
+#
+# Copyright 2025 Firdaus Hakimi <hakimifirdaus944@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import math
+import time
+import zipfile
+from dataclasses import dataclass, field
+from typing import cast
+
+import anyio
+from anyio import to_thread
+from anyio.abc import TaskGroup
+from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
+from pyrogram import raw, types
+from pyrogram.client import Client
+from pyrogram.types import Message
+
+from elysian_chem_bot.archive import ArchiveReader, ExtractedMember
+from elysian_chem_bot.caches import ContentHashCache
+from elysian_chem_bot.outbound import OutboundScheduler
+
+log: logging.Logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PipelineTimings:
+    """Seconds spent in each stage. Stages overlap, so they add up to more than `total`."""
+
+    extract: float = 0.0
+    upload: float = 0.0
+    send: float = 0.0
+    total: float = 0.0
+    members: int = 0
+    uploaded: int = 0
+
+    def __str__(self) -> str:  # noqa: D105
+        return (
+            f"{self.members} files ({self.uploaded} uploaded) in {self.total:.2f}s: extract {self.extract:.2f}s, "
+            f"upload {self.upload:.2f}s, send {self.send:.2f}s"
+        )
+
+
+@dataclass
+class _Slot:
+    """Result of one member, filled in by the producer or an uploader, consumed in order by the sender."""
+
+    name: str
+    md5sum: str
+    ready: anyio.Event = field(default_factory=anyio.Event)
+    cached_file_id: str | None = None
+    input_file: raw.base.InputFile | None = None
+    # an earlier member of the archive with the same content, sent with the file_id that one got
+    same_as: "_Slot | None" = None
+    # set once sent
+    file_id: str | None = None
+
+
+async def send_uploaded_document(
+    client: Client, reply_to: Message, input_file: raw.base.InputFile, file_name: str
+) -> Message:
+    """Sends a document that was already uploaded with Client.save_file, as a reply.
+
+    Message.reply_document can only upload and send in one go, which would
+    make the messages arrive in upload completion order.
+    """
+    media = raw.types.InputMediaUploadedDocument(
+        mime_type=client.guess_mime_type(file_name) or "application/octet-stream",
+        file=input_file,
+        attributes=[raw.types.DocumentAttributeFilename(file_name=file_name)],
+    )
+    r = await client.invoke(
+        raw.functions.messages.SendMedia(
+            peer=await client.resolve_peer(reply_to.chat.id),
+            media=media,
+            message="",
+            random_id=client.rnd_id(),
+            reply_to=raw.types.InputReplyToMessage(reply_to_msg_id=reply_to.id),
+        )
+    )
+    for update in r.updates:
+        if isinstance(update, raw.types.UpdateNewMessage | raw.types.UpdateNewChannelMessage):
+            return await types.Message._parse(  # noqa: SLF001
+                client, update.message, {u.id: u for u in r.users}, {c.id: c for c in r.chats}
+            )
+
+    msg = "Telegram did not return the sent message"
+    raise RuntimeError(msg)
+
+
+class ArchiveUploadPipeline:
+    """Extracts, uploads and sends the members of an archive, overlapping the three.
+
+    One producer extracts and hashes members in a worker thread, in archive
+    order. Members that are not in `cache` yet are uploaded by up to
+    `concurrency` uploaders at once, members with the same content only
+    once. A single sender then sends every member
+    as a reply to `message`, in archive order, and stores the file_id of
+    each new upload in `cache` as soon as it has been sent.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        message: Message,
+        cache: ContentHashCache,
+        outbound: OutboundScheduler,
+        concurrency: int = 4,
+    ) -> None:
+        """Initialize ArchiveUploadPipeline.
+
+        Args:
+            client (Client): The Pyrogram client.
+            message (Message): The extracted files are sent as replies to this message.
+            cache (ContentHashCache): md5 of a file -> file_id on Telegram.
+            outbound (OutboundScheduler): Rate limits the sending of the extracted files.
+            concurrency (int): How many uploads may run at once. Also bounds how many
+                extracted members are held in memory, waiting to be uploaded.
+
+        """
+        self.client: Client = client
+        self.message: Message = message
+        self.cache: ContentHashCache = cache
+        self.outbound: OutboundScheduler = outbound
+        self.timings: PipelineTimings = PipelineTimings()
+        # (file name, file_id) of every member that was sent, in archive order
+        self.results: list[tuple[str, str]] = []
+        # names of the members that were not sent because they are empty, Telegram refuses 0 byte files
+        self.skipped: list[str] = []
+        # md5 of the content of every member uploaded so far -> its slot, an archive can have the same file twice
+        self._uploads: dict[str, _Slot] = {}
+        # not a CapacityLimiter, tokens are released by the uploader tasks rather than the producer
+        self._limiter: anyio.Semaphore = anyio.Semaphore(concurrency)
+
+    async def run(self, reader: ArchiveReader) -> PipelineTimings:
+        """Runs the pipeline over every member of `reader`.
+
+        Raises:
+            ArchiveLimitError: If extracting a member goes over the limits of the reader.
+            zipfile.BadZipFile: If a member turns out to be corrupt while extracting it.
+
+        """
+        start = time.perf_counter()
+        self.timings.members = len(reader.members)
+        send_slots, receive_slots = anyio.create_memory_object_stream[_Slot](math.inf)
+        try:
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(self._send_in_order, receive_slots)
+                async with send_slots:
+                    for info in reader.members:
+                        await self._produce(tg, send_slots, reader, info)
+        except BaseExceptionGroup as group:
+            # the first failure cancels the other tasks, so there is usually one, raised as is for the callers
+            raise _unwrap(group) from None
+
+        self.timings.total = time.perf_counter() - start
+        log.info("archive pipeline finished: %s", self.timings)
+        return self.timings
+
+    async def _produce(
+        self, tg: TaskGroup, slots: MemoryObjectSendStream[_Slot], reader: ArchiveReader, info: zipfile.ZipInfo
+    ) -> None:
+        # hold a limiter token from extraction until the upload finishes, for backpressure
+        await self._limiter.acquire()
+        start = time.perf_counter()
+        try:
+            member = await to_thread.run_sync(reader.extract, info)
+        except BaseException:
+            self._limiter.release()
+            raise
+
+        self.timings.extract += time.perf_counter() - start
+        if member.size == 0:
+            log.info("skipping empty file '%s'", member.name)
+            member.data.close()
+            self._limiter.release()
+            self.skipped.append(member.name)
+            return
+
+        slot = _Slot(member.name, member.md5sum)
+        await slots.send(slot)
+
+        if cached_file_id := self.cache.get(member.md5sum):
+            log.info("file '%s' found in cache, re-using file_id", member.name)
+            member.data.close()
+            self._limiter.release()
+            slot.cached_file_id = cached_file_id
+            slot.ready.set()
+            return
+
+        if (same_as := self._uploads.get(member.md5sum)) is not None:
+            log.info("file '%s' has the same content as '%s', re-using its upload", member.name, same_as.name)
+            member.data.close()
+            self._limiter.release()
+            slot.same_as = same_as
+            slot.ready.set()
+            return
+
+        self._uploads[member.md5sum] = slot
+        tg.start_soon(self._upload, slot, member)
+
+    async def _upload(self, slot: _Slot, member: ExtractedMember) -> None:
+        log.info("file '%s' NOT found in cache, uploading instead", member.name)
+        start = time.perf_counter()
+        try:
+            with member.data:
+                slot.input_file = await self.client.save_file(member.data)
+        finally:
+            self._limiter.release()
+
+        self.timings.upload += time.perf_counter() - start
+        self.timings.uploaded += 1
+        slot.ready.set()
+
+    async def _send_in_order(self, slots: MemoryObjectReceiveStream[_Slot]) -> None:
+        async with slots:
+            async for slot in slots:
+                await slot.ready.wait()
+                start = time.perf_counter()
+                # sent in archive order, so the member it has the same content as was sent already
+                file_id = slot.same_as.file_id if slot.same_as is not None else slot.cached_file_id
+                if file_id is not None:
+                    await self.outbound.send(
+                        self.message.chat.id, self.message.reply_document, file_id, file_name=slot.name
+                    )
+                else:
+                    input_file = cast(raw.base.InputFile, slot.input_file)
+                    doc = await self.outbound.send(
+                        self.message.chat.id, send_uploaded_document, self.client, self.message, input_file, slot.name
+                    )
+                    file_id = doc.document.file_id
+                    log.info("storing file '%s' in cache", slot.name)
+                    self.cache.put(slot.md5sum, file_id)
+
+                slot.file_id = file_id
+                self.results.append((slot.name, file_id))
+
+                self.timings.send += time.perf_counter() - start
+
+
+def _unwrap(group: BaseExceptionGroup) -> BaseException:
+    # the only exception in a group, also in nested ones, or the group itself if there are more
+    while len(group.exceptions) == 1:
+        if not isinstance(group.exceptions[0], BaseExceptionGroup):
+            return group.exceptions[0]
+
+        group = group.exceptions[0]
+
+    return group
@@ -0,0 +1,85 @@
+# SPDX-License-Identifier: Apache-2.0
+#
+# Copyright 2025 Firdaus Hakimi <hakimifirdaus944@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Compares adding files one call at a time against one Database.batch, for an album and for a bulk import."""
+
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from scripts.bench_common import prepare_environment
+from scripts.bench_memory import synthetic_catalog
+
+TMP_DIR = prepare_environment()
+
+from elysian_chem_bot.database import Database  # noqa: E402
+from elysian_chem_bot.sqlite_storage import SqliteBackend  # noqa: E402
+from elysian_chem_bot.storage import JsonBackend, StorageBackend  # noqa: E402
+
+
+def one_by_one(db: Database, entries: list[tuple[list[str], str]]) -> None:
+    """What /addbahan used to do, and what a manifest import would do without batches."""
+    for sections, file_name in entries:
+        if not db.is_sections_exist(sections).status:
+            db.add_section(sections)
+
+        db.add_file(sections, file_name, "BQACAgUAAxkBAAIBZ2Z", "AgADZw4AAi7wIVU")
+
+
+def batched(db: Database, entries: list[tuple[list[str], str]]) -> None:
+    with db.batch() as batch:
+        for sections, file_name in entries:
+            batch.add_section(sections)
+            batch.add_file(sections, file_name, "BQACAgUAAxkBAAIBZ2Z", "AgADZw4AAi7wIVU")
+
+
+def run(
+    name: str, open_backend: Callable[[str], StorageBackend], entries: list[tuple[list[str], str]], rounds: int
+) -> None:
+    times: dict[str, float] = {}
+    for apply in (one_by_one, batched):
+        best = float("inf")
+        for i in range(rounds):
+            path = Path(TMP_DIR, f"{name}-{apply.__name__}-{i}.json")
+            path.write_text(synthetic_catalog(files=20), encoding="utf-8")
+            db = Database(backend=open_backend(str(path)))
+            start = time.perf_counter()
+            apply(db, entries)
+            best = min(best, time.perf_counter() - start)
+            db.backend.flush()
+
+        times[apply.__name__] = best
+
+    print(
+        f"  {name:<8} one by one: {times['one_by_one'] * 1000:9.2f} ms   batch: {times['batched'] * 1000:9.2f} ms"
+        f"   ({times['one_by_one'] / times['batched']:.1f}x)"
+    )
+
+
+def open_sqlite(path: str) -> StorageBackend:
+    backend = SqliteBackend(str(Path(path).with_suffix(".sqlite3")))
+    backend.import_tree(JsonBackend(path).read_database())
+    return backend
+
+
+if __name__ == "__main__":
+    album = [(["Subjek 3", "Bab 7"], f"album {i}.pdf") for i in range(10)]
+    manifest = [([f"Import {i % 20}", f"Bab {i % 100}"], f"file {i}.pdf") for i in range(10_000)]
+    for title, entries, rounds in (("album of 10 files", album, 20), ("manifest of 10000 files", manifest, 3)):
+        print(title)
+        run("json", lambda path: JsonBackend(path, snapshot_delay=3600), entries, rounds)
+        run("sqlite", open_sqlite, entries, rounds)
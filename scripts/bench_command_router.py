@@ -0,0 +1,98 @@
+# SPDX-License-Identifier: Apache-2.0
+#
+# Copyright 2025 Firdaus Hakimi <hakimifirdaus944@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Compares the per-message cost of the old sanitize_message against a precompiled Command.
+
+The old version also awaited `app.get_me()`, a network round trip, for every
+message. Here that call returns instantly, so its numbers are a lower bound.
+"""
+
+import asyncio
+import sys
+from collections.abc import Iterable
+from types import SimpleNamespace
+
+from scripts.bench_common import best_time, prepare_environment
+
+prepare_environment()
+
+from elysian_chem_bot.commands import BotIdentity, Command  # noqa: E402
+
+MESSAGES = [
+    "/addbahan Chemistry/Form 4/Chapter 1",
+    "/addmaterial@elysian_chem_bot Chemistry/Form 5/Chapter 10 Redox",
+    "/addbahan@elysian_chem_bot    Physics/Notes   ",
+]
+
+
+class FakeApp:
+    async def get_me(self) -> SimpleNamespace:
+        """The bot, as Client.get_me returns it."""
+        return SimpleNamespace(id=1, username="elysian_chem_bot")
+
+
+app = FakeApp()
+
+
+async def sanitize_message(text: str, command: Iterable[str] | str) -> str:
+    """What utils.sanitize_message used to do."""
+    username = (await app.get_me()).username
+
+    if isinstance(command, str):
+        command = [command]
+
+    for cmd in command:
+        text = text.removeprefix(f"/{cmd}")
+
+    text = text.removeprefix(f"@{username}")
+    return text.strip()
+
+
+ROUNDS = 1000
+
+
+async def old_parse_all() -> None:
+    for _ in range(ROUNDS):
+        for text in MESSAGES:
+            (await sanitize_message(text, ["addmaterial", "addbahan"])).split("/")
+
+
+def new_parse_all(command: Command) -> None:
+    for _ in range(ROUNDS):
+        for text in MESSAGES:
+            args = command.parse(text)
+            if args is None:
+                sys.exit(f"Command.parse did not match {text!r}")
+
+            _ = args.section_path
+
+
+def main() -> None:
+    identity = BotIdentity()
+    asyncio.run(identity.refresh(app))  # type: ignore[arg-type]
+    command = Command(["addmaterial", "addbahan"], identity)
+
+    loop = asyncio.new_event_loop()
+    per_round = ROUNDS * len(MESSAGES)
+    old = best_time(lambda: loop.run_until_complete(old_parse_all()), number=10) / per_round
+    new = best_time(lambda: new_parse_all(command), number=10) / per_round
+    print(f"sanitize_message: {old * 1e6:6.2f} us/message (+ a get_me round trip)")
+    print(f"Command.parse:    {new * 1e6:6.2f} us/message")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# SPDX-License-Identifier: Apache-2.0
+#
+# Copyright 2025 Firdaus Hakimi <hakimifirdaus944@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Shared setup for the benchmark scripts.
+
+Run them from the repository root as modules, e.g. `python -m scripts.bench_path_index`.
+"""
+
+import os
+import tempfile
+import timeit
+from collections.abc import Callable
+from pathlib import Path
+
+
+def prepare_environment() -> str:
+    """Lets elysian_chem_bot be imported without real credentials or a /persist directory.
+
+    Must be called before anything from elysian_chem_bot is imported.
+
+    Returns:
+        str: A fresh temporary directory, also used for DB_PERSIST_PATH.
+
+    """
+    tmp_dir = tempfile.mkdtemp(prefix="elysian-bench-")
+    os.environ.setdefault("API_ID", "1")
+    os.environ.setdefault("API_HASH", "benchmark")
+    os.environ.setdefault("BOT_TOKEN", "benchmark")
+    os.environ.setdefault("DB_PERSIST_PATH", str(Path(tmp_dir, "db.json")))
+    return tmp_dir
+
+
+def best_time(func: Callable[[], object], number: int, repeat: int = 5) -> float:
+    """Returns the best time per call of `func`, in seconds."""
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
@@ -0,0 +1,125 @@
+# SPDX-License-Identifier: Apache-2.0
+#
+# Copyright 2025 Firdaus Hakimi <hakimifirdaus944@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Measures what a log call costs the event loop: handlers writing synchronously, against the queued setup.
+
+The old setup is rebuilt here as the baseline: a file handler and a
+coloured stream handler on the calling thread, with a new Formatter made
+for every record. Both write to files in a temporary directory, standing
+in for bot.log and stderr. Records come in bursts with pauses in between,
+like the bot awaiting Telegram, which is when the queued setup writes.
+"""
+
+import logging
+import os
+import time
+from pathlib import Path
+
+from scripts.bench_common import prepare_environment
+
+TMP_DIR = prepare_environment()
+
+from elysian_chem_bot.coloured_logging_setup import (  # noqa: E402
+    FORMAT_STR,
+    ColouredFormatter,
+    build_handlers,
+    correlated,
+    start_queued_logging,
+)
+
+RECORDS = 20_000
+# records logged in one go, then the bot awaits Telegram for a while, as when it uploads the files of an archive
+BURST = 50
+PAUSE = 0.01
+
+
+class PerRecordFormatter(ColouredFormatter):
+    """ColouredFormatter as it was: builds a logging.Formatter for every record."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Formats `record` with a formatter built for it alone."""
+        return logging.Formatter(self.FORMATS.get(record.levelno)).format(record)
+
+
+def log_records(logger: logging.Logger) -> float:
+    # only the time spent logging counts, not the pauses
+    elapsed = 0.0
+    for burst in range(RECORDS // BURST):
+        start = time.perf_counter()
+        for i in range(burst * BURST, (burst + 1) * BURST):
+            with correlated():
+                logger.info("uploading member %d of '%s' (%d bytes)", i, "Kertas 2 SPM 2019.zip", 1024 * i)
+
+        elapsed += time.perf_counter() - start
+        time.sleep(PAUSE)
+
+    return elapsed
+
+
+def synchronous(directory: Path) -> float:
+    # and records carrying everything, as before
+    logging._srcfile = os.path.normcase(logging.addLevelName.__code__.co_filename)  # noqa: SLF001
+    logging.logProcesses = logging.logMultiprocessing = logging.logAsyncioTasks = True
+    logger = logging.getLogger("bench.synchronous")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    stream = logging.StreamHandler(directory.joinpath("stderr.txt").open("w", encoding="utf-8"))
+    stream.setFormatter(PerRecordFormatter())
+    file = logging.FileHandler(directory.joinpath("bot.log"), encoding="utf-8")
+    file.setFormatter(logging.Formatter(FORMAT_STR))
+    logger.addHandler(stream)
+    logger.addHandler(file)
+    elapsed = log_records(logger)
+    for handler in (stream, file):
+        handler.close()
+
+    logging._srcfile = None  # noqa: SLF001
+    logging.logProcesses = logging.logMultiprocessing = logging.logAsyncioTasks = False
+
+    return elapsed
+
+
+def queued(directory: Path, json_path: str) -> float:
+    logger = logging.getLogger(f"bench.queued.{bool(json_path)}")
+    logger.propagate = False
+    log_path = str(directory.joinpath("bot.log"))
+    handlers = build_handlers(
+        debug=False, log_path=log_path, json_path=json_path, max_bytes=10 * 1024**2, backup_count=5
+    )
+    # the coloured stream handler is the first one
+    handlers[0].setStream(directory.joinpath("stderr.txt").open("w", encoding="utf-8"))  # type: ignore[attr-defined]
+    listener = start_queued_logging(logger, handlers, logging.INFO)
+    elapsed = log_records(logger)
+    listener.stop()
+    for handler in handlers:
+        handler.close()
+
+    return elapsed
+
+
+if __name__ == "__main__":
+    for name in ("synchronous", "queued", "queued-json"):
+        Path(TMP_DIR, name).mkdir()
+
+    before = min(synchronous(Path(TMP_DIR, "synchronous")) for _ in range(3))
+    after = min(queued(Path(TMP_DIR, "queued"), "") for _ in range(3))
+    json_path = str(Path(TMP_DIR, "queued-json", "bot.jsonl"))
+    with_json = min(queued(Path(TMP_DIR, "queued-json"), json_path) for _ in range(3))
+    print(f"{RECORDS} records in bursts of {BURST}, time spent by the caller per record:")
+    print(f"  synchronous handlers, a formatter per record: {before / RECORDS * 1e6:6.2f} µs")
+    print(f"  queued:                                       {after / RECORDS * 1e6:6.2f} µs")
+    print(f"  queued, with JSON lines too:                  {with_json / RECORDS * 1e6:6.2f} µs")
@@ -0,0 +1,81 @@
+# SPDX-License-Identifier: Apache-2.0
+#
+# Copyright 2025 Firdaus Hakimi <hakimifirdaus944@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Measures the memory taken by a synthetic 100k-file catalog.
+
+As plain JSON objects, and as the node tree before and after packing its ids.
+"""
+
+import gc
+import json
+import secrets
+import time
+import tracemalloc
+from collections.abc import Callable
+
+from scripts.bench_common import prepare_environment
+
+prepare_environment()
+
+from elysian_chem_bot.database_types import FileNode, SectionNode, decode_section  # noqa: E402
+
+
+def synthetic_catalog(subjects: int = 20, sections: int = 50, files: int = 100) -> str:
+    catalog = {
+        f"Subjek {i}": {
+            f"Bab {j}": {
+                f"Kertas {k} SPM {2000 + k % 25}.pdf": [secrets.token_urlsafe(54), secrets.token_urlsafe(12)]
+                for k in range(files)
+            }
+            for j in range(sections)
+        }
+        for i in range(subjects)
+    }
+    return json.dumps(catalog)
+
+
+def load_packed(raw: str) -> SectionNode:
+    """Loads the node tree and packs every file, as the first file_unique_id index does."""
+    root = json.loads(raw, object_hook=decode_section)
+    pending = [root]
+    while pending:
+        for child in pending.pop().children.values():
+            if isinstance(child, FileNode):
+                _ = child.packed_ids
+            else:
+                pending.append(child)
+
+    return root
+
+
+def measure(name: str, load: Callable[[], object]) -> None:
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    tree = load()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<12} {current / 1024 / 1024:8.1f} MiB   load: {elapsed:6.2f} s")
+    del tree
+
+
+if __name__ == "__main__":
+    raw = synthetic_catalog()
+    print(f"catalog: 100000 files, {len(raw) / 1024 / 1024:.1f} MiB of JSON")
+    measure("plain JSON", lambda: json.loads(raw))
+    measure("node tree", lambda: json.loads(raw, object_hook=decode_section))
+    measure("packed", lambda: load_packed(raw))
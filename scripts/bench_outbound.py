@@ -0,0 +1,153 @@
+# SPDX-License-Identifier: Apache-2.0
+#
+# Copyright 2025 Firdaus Hakimi <hakimifirdaus944@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Sends messages to a fake Telegram that raises FloodWait past its limits, with and without OutboundScheduler.
+
+Time is scaled up 20x so the whole run takes a few seconds: the fake allows
+20 messages per second per chat and 100 per second overall, and going over
+makes it refuse the chat (or everything) for the next 3 seconds.
+"""
+
+import logging
+import math
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from types import SimpleNamespace
+
+import anyio
+from pyrogram.errors import FloodWait
+
+from scripts.bench_common import prepare_environment
+
+prepare_environment()
+
+from elysian_chem_bot.outbound import OutboundScheduler  # noqa: E402
+
+CHAT_LIMIT = 20
+GLOBAL_LIMIT = 100
+FLOOD_WAIT_SECONDS = 3
+CHATS = 10
+MESSAGES_PER_CHAT = 40
+EDITS = 200
+
+
+class FakeTelegram:
+    """Counts calls in a sliding one second window, per chat and overall, and bans whatever goes past its limit."""
+
+    def __init__(self) -> None:
+        """Starts with empty windows and no bans."""
+        self.sent: int = 0
+        self.flood_waits: int = 0
+        self.edits: int = 0
+        self._global: deque[float] = deque()
+        self._chats: dict[int, deque[float]] = {}
+        # chat_id, or None for everything -> when the ban ends
+        self._banned_until: dict[int | None, float] = {}
+
+    def _check(self, chat_id: int) -> None:
+        now = time.monotonic()
+        chat = self._chats.setdefault(chat_id, deque())
+        for window in (chat, self._global):
+            while window and window[0] <= now - 1:
+                window.popleft()
+
+        banned_until = max(self._banned_until.get(chat_id, 0.0), self._banned_until.get(None, 0.0))
+        if banned_until <= now and len(chat) >= CHAT_LIMIT:
+            banned_until = self._banned_until[chat_id] = now + FLOOD_WAIT_SECONDS
+        elif banned_until <= now and len(self._global) >= GLOBAL_LIMIT:
+            banned_until = self._banned_until[None] = now + FLOOD_WAIT_SECONDS
+
+        if banned_until > now:
+            self.flood_waits += 1
+            raise FloodWait(value=math.ceil(banned_until - now))
+
+        chat.append(now)
+        self._global.append(now)
+
+    async def send_message(self, chat_id: int, _text: str) -> None:
+        """Sends a message to `chat_id`, after a millisecond of network, unless the chat or the bot is banned."""
+        await anyio.sleep(0.001)
+        self._check(chat_id)
+        self.sent += 1
+
+    def message(self, chat_id: int) -> SimpleNamespace:
+        """A sent message in `chat_id`, whose edits count against the same limits as sending."""
+
+        async def edit_text(text: str, reply_markup: object = None) -> None:
+            await anyio.sleep(0.001)
+            self._check(chat_id)
+            self.edits += 1
+
+        return SimpleNamespace(id=1, chat=SimpleNamespace(id=chat_id), edit_text=edit_text)
+
+
+async def naive_send(telegram: FakeTelegram, chat_id: int, text: str) -> None:
+    """What calling the client directly does: sleep through every FloodWait and try again."""
+    while True:
+        try:
+            return await telegram.send_message(chat_id, text)
+        except FloodWait as e:
+            await anyio.sleep(float(e.value))
+
+
+async def run(name: str, send_one: Callable[[FakeTelegram, int, str], Awaitable[None]]) -> None:
+    telegram = FakeTelegram()
+    start = time.perf_counter()
+    async with anyio.create_task_group() as tg:
+        for chat_id in range(CHATS):
+            for i in range(MESSAGES_PER_CHAT):
+                tg.start_soon(send_one, telegram, chat_id, f"message {i}")
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"{name:<10} {telegram.sent} messages in {elapsed:5.2f}s ({telegram.sent / elapsed:6.1f}/s), "
+        f"{telegram.flood_waits} FloodWaits"
+    )
+
+
+async def main() -> None:
+    await run("naive", naive_send)
+
+    # bursts plus a second's worth of tokens stay under what the fake allows in its one second window
+    scheduler = OutboundScheduler(
+        global_rate=GLOBAL_LIMIT * 0.8, global_burst=10, chat_rate=CHAT_LIMIT * 0.8, chat_burst=3
+    )
+
+    async def scheduled_send(telegram: FakeTelegram, chat_id: int, text: str) -> None:
+        await scheduler.send(chat_id, telegram.send_message, chat_id, text)
+
+    await run("scheduled", scheduled_send)
+
+    telegram = FakeTelegram()
+    status = telegram.message(0)
+    start = time.perf_counter()
+    async with anyio.create_task_group() as tg:
+        for i in range(EDITS):
+            tg.start_soon(scheduler.edit, status, f"progress {i}/{EDITS}")
+            await anyio.sleep(0.002)
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"{EDITS} status edits in {elapsed:5.2f}s went out as {telegram.edits} edits "
+        f"({scheduler.merged_edits} merged), {telegram.flood_waits} FloodWaits"
+    )
+
+
+if __name__ == "__main__":
+    logging.getLogger("elysian_chem_bot.outbound").setLevel(logging.ERROR)
+    anyio.run(main)
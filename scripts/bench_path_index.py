@@ -0,0 +1,82 @@
+# SPDX-License-Identifier: Apache-2.0
+#
+# Copyright 2025 Firdaus Hakimi <hakimifirdaus944@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Compares Database's path index against walking the JSON tree from the root, on deep and wide trees."""
+
+import json
+from pathlib import Path
+
+from scripts.bench_common import best_time, prepare_environment
+
+TMP_DIR = prepare_environment()
+
+from elysian_chem_bot.database import Database  # noqa: E402
+from elysian_chem_bot.database_types import File  # noqa: E402
+
+
+def walk_get_file(raw_db: dict, sections: list[str], file_name: str) -> File:
+    """What Database.get_file used to do: is_sections_exist, then walk the same path again."""
+    cur_section = raw_db
+    for sec in sections:
+        cur_section = cur_section.get(sec)
+        if cur_section is None or not isinstance(cur_section, dict):
+            msg = "sections does not exist!"
+            raise ValueError(msg)
+
+    cur_section = raw_db
+    for sec in sections:
+        cur_section = cur_section.get(sec)
+
+    file_id, file_unique_id = cur_section[file_name]
+    return File(file_id, file_unique_id)
+
+
+def deep_tree(depth: int) -> tuple[dict, list[str]]:
+    raw_db: dict = {}
+    cur_section = raw_db
+    sections = [f"level {i}" for i in range(depth)]
+    for sec in sections:
+        cur_section[f"{sec}.pdf"] = ["file_id", "file_unique_id"]
+        cur_section = cur_section.setdefault(sec, {})
+
+    cur_section["target.pdf"] = ["file_id", "file_unique_id"]
+    return raw_db, sections
+
+
+def wide_tree(width: int) -> tuple[dict, list[str]]:
+    raw_db: dict = {
+        f"section {i}": {f"file {j}.pdf": ["file_id", "file_unique_id"] for j in range(10)} for i in range(width)
+    }
+    raw_db[f"section {width // 2}"]["target.pdf"] = ["file_id", "file_unique_id"]
+    return raw_db, [f"section {width // 2}"]
+
+
+def run(name: str, raw_db: dict, sections: list[str]) -> None:
+    db_path = Path(TMP_DIR, f"{name}.json")
+    db_path.write_text(json.dumps(raw_db), encoding="utf-8")
+
+    db = Database(str(db_path))
+    walk = best_time(lambda: walk_get_file(raw_db, sections, "target.pdf"), number=10_000)
+    index = best_time(lambda: db.get_file(sections, "target.pdf"), number=10_000)
+    print(f"{name:<16} walk: {walk * 1e6:8.2f} us   index: {index * 1e6:8.2f} us   speedup: {walk / index:6.1f}x")
+
+
+if __name__ == "__main__":
+    for depth in (4, 32, 256):
+        run(f"deep ({depth})", *deep_tree(depth))
+
+    for width in (100, 10_000, 100_000):
+        run(f"wide ({width})", *wide_tree(width))
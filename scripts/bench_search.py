@@ -0,0 +1,121 @@
+# SPDX-License-Identifier: Apache-2.0
+#
+# Copyright 2025 Firdaus Hakimi <hakimifirdaus944@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Measures the search index on a synthetic 100k-entry catalog with varied names, against scanning every name."""
+
+import gc
+import json
+import random
+import time
+import tracemalloc
+from pathlib import Path
+
+from scripts.bench_common import best_time, prepare_environment
+
+TMP_DIR = prepare_environment()
+
+from elysian_chem_bot.caches import VersionedLRUCache  # noqa: E402
+from elysian_chem_bot.database import Database  # noqa: E402
+from elysian_chem_bot.database_types import SectionNode  # noqa: E402
+from elysian_chem_bot.search import SearchIndex, words_of  # noqa: E402
+
+SUBJECTS = ["Kimia", "Fizik", "Biologi", "Matematik", "Matematik Tambahan", "Sejarah", "Geografi", "Ekonomi"]
+KINDS = ["Kertas 1", "Kertas 2", "Kertas 3", "Nota", "Jawapan", "Latihan", "Modul", "Soalan Ramalan"]
+STATES = ["Johor", "Kedah", "Kelantan", "Melaka", "Perak", "Selangor", "Sabah", "Sarawak", "Terengganu", "Pahang"]
+
+
+def pseudo_word(rng: random.Random) -> str:
+    syllables = ["ka", "ta", "si", "ne", "ro", "mu", "ja", "li", "be", "tor", "lan", "gan", "rim", "sa", "pe"]
+    return "".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))).capitalize()
+
+
+def varied_catalog(files_per_chapter: int = 100, chapters: int = 25, seed: int = 0) -> tuple[str, int]:
+    # seeded for a reproducible catalog, not used for anything secret
+    rng = random.Random(seed)  # noqa: S311
+    topics = [pseudo_word(rng) for _ in range(2000)]
+    catalog: dict = {}
+    entries = 0
+    for subject in SUBJECTS:
+        for form in range(1, 6):
+            section = catalog.setdefault(subject, {}).setdefault(f"Tingkatan {form}", {})
+            for chapter in range(1, chapters + 1):
+                files = section[f"Bab {chapter} {rng.choice(topics)}"] = {}
+                for _ in range(files_per_chapter):
+                    kind, topic, state = rng.choice(KINDS), rng.choice(topics), rng.choice(STATES)
+                    name = f"{kind} {topic} {state} {rng.randint(2010, 2025)}.pdf"
+                    files[name] = ["BQACAgUAAxkBAAIBZ2Z", "AgADZw4AAi7wIVU"]
+
+                entries += len(files) + 1
+
+            entries += 1
+
+        entries += 1
+
+    return json.dumps(catalog), entries
+
+
+def scan(root: SectionNode, query: str) -> list[tuple[str, ...]]:
+    """Without the index: every file whose path has every query word at the start of one of its words."""
+    query_words = words_of(query)
+    results: list[tuple[str, ...]] = []
+    pending: list[tuple[tuple[str, ...], SectionNode]] = [((), root)]
+    while pending:
+        path, section = pending.pop()
+        for name, child in section.children.items():
+            if isinstance(child, SectionNode):
+                pending.append(((*path, name), child))
+                continue
+
+            words = [word for part in (*path, name) for word in words_of(part)]
+            if all(any(word.startswith(q) for word in words) for q in query_words):
+                results.append((*path, name))
+
+    return results
+
+
+if __name__ == "__main__":
+    raw, entries = varied_catalog()
+    db_path = Path(TMP_DIR, "catalog.json")
+    db_path.write_text(raw, encoding="utf-8")
+    db = Database(str(db_path), snapshot_delay=3600)
+    print(f"{entries} sections and files")
+
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    db.adopt_search_index(SearchIndex.from_tree(db.root), db.root)
+    elapsed = time.perf_counter() - start
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"index built in {elapsed * 1000:.0f} ms (traced), {memory / 1024 / 1024:.1f} MiB")
+    built = best_time(lambda: SearchIndex.from_tree(db.root), number=1, repeat=3)
+    print(f"index built from a snapshot, as TreeIndexer does in a worker thread: {built * 1000:.0f} ms")
+
+    for query in ["kimia", "kertas 1 johor 2019", "matematik tambahan bab 3", "jawapan sel", "ramalan", "zzz"]:
+        indexed = best_time(lambda query=query: db.search(query, 20), number=20)
+        scanned = best_time(lambda query=query: scan(db.root, query), number=1, repeat=2)
+        print(f"  {query!r:<28} index: {indexed * 1000:7.3f} ms   scan: {scanned * 1000:8.1f} ms")
+
+    # inline mode: up to 500 results paged through 50 at a time, memoized by the words of the query
+    inline_cache = VersionedLRUCache(1024, 300)
+    inline_cache.put("kertas 1 johor", db.generation, db.search("kertas 1 johor", 500))
+    uncached = best_time(lambda: db.search("kertas 1 johor", 500), number=20)
+    cached = best_time(lambda: inline_cache.get("kertas 1 johor", db.generation), number=1000)
+    print(f"inline query, 500 results: {uncached * 1000:.3f} ms, memoized: {cached * 1_000_000:.2f} µs")
+
+    added = best_time(lambda: db.add_file(["Kimia", "Tingkatan 4"], "Nota Baharu Kinetik.pdf", "id", "unique"), 200)
+    print(f"add_file with the index built: {added * 1000:.3f} ms")
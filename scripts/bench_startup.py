@@ -0,0 +1,87 @@
+# SPDX-License-Identifier: Apache-2.0
+#
+# Copyright 2025 Firdaus Hakimi <hakimifirdaus944@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Compares opening a Database from the JSON snapshot and from the binary snapshot, on synthetic catalogs."""
+
+import gc
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+
+from scripts.bench_common import prepare_environment
+from scripts.bench_memory import synthetic_catalog
+
+TMP_DIR = prepare_environment()
+
+from elysian_chem_bot.binary_snapshot import BinaryBackend  # noqa: E402
+from elysian_chem_bot.database import Database, create_backend  # noqa: E402
+from elysian_chem_bot.storage import JsonBackend, StorageBackend  # noqa: E402
+
+
+def measure(name: str, open_backend: Callable[[], StorageBackend], probe: list[str]) -> None:
+    gc.collect()
+    start = time.perf_counter()
+    db = Database(backend=open_backend())
+    startup = time.perf_counter() - start
+    start = time.perf_counter()
+    db.get_file(probe, "Kertas 0 SPM 2000.pdf")
+    first_lookup = time.perf_counter() - start
+    del db
+
+    gc.collect()
+    tracemalloc.start()
+    db = Database(backend=open_backend())
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del db
+    print(
+        f"  {name:<8} startup: {startup * 1000:9.2f} ms   first lookup: {first_lookup * 1000:7.3f} ms   "
+        f"memory: {memory / 1024 / 1024:7.2f} MiB"
+    )
+
+
+def measure_compaction(binary_path: Path, probe: list[str]) -> None:
+    db = Database(backend=BinaryBackend(str(binary_path)))
+    db.add_file(probe, "Kertas baru.pdf", "file id", "file unique id")
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    # one section changed, the rest of the tree is still only mapped
+    db.backend.compact()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  compaction after one add_file: {elapsed * 1000:9.2f} ms   peak memory: {peak / 1024 / 1024:7.2f} MiB")
+
+
+if __name__ == "__main__":
+    for files in (10, 100, 500):
+        json_path = Path(TMP_DIR, f"catalog-{files}.json")
+        json_path.write_text(synthetic_catalog(files=files), encoding="utf-8")
+        start = time.perf_counter()
+        create_backend("binary", str(json_path))
+        migration = time.perf_counter() - start
+        binary_path = json_path.with_suffix(".snapshot")
+        print(
+            f"{20 * 50 * files} files: JSON {json_path.stat().st_size / 1024 / 1024:.1f} MiB, "
+            f"binary {binary_path.stat().st_size / 1024 / 1024:.1f} MiB (converted in {migration:.2f} s)"
+        )
+        probe = ["Subjek 7", "Bab 42"]
+        measure("json", lambda json_path=json_path: JsonBackend(str(json_path)), probe)
+        measure("binary", lambda binary_path=binary_path: BinaryBackend(str(binary_path)), probe)
+        measure_compaction(binary_path, probe)
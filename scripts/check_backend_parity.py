@@ -0,0 +1,271 @@
+# SPDX-License-Identifier: Apache-2.0
+#
+# Copyright 2025 Firdaus Hakimi <hakimifirdaus944@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Runs the same random mutations through a Database on every storage backend and checks they agree.
+
+After every step, each backend must have raised the same error as the
+in-memory tree, and answer get_file and list_files like it. The same
+mutations are also applied in random sized Database.batch blocks to
+another JSON database, which must end up with the same tree (if a batch
+raises, it must change nothing, and its mutations are retried one batch
+each). Every database's file_unique_id and search indexes must match a
+walk of its tree. At the end, each backend is reopened and must load the same tree.
+Exits non-zero on the first mismatch. Run with `python -m scripts.check_backend_parity [seed] [steps]`.
+"""
+
+import json
+import random
+import sys
+from collections.abc import Callable
+from pathlib import Path
+from typing import cast
+
+from scripts.bench_common import prepare_environment
+
+TMP_DIR = prepare_environment()
+
+from elysian_chem_bot.binary_snapshot import BinaryBackend, write_binary_snapshot_temp  # noqa: E402
+from elysian_chem_bot.database import Database  # noqa: E402
+from elysian_chem_bot.database_types import FileNode, SectionNode, Sections, encode_node  # noqa: E402
+from elysian_chem_bot.persist import commit_file  # noqa: E402
+from elysian_chem_bot.search import SearchIndex  # noqa: E402
+from elysian_chem_bot.sqlite_storage import SqliteBackend  # noqa: E402
+from elysian_chem_bot.storage import JsonBackend, StorageBackend  # noqa: E402
+
+NAMES = ["Kimia", "Fizik", "Bab 1", "Bab 2", "nota.pdf", "soalan.pdf", "jawapan.zip", "ü"]
+
+
+def random_path(rng: random.Random) -> Sections:
+    return [rng.choice(NAMES) for _ in range(rng.randint(0, 3))]
+
+
+def outcome(func: Callable[[], object]) -> object:
+    try:
+        return func()
+    except (ValueError, KeyError) as e:
+        return type(e).__name__
+
+
+def apply_batch(db: Database, ops: list[tuple[str, tuple]]) -> None:
+    with db.batch() as batch:
+        for op, args in ops:
+            getattr(batch, op)(*args)
+
+
+def apply_chunk(db: Database, ops: list[tuple[str, tuple]]) -> None:
+    before = dump(db.root)
+    if outcome(lambda: apply_batch(db, ops)) is None:
+        return
+
+    if dump(db.root) != before:
+        sys.exit("a batch that raised changed the tree")
+
+    for op in ops:
+        outcome(lambda op=op: apply_batch(db, [op]))
+
+
+def files_under(root: SectionNode, path: tuple[str, ...]) -> list[tuple[tuple[str, ...], str]]:
+    section: SectionNode | FileNode = root
+    for name in path:
+        section = cast(SectionNode, section).children[name]
+
+    return [(file_path[:-1], file_path[-1]) for file_path in iter_paths(cast(SectionNode, section), path)]
+
+
+def iter_paths(section: SectionNode, path: tuple[str, ...]) -> list[tuple[str, ...]]:
+    paths: list[tuple[str, ...]] = []
+    for name, child in section.children.items():
+        if isinstance(child, SectionNode):
+            paths.extend(iter_paths(child, (*path, name)))
+        else:
+            paths.append((*path, name))
+
+    return paths
+
+
+def search_matches(db: Database, rng: random.Random) -> bool:
+    expected = SearchIndex()
+    pending: list[tuple[tuple[str, ...], SectionNode]] = [((), db.root)]
+    while pending:
+        path, section = pending.pop()
+        for name, child in section.children.items():
+            expected.add(path, name, is_file=isinstance(child, FileNode))
+            if isinstance(child, SectionNode):
+                pending.append(((*path, name), child))
+
+    queries = [*NAMES, *(f"{rng.choice(NAMES)} {rng.choice(NAMES)[:2]}" for _ in range(3))]
+    return all(
+        db.search(query, 1000) == expected.search(query, 1000, lambda path: files_under(db.root, path))
+        for query in queries
+    )
+
+
+def locations_match(db: Database) -> bool:
+    expected: dict[str, list[tuple[str, ...]]] = {}
+    pending: list[tuple[tuple[str, ...], SectionNode]] = [((), db.root)]
+    while pending:
+        path, section = pending.pop()
+        for name, child in section.children.items():
+            if isinstance(child, SectionNode):
+                pending.append(((*path, name), child))
+            else:
+                expected.setdefault(child.file_unique_id, []).append((*path, name))
+
+    duplicates = {file_unique_id: sorted(paths) for file_unique_id, paths in expected.items() if len(paths) > 1}
+    return (
+        all(sorted(db.file_locations(key)) == sorted(paths) for key, paths in expected.items())
+        and {key: sorted(paths) for key, paths in db.duplicate_files().items()} == duplicates
+    )
+
+
+def dump(root: SectionNode) -> str:
+    return json.dumps(root, default=encode_node)
+
+
+def answers(answering: Database | StorageBackend, probe: Sections, file_name: str) -> tuple[object, object]:
+    return outcome(lambda: answering.get_file(probe, file_name)), outcome(lambda: answering.list_files(probe))
+
+
+def random_op(rng: random.Random, step: int) -> tuple[str, tuple]:
+    sections = random_path(rng)
+    name = rng.choice(NAMES)
+    op = rng.choice(["add_section", "add_section", "remove_section", "add_file", "add_file", "remove_file"])
+    args: tuple = {
+        "add_section": (sections,),
+        "remove_section": ([*sections, name],),
+        "add_file": (sections, name, f"file_id {step}", f"unique {step % 13}"),
+        "remove_file": (sections, name),
+    }[op]
+    return op, args
+
+
+def open_databases(
+    seed: int,
+) -> tuple[dict[str, Callable[[], StorageBackend]], dict[str, Database], dict[str, Database]]:
+    """Opens a fresh database on every backend, and the ones mutated in batches. Also returns how to reopen them."""
+    json_path = str(Path(TMP_DIR, f"{seed}.json"))
+    sqlite_path = str(Path(TMP_DIR, f"{seed}.sqlite3"))
+    snapshot_path = str(Path(TMP_DIR, f"{seed}.snapshot"))
+    batched_json_path = str(Path(TMP_DIR, f"{seed}-batched.json"))
+    batched_sqlite_path = str(Path(TMP_DIR, f"{seed}-batched.sqlite3"))
+    open_backends: dict[str, Callable[[], StorageBackend]] = {
+        "json": lambda: JsonBackend(json_path, compact_threshold=7),
+        "sqlite": lambda: SqliteBackend(sqlite_path),
+        "binary": lambda: BinaryBackend(snapshot_path, compact_threshold=5),
+        "json batched": lambda: JsonBackend(batched_json_path, 7),
+        "sqlite batched": lambda: SqliteBackend(batched_sqlite_path),
+    }
+    Path(json_path).write_text("{}", encoding="utf-8")
+    Path(batched_json_path).write_text("{}", encoding="utf-8")
+    commit_file(write_binary_snapshot_temp(snapshot_path, SectionNode()), snapshot_path)
+    opened = {name: Database(backend=open_backend()) for name, open_backend in open_backends.items()}
+    # built from the start, so they are updated by every mutation
+    for db in opened.values():
+        db.build_indexes()
+
+    databases = {name: db for name, db in opened.items() if not name.endswith("batched")}
+    batched = {name: db for name, db in opened.items() if name.endswith("batched")}
+    return open_backends, databases, batched
+
+
+def check_indexes(where: str, name: str, db: Database, rng: random.Random) -> None:
+    if not locations_match(db):
+        sys.exit(f"{where}: {name} file_unique_id index diverged")
+
+    if not search_matches(db, rng):
+        sys.exit(f"{where}: {name} search index diverged")
+
+
+def check_batched(
+    where: str, batched: dict[str, Database], chunk: list[tuple[str, tuple]], reference: Database, rng: random.Random
+) -> None:
+    """Applies `chunk` to the batched databases, which must then agree with `reference`."""
+    probe = random_path(rng)
+    file_name = rng.choice(NAMES)
+    expected = answers(reference, probe, file_name)
+    for name, db in batched.items():
+        apply_chunk(db, chunk)
+        if dump(db.root) != dump(reference.root):
+            sys.exit(f"{where}: {name} diverged after {chunk}")
+
+        check_indexes(f"{where}, after {chunk}", name, db, rng)
+        for answering in (db, db.backend):
+            if (got := answers(answering, probe, file_name)) != expected:
+                sys.exit(f"{where}: {name} answered {got}, the tree {expected}")
+
+
+def check_backends(where: str, databases: dict[str, Database], rng: random.Random) -> None:
+    """The indexes of every database must match its tree, and its backend must answer like it."""
+    for name, db in databases.items():
+        check_indexes(where, name, db, rng)
+        probe = random_path(rng)
+        file_name = rng.choice(NAMES)
+        expected = answers(db, probe, file_name)
+        if (got := answers(db.backend, probe, file_name)) != expected:
+            sys.exit(f"{where}: {name} backend answered {got}, the tree {expected}")
+
+
+def check(seed: int, steps: int) -> None:
+    # reproducible mutations, not used for anything secret
+    rng = random.Random(seed)  # noqa: S311
+    open_backends, databases, batched = open_databases(seed)
+    chunk: list[tuple[str, tuple]] = []
+    chunk_size = 1
+
+    for step in range(steps):
+        op, args = random_op(rng, step)
+        results = {
+            name: outcome(lambda db=db, op=op, args=args: getattr(db, op)(*args)) for name, db in databases.items()
+        }
+        trees = {name: dump(db.root) for name, db in databases.items()}
+        if len(set(map(str, results.values()))) != 1 or len(set(trees.values())) != 1:
+            sys.exit(f"seed {seed} step {step}: {op}{args} diverged: {results}")
+
+        chunk.append((op, args))
+        if len(chunk) >= chunk_size or step == steps - 1:
+            check_batched(f"seed {seed} step {step}", batched, chunk, databases["json"], rng)
+            chunk = []
+            chunk_size = rng.randint(1, 8)
+
+        check_backends(f"seed {seed} step {step}, after {op}{args}", databases, rng)
+
+    expected_tree = dump(databases["json"].root)
+    for name, db in {**databases, **batched}.items():
+        db.backend.flush()
+        reloaded = open_backends[name]().load()
+        if dump(reloaded) != expected_tree:
+            sys.exit(f"seed {seed}: {name} backend reloaded a different tree")
+
+    files = sum(isinstance(node, FileNode) for node in iter_nodes(databases["json"].root))
+    print(f"seed {seed}: {steps} steps, {files} files left, backends agree")
+
+
+def iter_nodes(section: SectionNode) -> list[SectionNode | FileNode]:
+    nodes: list[SectionNode | FileNode] = []
+    for child in section.children.values():
+        nodes.append(child)
+        if isinstance(child, SectionNode):
+            nodes.extend(iter_nodes(child))
+
+    return nodes
+
+
+if __name__ == "__main__":
+    first_seed = int(sys.argv[1]) if len(sys.argv) > 1 else 0
+    steps = int(sys.argv[2]) if len(sys.argv) > 2 else 500  # noqa: PLR2004
+    for seed in range(first_seed, first_seed + 10):
+        check(seed, steps)